@@ -6,15 +6,32 @@ from routes.resume_routes import resume_bp
 from routes.portfolio_routes import portfolio_bp
 from routes.social_routes import social_bp
 from routes.interview_routes import interview_bp
+from routes.admin_routes import admin_bp
+from routes.linkedin_routes import bp as linkedin_bp
 from services.resume_service import ResumeService
 from services.portfolio_service import PortfolioService
 from services.social_service import SocialService
 from services.interview_service import InterviewService
+from services.resilience import breaker_states, CircuitBreaker
+from services.hedging import hedge_stats
+from services.rate_limiter import init_rate_limiting
+from services.overload import init_overload_handlers
+from services.llm_governor import governor_states
+from services.llm_scheduler import set_request_context, scheduler_stats
+from services.log_pipeline import configure_logging, log_stats
+from services.metrics import init_metrics
+from services.profiler import init_profiling
+from services.tracing import init_tracing, span
+from services.admin_auth import request_tenant
+from config import Config
 from werkzeug.utils import secure_filename # type: ignore
 
 # Load environment variables
 load_dotenv()
 
+# Queue log records to a rotating file so request threads never wait on disk
+configure_logging()
+
 app = Flask(__name__)
 
 # Enable CORS for all routes with proper configuration
@@ -23,12 +40,36 @@ CORS(app,
          r"/*": {
              "origins": ["http://localhost:3000", "http://localhost:3001", "http://localhost:3002"],
              "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-             "allow_headers": ["Content-Type", "Authorization", "Accept"],
+             "allow_headers": ["Content-Type", "Authorization", "Accept", "X-Tenant-ID", "X-Tenant-Key", "X-Admin-Token", "X-Profile", "X-Trace-Id"],
+             "expose_headers": ["X-Trace-Id", "X-Profile-Id"],
              "supports_credentials": True,
              "max_age": 3600
          }
      })
 
+# Root span per request, trace id returned in X-Trace-Id
+init_tracing(app)
+
+# Per-route latency histograms and the /metrics endpoint (registered first so rejected requests are timed too)
+init_metrics(app)
+
+# Enforce per-client, per-endpoint rate limits
+init_rate_limiting(app)
+
+# Open circuits, LLM queue timeouts (503) and spent tenant budgets (429) answer with Retry-After
+init_overload_handlers(app)
+
+# Opt-in sampling profiler (admin token + X-Profile header, or PROFILE_SAMPLE_RATE)
+init_profiling(app)
+
+@app.before_request
+def set_llm_request_context():
+    # Priority class and tenant for any LLM calls made while serving this request
+    set_request_context(
+        priority=Config.LLM_ENDPOINT_PRIORITIES.get(request.endpoint, Config.LLM_DEFAULT_PRIORITY),
+        tenant=request_tenant()
+    )
+
 # Configure upload folder
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 if not os.path.exists(UPLOAD_FOLDER):
@@ -48,6 +89,8 @@ app.register_blueprint(resume_bp, url_prefix="/api/resume")
 app.register_blueprint(portfolio_bp, url_prefix="/api/portfolio")
 app.register_blueprint(social_bp, url_prefix="/api/social")
 app.register_blueprint(interview_bp, url_prefix="/api/interview")
+app.register_blueprint(linkedin_bp, url_prefix="/api/linkedin")
+app.register_blueprint(admin_bp, url_prefix="/api/admin")
 
 @app.route('/')
 def home():
@@ -58,9 +101,16 @@ def home():
 
 @app.route('/health')
 def health_check():
+    upstreams = breaker_states()
+    degraded = any(b['state'] != CircuitBreaker.CLOSED for b in upstreams.values())
     return jsonify({
-        "status": "healthy",
-        "version": "1.0.0"
+        "status": "degraded" if degraded else "healthy",
+        "version": "1.0.0",
+        "upstreams": upstreams,
+        "hedging": hedge_stats(),
+        "llm_concurrency": governor_states(),
+        "llm_scheduler": scheduler_stats(),
+        "logging": log_stats()
     })
 
 # Handle OPTIONS method for CORS preflight
@@ -96,7 +146,8 @@ def analyze_resume():
         # Ensure the upload directory exists
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         
-        file.save(filepath)
+        with span('resume.save_upload'):
+            file.save(filepath)
 
         try:
             # Extract text based on file type
@@ -12,6 +12,19 @@ class Config:
     LINKEDIN_API_KEY = os.getenv('LINKEDIN_API_KEY')
     GITHUB_API_KEY = os.getenv('GITHUB_API_KEY')
     TWITTER_API_KEY = os.getenv('TWITTER_API_KEY')
+    PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')
+    
+    # GitHub API (point GITHUB_API_URL at tools/github_stub_server.py to work offline)
+    GITHUB_API_URL = os.getenv('GITHUB_API_URL') or 'https://api.github.com'
+    GITHUB_TOKEN = os.getenv('GITHUB_TOKEN') or GITHUB_API_KEY
+    GITHUB_PAGE_SIZE = 100  # the API maximum
+    GITHUB_MAX_PAGES = 30
+    GITHUB_FETCH_WORKERS = 8
+    GITHUB_CACHE_DIR = os.path.join(BASE_DIR, 'data', 'github_cache')
+    GITHUB_CACHE_FRESH_SECONDS = int(os.getenv('GITHUB_CACHE_FRESH_SECONDS', '300'))  # served without revalidating
+    GITHUB_STATS_WORKERS = 16  # concurrent per-repository language/commit lookups
+    GITHUB_STATS_MAX_REPOS = 100  # most-starred repositories analyzed in detail
+    GITHUB_STATS_DEADLINE = 8  # seconds; later lookups are left out of the totals
     
     # Database
     DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://localhost/ai_branding')
@@ -24,13 +37,164 @@ class Config:
     OPENAI_MODEL = "gpt-3.5-turbo"
     OPENAI_TEMPERATURE = 0.7
     
+    # LLM Provider Endpoints
+    OPENAI_API_URL = "https://api.openai.com/v1"
+    PERPLEXITY_API_URL = "https://api.perplexity.ai"
+    # Points every provider at a local chat-completions stand-in (see tools/llm_stub_server.py)
+    LLM_STUB_URL = os.getenv('LLM_STUB_URL')
+    
+    # Upstream Resilience (LLM providers and GitHub)
+    UPSTREAM_CONNECT_TIMEOUT = 3.05  # seconds
+    UPSTREAM_READ_TIMEOUT = 30  # seconds per attempt
+    UPSTREAM_DEADLINE = 60  # seconds across all attempts
+    RETRY_MAX_ATTEMPTS = 3
+    RETRY_BASE_DELAY = 0.5  # seconds
+    RETRY_MAX_DELAY = 8  # seconds
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RECOVERY_TIMEOUT = 30  # seconds
+    
+    # Request Hedging (opt-in): duplicate slow LLM calls and keep the first to finish
+    LLM_HEDGING_ENABLED = os.getenv('LLM_HEDGING_ENABLED', 'false').lower() == 'true'
+    HEDGE_PERCENTILE = 95  # hedge once first-token latency exceeds this rolling percentile
+    HEDGE_WINDOW = 200  # samples in the rolling latency window
+    HEDGE_MIN_SAMPLES = 20  # use HEDGE_DEFAULT_DELAY until this many samples exist
+    HEDGE_DEFAULT_DELAY = 2.0  # seconds
+    HEDGE_MIN_DELAY = 0.2  # seconds
+    HEDGE_MAX_RATIO = 0.1  # at most 10% extra upstream requests
+    HEDGE_POOL_SIZE = 32
+    
+    # Prompt Token Budgets (per endpoint, prompt side only)
+    PROMPT_TOKEN_BUDGET_DEFAULT = 3000
+    PROMPT_TOKEN_BUDGETS = {
+        'interview.generate_questions': 2000,
+        'interview.generate_answers': 2000,
+        'interview.generate_answers_batch': 3000,
+        'interview.analyze_response': 2500,
+        'interview.generate_feedback': 3500,
+        'linkedin.analyze_profile': 3000,
+        'linkedin.optimize_profile': 3000,
+        'portfolio.generate_portfolio': 1500,
+        'portfolio.customize_portfolio': 1200,
+        'social.generate_post': 1000,
+        'social.suggest_hashtags': 1500,
+        'social.generate_calendar': 1200
+    }
+    
     # File Upload Settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt'}
     
+    # Portfolio Rendering (the model writes copy only; sites render from local templates)
+    PORTFOLIO_TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates', 'portfolio')
+    PORTFOLIO_TEMPLATE_CACHE_DIR = os.path.join(BASE_DIR, 'data', 'template_cache')
+    PORTFOLIO_MAX_PROJECTS = 6
+    PORTFOLIO_COPY_MAX_TOKENS = 800
+    PORTFOLIO_DEPLOY_DIR = os.path.join(BASE_DIR, 'data', 'sites')
+    PORTFOLIO_SITE_BASE_URL = os.getenv('PORTFOLIO_SITE_BASE_URL') or (
+        os.getenv('API_URL', 'http://localhost:5000').rstrip('/') + '/api/portfolio/sites')
+    
+    # Social Content Calendars (batched post generation, streamed as NDJSON)
+    SOCIAL_CALENDAR_WORKERS = 4
+    
+    # Posting-time analytics (per-user weekday x hour engagement aggregates)
+    ENGAGEMENT_DATA_DIR = os.path.join(BASE_DIR, 'data', 'engagement')
+    ENGAGEMENT_MIN_POSTS = 20  # below this, general best practices are used
+    ENGAGEMENT_PRIOR_POSTS = 5  # slot means are shrunk towards the overall mean by this many posts
+    ENGAGEMENT_TOP_SLOTS = 3
+    
+    # Hashtag index (suggestions from a local corpus; the LLM only when it is unsure)
+    HASHTAG_INDEX_ENABLED = os.getenv('HASHTAG_INDEX_ENABLED', 'true').lower() == 'true'
+    HASHTAG_CORPUS_PATH = os.path.join(BASE_DIR, 'data', 'hashtag_corpus.jsonl')
+    HASHTAG_MIN_CONFIDENCE = float(os.getenv('HASHTAG_MIN_CONFIDENCE', '0.5'))
+    HASHTAG_MIN_TERM_POSTS = 2  # terms seen in fewer posts are unknown to the index
+    HASHTAG_SUGGESTIONS = 10
+    HASHTAG_TRENDING_HALF_LIFE_DAYS = 7
+    HASHTAG_TRENDING_WEIGHT = 0.2  # how much recent use lifts a suggestion
+    
+    # Mock Interview Sessions
+    INTERVIEW_SESSION_DIR = os.path.join(BASE_DIR, 'data', 'interview_sessions')
+    INTERVIEW_PREFETCH_WORKERS = 8
+    INTERVIEW_MAX_QUESTIONS = 10
+    
+    # Interview Question Bank (near-duplicate job descriptions reuse questions)
+    QUESTION_BANK_ENABLED = os.getenv('QUESTION_BANK_ENABLED', 'true').lower() == 'true'
+    QUESTION_BANK_PATH = os.path.join(BASE_DIR, 'data', 'question_bank.jsonl')
+    QUESTION_BANK_SIMILARITY = float(os.getenv('QUESTION_BANK_SIMILARITY', '0.75'))  # estimated Jaccard
+    QUESTION_BANK_FRESH_QUESTIONS = 0  # fresh questions mixed into every bank hit
+    
+    # Local answer pre-scoring (clearly weak answers skip the LLM)
+    ANSWER_PRESCORE_ENABLED = os.getenv('ANSWER_PRESCORE_ENABLED', 'true').lower() == 'true'
+    ANSWER_PRESCORE_MIN_WORDS = 8
+    ANSWER_PRESCORE_MAX_FILLER_RATIO = 0.25
+    ANSWER_PRESCORE_MAX_LOCAL_SCORE = 40
+    
     # API Rate Limiting
     RATELIMIT_ENABLED = True
     RATELIMIT_STORAGE_URL = "memory://"
-    RATELIMIT_STRATEGY = "fixed-window"
-    RATELIMIT_DEFAULT = "100 per minute" 
\ No newline at end of file
+    RATELIMIT_STRATEGY = "token-bucket"
+    RATELIMIT_DEFAULT = "100 per minute"  # per client, per endpoint
+    RATELIMIT_ENDPOINT_LIMITS = {
+        'interview.generate_answers_batch': "20 per minute",
+        'resume.analyze_resume': "30 per minute",
+        'analyze_resume': "30 per minute"
+    }
+    RATELIMIT_EXEMPT = {'health_check', 'metrics', 'home', 'static'}
+    
+    # Outbound LLM Concurrency (per provider)
+    LLM_MAX_CONCURRENCY = {
+        'openai': 16,
+        'perplexity': 8
+    }
+    LLM_MAX_CONCURRENCY_DEFAULT = 8
+    LLM_QUEUE_TIMEOUT = 30  # seconds a call may wait for a free slot
+    LLM_QUEUE_RETRY_AFTER = 5  # Retry-After (seconds) sent when that wait times out
+    
+    # LLM Scheduling: interactive calls jump the queue and keep reserved slots
+    LLM_INTERACTIVE_RESERVED_SLOTS = 2
+    LLM_ENDPOINT_PRIORITIES = {
+        'interview.generate_questions': 'interactive',
+        'interview.generate_answers': 'interactive',
+        'interview.analyze_response': 'interactive',
+        'interview.mock_interview': 'interactive',
+        'interview.get_mock_interview': 'interactive',
+        'interview.answer_mock_interview': 'interactive',
+        'interview.generate_feedback': 'interactive',
+        'interview.generate_answers_batch': 'default',
+        'social.content_calendar': 'batch'
+    }
+    LLM_DEFAULT_PRIORITY = 'default'
+    TENANT_HEADER = 'X-Tenant-ID'
+    TENANT_KEY_HEADER = 'X-Tenant-Key'
+    # "tenant:key,tenant:key"; a tenant id is only honoured with its key, otherwise the client address is the tenant
+    TENANT_KEYS = dict(
+        pair.strip().split(':', 1) for pair in os.getenv('TENANT_KEYS', '').split(',') if ':' in pair)
+    TENANT_TOKENS_PER_MINUTE = 200000
+    LLM_COMPLETION_ESTIMATE = 500  # tokens reserved when a call sets no max_tokens
+    
+    # Logging (queued, rotated JSON lines; bulky payloads are sampled and truncated)
+    LOG_FILE = os.getenv('LOG_FILE', os.path.join(BASE_DIR, 'logs', 'backend.log'))
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_TO_CONSOLE = os.getenv('LOG_TO_CONSOLE', 'true').lower() == 'true'  # also echo records to stderr
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
+    LOG_QUEUE_SIZE = 10000  # records beyond this are dropped rather than blocking requests
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '0.05'))
+    LOG_PAYLOAD_MAX_CHARS = 2000
+    LOG_MESSAGE_MAX_CHARS = 4000
+    
+    # Admin endpoints and request profiling
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')  # admin features are off when unset
+    ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+    PROFILE_HEADER = 'X-Profile'  # "1" stores the profile, "inline" returns it instead of the response
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))  # share of requests profiled automatically
+    PROFILE_INTERVAL = 0.005  # seconds between stack samples
+    PROFILE_DIR = os.path.join(BASE_DIR, 'data', 'profiles')
+    PROFILE_MAX_STORED = 50
+    
+    # Request tracing (spans per stage; trace id returned in the response header)
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+    TRACE_EXPORT = os.getenv('TRACE_EXPORT', 'memory')  # memory, jsonl or both
+    TRACE_FILE = os.path.join(BASE_DIR, 'logs', 'traces.jsonl')
+    TRACE_BUFFER_TRACES = 200
+    TRACE_HEADER = 'X-Trace-Id'
@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify, Response
+from services.admin_auth import admin_required
+from services.profiler import profile_store
+from services.tracing import trace_buffer
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+@admin_bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """
+    Endpoint listing stored request profiles, newest first
+    """
+    return jsonify(profile_store.list())
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def get_profile(profile_id):
+    """
+    Endpoint for a profile summary (top functions by sample share)
+    """
+    try:
+        summary = profile_store.get(profile_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if summary is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(summary)
+
+@admin_bp.route('/profiles/<profile_id>/folded', methods=['GET'])
+@admin_required
+def download_profile(profile_id):
+    """
+    Endpoint for downloading a profile as collapsed stacks (flamegraph.pl / speedscope)
+    """
+    try:
+        folded = profile_store.folded(profile_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if folded is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return Response(folded, content_type='text/plain; charset=utf-8',
+                    headers={'Content-Disposition': f'attachment; filename={profile_id}.folded'})
+
+@admin_bp.route('/traces', methods=['GET'])
+@admin_required
+def list_traces():
+    """
+    Endpoint listing recent request traces from the in-memory buffer, newest first
+    """
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify(trace_buffer.summaries(limit))
+
+@admin_bp.route('/traces/<trace_id>', methods=['GET'])
+@admin_required
+def get_trace(trace_id):
+    """
+    Endpoint for every span of one trace, ordered by start time
+    """
+    spans = trace_buffer.get(trace_id.lower())
+    if not spans:
+        return jsonify({'error': 'Trace not found'}), 404
+    return jsonify({'trace_id': trace_id.lower(), 'spans': spans})
@@ -1,5 +1,11 @@
+import logging
 from flask import Blueprint, request, jsonify
 from services.interview_service import InterviewService
+from services.interview_session import SessionConflictError
+from services.overload import OVERLOAD_ERRORS
+from services.question_bank import get_question_bank
+
+logger = logging.getLogger(__name__)
 
 # Define the blueprint with the correct name
 interview_bp = Blueprint('interview', __name__)
@@ -21,6 +27,8 @@ def generate_questions():
         result = interview_service.generate_questions(job_description, difficulty)
         return jsonify(result)
         
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -41,6 +49,32 @@ def generate_answers():
         result = interview_service.generate_answers(question, job_context, difficulty)
         return jsonify(result)
         
+    except OVERLOAD_ERRORS:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@interview_bp.route('/generate-answers-batch', methods=['POST'])
+def generate_answers_batch():
+    """
+    Endpoint for generating sample answers for a whole question set
+    """
+    try:
+        data = request.get_json()
+        questions = data.get('questions')
+        job_context = data.get('job_context')
+        difficulty = data.get('difficulty', 'medium')
+        
+        if not questions or not isinstance(questions, list):
+            return jsonify({'error': 'A list of questions is required'}), 400
+            
+        result = interview_service.generate_answers_batch(questions, job_context, difficulty)
+        return jsonify({'answers': result})
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -56,13 +90,54 @@ def mock_interview():
     try:
         result = interview_service.conduct_mock_interview(
             job_description=data['job_description'],
-            duration=data.get('duration', 30)
+            duration=data.get('duration', 30),
+            difficulty=data.get('difficulty', 'medium')
         )
         return jsonify(result)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         print(f"Error conducting mock interview: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@interview_bp.route('/mock-interview/<session_id>', methods=['GET'])
+def get_mock_interview(session_id):
+    """
+    Endpoint for resuming a mock interview session
+    """
+    try:
+        result = interview_service.get_mock_interview(session_id)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except OVERLOAD_ERRORS:
+        raise
+    except Exception as e:
+        logger.exception("Error loading mock interview")
+        return jsonify({'error': str(e)}), 500
+
+@interview_bp.route('/mock-interview/<session_id>/answer', methods=['POST'])
+def answer_mock_interview(session_id):
+    """
+    Endpoint for answering the current mock interview question
+    """
+    data = request.get_json()
+    if not data or not data.get('answer'):
+        return jsonify({'error': 'Answer is required'}), 400
+    
+    try:
+        result = interview_service.answer_mock_interview(session_id, data['answer'])
+        return jsonify(result)
+    except SessionConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
+    except Exception as e:
+        logger.exception("Error answering mock interview")
+        return jsonify({'error': str(e)}), 500
+
 @interview_bp.route('/analyze-response', methods=['POST'])
 def analyze_response():
     """
@@ -80,6 +155,8 @@ def analyze_response():
         result = interview_service.analyze_response(response, question, job_context)
         return jsonify(result)
         
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -92,8 +169,19 @@ def generate_feedback():
     try:
         feedback = interview_service.generate_feedback(
             interview_data=data['interview_data'],
-            job_context=data.get('job_context', {})
+            job_context=data.get('job_context')
         )
         return jsonify(feedback)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500 
+
+@interview_bp.route('/question-bank/stats', methods=['GET'])
+def question_bank_stats():
+    """
+    Endpoint for question bank size and hit rate
+    """
+    return jsonify(get_question_bank().stats())
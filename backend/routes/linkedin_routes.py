@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from services.linkedin_service import LinkedInService
+from services.overload import OVERLOAD_ERRORS
 from config import Config
 
 bp = Blueprint('linkedin', __name__, url_prefix='/api/linkedin')
@@ -14,6 +15,8 @@ def analyze_profile():
     try:
         analysis = linkedin_service.analyze_profile(data['profile_url'])
         return jsonify(analysis)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -26,6 +29,8 @@ def optimize_profile():
     try:
         optimization = linkedin_service.optimize_profile(data['profile_data'])
         return jsonify(optimization)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -42,6 +47,8 @@ def generate_post():
             length=data.get('length', 'medium')
         )
         return jsonify(post)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -54,5 +61,7 @@ def suggest_keywords():
     try:
         keywords = linkedin_service.suggest_keywords(data['profile_data'])
         return jsonify(keywords)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500 
\ No newline at end of file
@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
+import mimetypes
+from flask import Blueprint, request, jsonify, send_file
 from services.portfolio_service import PortfolioService
+from services.overload import OVERLOAD_ERRORS
 from config import Config
 
 portfolio_bp = Blueprint('portfolio', __name__, url_prefix='/api/portfolio')
@@ -12,8 +14,12 @@ def generate_portfolio():
         return jsonify({"error": "User data is required"}), 400
     
     try:
-        portfolio = portfolio_service.generate_portfolio(data['user_data'])
+        portfolio = portfolio_service.generate_portfolio(data['user_data'], theme=data.get('theme'))
         return jsonify(portfolio)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -24,8 +30,13 @@ def analyze_github():
         return jsonify({"error": "GitHub username is required"}), 400
     
     try:
-        analysis = portfolio_service.analyze_github_profile(data['github_username'])
+        analysis = portfolio_service.analyze_github(
+            data['github_username'],
+            include_stats=data.get('include_stats', True)
+        )
         return jsonify(analysis)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -41,6 +52,10 @@ def customize_portfolio():
             customization=data['customization']
         )
         return jsonify(customized)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -51,7 +66,34 @@ def deploy_portfolio():
         return jsonify({"error": "Portfolio data is required"}), 400
     
     try:
-        deployment = portfolio_service.deploy_portfolio(data['portfolio_data'])
+        deployment = portfolio_service.deploy_portfolio(data['portfolio_data'], site_id=data.get('site_id'))
         return jsonify(deployment)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+@portfolio_bp.route('/sites/<site_id>/', defaults={'filename': 'index.html'}, methods=['GET'])
+@portfolio_bp.route('/sites/<site_id>/<path:filename>', methods=['GET'])
+def serve_site(site_id, filename):
+    """
+    Endpoint serving deployed portfolio files, precompressed when the client
+    accepts it; fingerprinted assets are cached for a year
+    """
+    try:
+        resolved = portfolio_service.deployer.resolve(site_id, filename, request.headers.get('Accept-Encoding'))
+    except ValueError:
+        resolved = None
+    if resolved is None:
+        return jsonify({"error": "Not found"}), 404
+
+    path, encoding, immutable = resolved
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                         conditional=True, etag=True)
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable' if immutable else 'no-cache'
+    return response 
\ No newline at end of file
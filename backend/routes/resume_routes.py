@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify # type: ignore
 from werkzeug.utils import secure_filename # type: ignore
 import os
 from services.resume_service import ResumeService
+from services.overload import OVERLOAD_ERRORS
 from config import Config
 
 # Create uploads directory if it doesn't exist
@@ -59,6 +60,8 @@ def analyze_resume():
                 pass
             raise e
             
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         print(f"Error analyzing resume: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -75,6 +78,8 @@ def generate_resume():
     try:
         result = resume_service.generate_resume(data['job_description'])
         return jsonify(result)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         print(f"Error generating resume: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -91,6 +96,8 @@ def generate_cover_letter():
             resume=data['resume']
         )
         return jsonify(cover_letter)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
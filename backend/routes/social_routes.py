@@ -1,7 +1,12 @@
-from flask import Blueprint, request, jsonify
+import json
+import logging
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from services.social_service import SocialService
+from services.overload import OVERLOAD_ERRORS
 from config import Config
 
+logger = logging.getLogger(__name__)
+
 # Define the blueprint with the correct name
 social_bp = Blueprint('social', __name__, url_prefix='/api/social')
 social_service = SocialService()
@@ -23,6 +28,8 @@ def generate_post():
             length=data.get('length', 'medium')
         )
         return jsonify(result)
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         print(f"Error generating post: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -42,10 +49,70 @@ def generate_thread():
             platform=data.get('platform', 'twitter')
         )
         return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
     except Exception as e:
         print(f"Error generating thread: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@social_bp.route('/split-thread', methods=['POST'])
+def split_thread():
+    """
+    Endpoint for splitting text into a thread of posts within the platform's length limit
+    """
+    data = request.get_json()
+    if not data or not data.get('text'):
+        return jsonify({'error': 'Text is required'}), 400
+
+    try:
+        result = social_service.split_thread(
+            text=data['text'],
+            platform=data.get('platform', 'twitter'),
+            numbering=data.get('numbering', True),
+            keep_paragraphs=data.get('keep_paragraphs', True)
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@social_bp.route('/content-calendar', methods=['POST'])
+def content_calendar():
+    """
+    Endpoint for generating a content calendar, streamed as NDJSON events
+    """
+    data = request.get_json()
+    if not data or not data.get('topics'):
+        return jsonify({'error': 'Topics are required'}), 400
+
+    try:
+        events = social_service.generate_calendar(
+            topics=data['topics'],
+            platforms=data.get('platforms'),
+            days=data.get('days', 30),
+            timezone=data.get('timezone', 'UTC'),
+            tone=data.get('tone', 'professional'),
+            start_date=data.get('start_date'),
+            user_id=data.get('user_id')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
+    except Exception as e:
+        logger.exception("Error generating content calendar")
+        return jsonify({'error': str(e)}), 500
+
+    lines = (json.dumps(event, ensure_ascii=False) + '\n' for event in events)
+    # Proxies must not buffer the stream, or nothing arrives until the whole calendar is done
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+
 @social_bp.route('/suggest-hashtags', methods=['POST'])
 def suggest_hashtags():
     data = request.get_json()
@@ -58,6 +125,35 @@ def suggest_hashtags():
             platform=data.get('platform', 'linkedin')
         )
         return jsonify(hashtags)
+    except OVERLOAD_ERRORS:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@social_bp.route('/hashtags/corpus', methods=['POST'])
+def add_hashtag_corpus():
+    """
+    Endpoint for adding published posts to the hashtag index
+    """
+    data = request.get_json()
+    if not data or 'posts' not in data:
+        return jsonify({"error": "Posts are required"}), 400
+
+    try:
+        return jsonify(social_service.add_hashtag_corpus(data['posts']))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@social_bp.route('/hashtags/trending', methods=['GET'])
+def trending_hashtags():
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({"error": "Limit must be a number"}), 400
+    try:
+        return jsonify({"trending": social_service.trending_hashtags(request.args.get('platform'), limit)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -70,8 +166,58 @@ def optimize_timing():
     try:
         timing = social_service.optimize_posting_time(
             platform=data['platform'],
-            timezone=data.get('timezone', 'UTC')
+            timezone=data.get('timezone', 'UTC'),
+            user_id=data.get('user_id')
         )
         return jsonify(timing)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except OVERLOAD_ERRORS:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@social_bp.route('/engagement/<user_id>', methods=['POST'])
+def ingest_engagement(user_id):
+    """
+    Endpoint for uploading an engagement export (CSV or JSON Lines file, or JSON records)
+    """
+    if 'file' in request.files:
+        upload = request.files['file']
+        data = upload.read()
+        extension = (upload.filename or '').rsplit('.', 1)[-1].lower()
+        # Otherwise the format is sniffed from the content
+        fmt = request.form.get('format') or (extension if extension in ('csv', 'jsonl', 'ndjson') else None)
+        options = request.form
+    else:
+        options = request.get_json(silent=True) or {}
+        data, fmt = options.get('records'), None
+    if not data:
+        return jsonify({"error": "An export file or records are required"}), 400
+
+    try:
+        result = social_service.ingest_engagement(
+            user_id,
+            data,
+            fmt=fmt,
+            platform=options.get('platform'),
+            timezone=options.get('timezone'),
+            export_timezone=options.get('export_timezone')
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@social_bp.route('/engagement/<user_id>', methods=['GET'])
+def engagement_summary(user_id):
+    try:
+        summary = social_service.engagement_summary(user_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+    if summary is None:
+        return jsonify({"error": "No engagement history for this user"}), 404
+    return jsonify(summary)
@@ -0,0 +1,38 @@
+import hmac
+import hashlib
+from functools import wraps
+from flask import request, jsonify # type: ignore
+from config import Config
+
+
+def is_admin_request() -> bool:
+    """True when the request carries the configured admin token (never when none is configured)."""
+    token = request.headers.get(Config.ADMIN_TOKEN_HEADER)
+    if not Config.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), Config.ADMIN_TOKEN.encode('utf-8'))
+
+
+def request_tenant() -> str:
+    """
+    The tenant LLM budgets are charged to: the X-Tenant-ID value when it comes
+    with that tenant's key from TENANT_KEYS, otherwise the client address
+    (hashed, since tenants are listed in /health).
+    """
+    tenant = request.headers.get(Config.TENANT_HEADER)
+    key = request.headers.get(Config.TENANT_KEY_HEADER)
+    expected = Config.TENANT_KEYS.get(tenant) if tenant else None
+    if expected and key and hmac.compare_digest(key.encode('utf-8'), expected.encode('utf-8')):
+        return tenant
+    address = request.remote_addr or 'unknown'
+    return 'client-' + hashlib.sha256(address.encode('utf-8')).hexdigest()[:12]
+
+
+def admin_required(view):
+    """Reject the request with 403 unless it carries the admin token."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({'error': 'Admin token required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
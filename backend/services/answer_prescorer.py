@@ -0,0 +1,107 @@
+import re
+from config import Config
+
+_WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.'-]*")
+_SENTENCE_PATTERN = re.compile(r"[.!?]+(?:\s|$)")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or other our
+ours out over own same she should so some such than that the their them then there these they this those through
+to too under until up very was we were what when where which while who whom why will with would you your yours
+describe tell explain give example time situation question role job candidate experience work working
+""".split())
+
+FILLER_WORDS = frozenset({'um', 'uh', 'erm', 'er', 'hmm', 'like', 'basically', 'actually', 'literally', 'so',
+                          'well', 'anyway', 'whatever', 'stuff'})
+FILLER_PHRASES = ('you know', 'i mean', 'sort of', 'kind of', 'and stuff', 'or something', 'i guess')
+
+# Cue words for each part of a Situation / Task / Action / Result answer
+STAR_CUES = {
+    'situation': ('when i was', 'at my previous', 'at my last', 'in my role', 'we were', 'our team', 'the project',
+                  'the company', 'last year', 'situation', 'context', 'background'),
+    'task': ('i was responsible', 'my task', 'my role', 'i needed to', 'i had to', 'the goal', 'our goal',
+             'objective', 'challenge was', 'was asked to', 'responsible for'),
+    'action': ('i decided', 'i built', 'i created', 'i implemented', 'i designed', 'i led', 'i worked', 'i wrote',
+               'i organized', 'i set up', 'i proposed', 'i analyzed', 'i introduced', 'i refactored', 'i migrated',
+               'first,', 'then i', 'so i', 'i started'),
+    'result': ('as a result', 'resulted in', 'which led', 'reduced', 'increased', 'improved', 'saved', 'delivered',
+               'outcome', 'in the end', 'ultimately', 'percent', '%', 'learned')
+}
+
+
+def _words(text: str) -> list:
+    return _WORD_PATTERN.findall((text or '').lower())
+
+
+def _stems(words) -> set:
+    """Crude stems (5-character prefixes) so 'scaling' matches 'scalable'."""
+    return {w[:5] for w in words if len(w) > 2 and w not in STOPWORDS}
+
+
+def answer_signals(response: str, question: str, job_context: str) -> dict:
+    """Cheap, deterministic signals about an interview answer."""
+    words = _words(response)
+    word_count = len(words)
+    lowered = ' ' + ' '.join((response or '').lower().split()) + ' '
+
+    filler_count = sum(1 for w in words if w in FILLER_WORDS)
+    filler_count += sum(lowered.count(f' {phrase} ') for phrase in FILLER_PHRASES)
+
+    star = {part: any(cue in lowered for cue in cues) for part, cues in STAR_CUES.items()}
+
+    answer_stems = _stems(words)
+    question_stems = _stems(_words(question))
+    context_stems = _stems(_words(job_context))
+
+    return {
+        'word_count': word_count,
+        'sentence_count': len(_SENTENCE_PATTERN.findall(response or '')) or (1 if word_count else 0),
+        'filler_ratio': round(filler_count / word_count, 3) if word_count else 0.0,
+        'star': star,
+        'star_coverage': round(sum(star.values()) / len(star), 2),
+        'question_overlap': round(len(answer_stems & question_stems) / len(question_stems), 3)
+        if question_stems else 0.0,
+        'context_overlap': round(len(answer_stems & context_stems) / len(context_stems), 3)
+        if context_stems else 0.0
+    }
+
+
+def prescore_answer(response: str, question: str, job_context: str) -> dict:
+    """
+    Score an answer locally. Clearly weak answers (too short, mostly filler or off
+    topic) are marked weak and get feedback here; the rest go on to the model with
+    the signals attached.
+    """
+    signals = answer_signals(response, question, job_context)
+    word_count = signals['word_count']
+    reasons, tips = [], []
+
+    if word_count < Config.ANSWER_PRESCORE_MIN_WORDS:
+        reasons.append(f"The answer is very short ({word_count} words).")
+        tips.append("Aim for a complete answer of at least a few sentences (roughly 100-250 words).")
+    if word_count and signals['filler_ratio'] >= Config.ANSWER_PRESCORE_MAX_FILLER_RATIO:
+        reasons.append(f"Filler words make up {signals['filler_ratio']:.0%} of the answer.")
+        tips.append("Pause instead of using filler words such as 'um', 'like' or 'you know'.")
+    if word_count >= Config.ANSWER_PRESCORE_MIN_WORDS and signals['question_overlap'] == 0 \
+            and signals['context_overlap'] < 0.02:
+        reasons.append("The answer does not appear to address the question or the role.")
+        tips.append("Restate the key point of the question and tie your answer to the job requirements.")
+
+    if signals['star_coverage'] < 0.5:
+        tips.append("Structure examples as Situation, Task, Action and Result, ending with a measurable outcome.")
+
+    # Weighted local score, capped low: a strong answer always needs the model's judgement
+    length_factor = min(word_count / 150.0, 1.0)
+    relevance = min((signals['question_overlap'] + signals['context_overlap']) * 2, 1.0)
+    score = 100 * (0.3 * length_factor + 0.3 * signals['star_coverage'] + 0.4 * relevance)
+    score -= 100 * min(signals['filler_ratio'], 0.5)
+    score = int(max(0, min(round(score), Config.ANSWER_PRESCORE_MAX_LOCAL_SCORE)))
+
+    return {
+        'weak': bool(reasons),
+        'score': score,
+        'analysis': ' '.join(reasons + tips),
+        'signals': signals
+    }
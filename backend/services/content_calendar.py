@@ -0,0 +1,215 @@
+import time
+import queue
+import logging
+import threading
+import contextvars
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from services.metrics import metrics, track_executor
+from services.prompt_builder import PromptBuilder
+from services.structured_output import IncrementalJSONParser
+from services.llm_scheduler import llm_priority, BATCH
+from services.engagement_analytics import get_timezone, WEEKDAYS
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=Config.SOCIAL_CALENDAR_WORKERS, thread_name_prefix='social-calendar')
+track_executor('social-calendar', _executor)
+
+_posts_total = metrics.counter(
+    'social_calendar_posts_total', "Content-calendar posts by outcome", ('platform', 'outcome'))
+
+
+class ContentCalendarGenerator:
+    """
+    Plans and writes a content calendar. Slots come from the platforms' best
+    posting times; posts are written several per request on a small pool at
+    batch priority and reported one by one as the model finishes each of them.
+    Hashtags are generated once per distinct (platform, topic), not per post.
+    """
+
+    POSTS_PER_REQUEST = 8
+    TOKENS_PER_POST = 220
+    MAX_DAYS = 90
+    MAX_TOPICS = 50
+
+    def __init__(self, social_service):
+        self.social_service = social_service
+
+    def plan(self, topics, platforms=None, days: int = 30, timezone: str = 'UTC',
+             start_date: str = None, user_id: str = None) -> list:
+        """Slots for the calendar, in chronological order, with topics assigned round-robin."""
+        if isinstance(topics, str):
+            topics = [topics]
+        topics = list(dict.fromkeys(str(t).strip() for t in (topics or []) if str(t).strip()))[:self.MAX_TOPICS]
+        if not topics:
+            raise ValueError("At least one topic is required.")
+        platforms = list(dict.fromkeys(platforms or ['linkedin', 'twitter']))
+        try:
+            days = int(days)
+        except (TypeError, ValueError):
+            raise ValueError("Days must be a number.")
+        if not 1 <= days <= self.MAX_DAYS:
+            raise ValueError(f"Days must be between 1 and {self.MAX_DAYS}.")
+        tz = get_timezone(timezone)
+        now = datetime.now(tz)
+        try:
+            first_day = date.fromisoformat(start_date) if start_date else now.date()
+        except ValueError:
+            raise ValueError("Start date must be YYYY-MM-DD.")
+
+        slots = []
+        for platform in platforms:
+            windows = self.social_service.optimize_posting_time(platform, timezone, user_id)['best_times']
+            if not windows:
+                raise ValueError(f"Unsupported platform '{platform}'.")
+            starts = {}
+            for window in windows:
+                hour, minute = (int(part) for part in window['time'].split('-')[0].split(':'))
+                starts.setdefault(window['day'], []).append((hour, minute))
+            for offset in range(days):
+                day = first_day + timedelta(days=offset)
+                for hour, minute in starts.get(WEEKDAYS[day.weekday()], []):
+                    scheduled = tz.localize(datetime(day.year, day.month, day.day, hour, minute))
+                    if scheduled > now:
+                        slots.append({'platform': platform, 'scheduled_at': scheduled})
+
+        slots.sort(key=lambda s: (s['scheduled_at'], s['platform']))
+        for index, slot in enumerate(slots):
+            slot['slot'] = index
+            slot['topic'] = topics[index % len(topics)]
+            slot['scheduled_at'] = slot['scheduled_at'].isoformat()
+        return slots
+
+    def stream(self, slots: list, tone: str = 'professional'):
+        """
+        Yield calendar events: one 'plan', then a 'post' (or 'error') per slot as
+        soon as it is written, then 'done'. Closing the generator stops the work.
+        """
+        started = time.perf_counter()
+        batches = self._batches(slots)
+        events = queue.Queue()
+        cancelled = threading.Event()
+        # Captured once here: every worker inherits the request's tenant and trace, at batch priority
+        with llm_priority(BATCH):
+            context = contextvars.copy_context()
+
+        def submit(fn, *args):
+            return _executor.submit(context.copy().run, fn, *args)
+
+        hashtag_futures = {
+            key: submit(self.social_service._generate_hashtags, key[1], key[0])
+            for key in dict.fromkeys((slot['platform'], slot['topic']) for slot in slots)
+        }
+        futures = [submit(self._write_batch, batch, tone, events, cancelled, False) for batch in batches]
+        yield {'type': 'plan', 'posts': len(slots), 'requests': len(batches),
+               'hashtag_requests': len(hashtag_futures), 'first': slots[0]['scheduled_at'] if slots else None,
+               'last': slots[-1]['scheduled_at'] if slots else None}
+
+        outstanding, requests = len(futures), len(batches)
+        generated = failed = 0
+        try:
+            while outstanding:
+                kind, payload = events.get()
+                if kind == 'post':
+                    slot, text = payload
+                    generated += 1
+                    _posts_total.inc(platform=slot['platform'], outcome='ok')
+                    yield dict(self._describe(slot), type='post', text=text,
+                               hashtags=self._hashtags(hashtag_futures[(slot['platform'], slot['topic'])]))
+                    continue
+
+                outstanding -= 1
+                missing, error, retry = payload
+                if missing and not retry:
+                    # Slots the model skipped (or a stream cut short) get one more request of their own
+                    requests += 1
+                    outstanding += 1
+                    futures.append(submit(self._write_batch, missing, tone, events, cancelled, True))
+                    continue
+                for slot in missing:
+                    failed += 1
+                    _posts_total.inc(platform=slot['platform'], outcome='failed')
+                    yield dict(self._describe(slot), type='error',
+                               error=error or "The model did not write this post.")
+        finally:
+            cancelled.set()
+            for future in futures + list(hashtag_futures.values()):
+                future.cancel()
+
+        yield {'type': 'done', 'generated': generated, 'failed': failed, 'llm_requests': requests,
+               'hashtag_requests': len(hashtag_futures),
+               'elapsed_ms': round((time.perf_counter() - started) * 1000)}
+
+    def _batches(self, slots: list) -> list:
+        """Slots grouped by platform (one system prompt per request), POSTS_PER_REQUEST at a time."""
+        by_platform = {}
+        for slot in slots:
+            by_platform.setdefault(slot['platform'], []).append(slot)
+        return [group[i:i + self.POSTS_PER_REQUEST]
+                for group in by_platform.values()
+                for i in range(0, len(group), self.POSTS_PER_REQUEST)]
+
+    @staticmethod
+    def _describe(slot: dict) -> dict:
+        return {key: slot[key] for key in ('slot', 'platform', 'scheduled_at', 'topic')}
+
+    @staticmethod
+    def _hashtags(future) -> list:
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("Calendar hashtag generation failed: %s", str(e))
+            return []
+
+    def _write_batch(self, batch: list, tone: str, events: queue.Queue, cancelled: threading.Event,
+                     retry: bool):
+        """Write one batch of posts in a single streamed request, reporting each post as it completes."""
+        platform = batch[0]['platform']
+        numbered = "\n".join(
+            f"{i}. {slot['scheduled_at'][:16].replace('T', ' ')} - {slot['topic']}"
+            for i, slot in enumerate(batch, 1))
+        prompt = PromptBuilder('social.generate_calendar').build("""
+        Write {count} {tone} {platform} posts for a content calendar, one per numbered slot
+        (publish time - topic). Give every post its own angle, so the calendar never repeats
+        itself, and leave out hashtags: they are added separately.
+        {numbered}
+
+        Respond with JSON only, posts in slot order:
+        {{"posts": [{{"slot": 1, "text": "post text"}}, ...]}}
+        """, count=len(batch), tone=tone, platform=platform, numbered=numbered)
+
+        remaining = {i: slot for i, slot in enumerate(batch, 1)}
+        parser = IncrementalJSONParser(emit_depth=2, path='posts')
+        error = None
+        try:
+            pieces = self.social_service.llm.chat_stream(
+                prompt,
+                system=f"You are an expert {platform} content creator. Reply with JSON only.",
+                endpoint='social.generate_calendar',
+                max_tokens=self.TOKENS_PER_POST * len(batch)
+            )
+            try:
+                for piece in pieces:
+                    if cancelled.is_set():
+                        break
+                    for position, item in parser.feed(piece):
+                        number = self._slot_number(item, position)
+                        text = item.get('text') if isinstance(item, dict) else None
+                        if number in remaining and isinstance(text, str) and text.strip():
+                            events.put(('post', (remaining.pop(number), text.strip())))
+            finally:
+                pieces.close()
+        except Exception as e:
+            logger.warning("Calendar batch for %s failed after %d of %d posts: %s",
+                           platform, len(batch) - len(remaining), len(batch), str(e))
+            error = str(e)
+        events.put(('batch_done', (list(remaining.values()), error, retry)))
+
+    @staticmethod
+    def _slot_number(item, position: int) -> int:
+        try:
+            return int(item.get('slot'))
+        except (AttributeError, TypeError, ValueError):
+            return position + 1
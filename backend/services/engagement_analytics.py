@@ -0,0 +1,390 @@
+import io
+import os
+import re
+import csv
+import json
+import math
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+import pytz
+from config import Config
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+SLOTS = 7 * 24  # hour of the week, Monday 00:00 first
+MAX_ENGAGEMENT = 1e12  # per post; anything above is a corrupt cell, and keeps the summed aggregates finite
+
+_USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+TIMESTAMP_FIELDS = ('timestamp', 'posted_at', 'published_at', 'created_at', 'date')
+ENGAGEMENT_FIELDS = ('engagement', 'engagements')
+# Summed when an export has no single engagement column
+METRIC_FIELDS = ('likes', 'reactions', 'comments', 'replies', 'shares', 'reposts', 'retweets', 'quotes',
+                 'saves', 'clicks')
+MAX_EXPORT_DIGESTS = 1000
+
+_rows_total = metrics.counter(
+    'social_engagement_rows_total', "Engagement export rows by ingest outcome", ('outcome',))
+
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MAX_EPOCH_SECONDS = 253402300800  # 10000-01-01: beyond what datetime can represent
+
+
+def get_timezone(name: str):
+    try:
+        return pytz.timezone(name or 'UTC')
+    except pytz.UnknownTimeZoneError:
+        raise ValueError(f"Unknown timezone '{name}'.")
+
+
+def _quarter_offsets(seconds: np.ndarray, offset_at) -> np.ndarray:
+    """
+    UTC offsets (seconds) for many instants at once. Offsets only change on
+    quarter-hour boundaries, so they are looked up once per distinct quarter hour
+    rather than once per row.
+    """
+    if not len(seconds):
+        return np.zeros(0, dtype=np.int64)
+    quarters, inverse = np.unique(seconds // 900, return_inverse=True)
+    offsets = np.array([offset_at(int(q) * 900) for q in quarters], dtype=np.int64)
+    return offsets[inverse.reshape(-1)]
+
+
+def wall_to_utc(wall: np.ndarray, tz) -> np.ndarray:
+    """Naive wall-clock seconds in tz to UTC epoch seconds (DST-aware)."""
+    offsets = _quarter_offsets(wall, lambda s: tz.localize(
+        _NAIVE_EPOCH + timedelta(seconds=s), is_dst=False).utcoffset().total_seconds())
+    return wall - offsets
+
+
+def utc_to_slots(utc: np.ndarray, tz) -> np.ndarray:
+    """UTC epoch seconds to hour-of-week slots in tz's local time (DST-aware)."""
+    local = utc + _quarter_offsets(utc, lambda s: datetime.fromtimestamp(s, tz).utcoffset().total_seconds())
+    weekday = (local // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+    return weekday * 24 + (local % 86400) // 3600
+
+
+def next_occurrence(day: int, hour: int, minute: int, tz, now: datetime = None) -> datetime:
+    """The next time it is the given weekday and wall-clock time in tz, after now."""
+    now = (now or datetime.now(dt_timezone.utc)).astimezone(tz)
+    for offset in range(8):
+        date = now.date() + timedelta(days=offset)
+        if date.weekday() != day:
+            continue
+        # normalize() moves times skipped by a DST change forward, as a clock would
+        candidate = tz.normalize(tz.localize(datetime(date.year, date.month, date.day, hour, minute), is_dst=False))
+        if candidate > now:
+            return candidate
+    return next_occurrence(day, hour, minute, tz, now + timedelta(days=1))
+
+
+def _parse_timestamp(value):
+    """(epoch seconds, naive) for an export timestamp, or None when unusable."""
+    parsed = _read_timestamp(value)
+    # NaN, infinities and times outside 1970..9999 would break the slot arithmetic for the whole export
+    if parsed is None or not math.isfinite(parsed[0]) or not 0 <= parsed[0] < _MAX_EPOCH_SECONDS:
+        return None
+    return parsed
+
+
+def _read_timestamp(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if value[4:5] != '-':  # Not an ISO date: epoch seconds or milliseconds
+            try:
+                value = float(value)
+            except ValueError:
+                return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (value / 1000 if value > 1e11 else value), False  # milliseconds in many exports
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return (parsed - _NAIVE_EPOCH).total_seconds(), True
+    return parsed.timestamp(), False
+
+
+def _columns(keys: dict) -> tuple:
+    """
+    (timestamp, [engagement...], platform) keys, from a map of lowercased
+    column names to the keys (CSV positions or JSON field names) to read.
+    """
+    stamp = next((keys[f] for f in TIMESTAMP_FIELDS if f in keys), None)
+    total = next((keys[f] for f in ENGAGEMENT_FIELDS if f in keys), None)
+    engagement = [total] if total is not None else [keys[f] for f in METRIC_FIELDS if f in keys]
+    return stamp, engagement, keys.get('platform')
+
+
+def _engagement(values: list):
+    present = [float(v) for v in values if v not in (None, '')]
+    return sum(present) if present else None
+
+
+def _rows(data, fmt: str = None):
+    """(timestamp, [engagement values], platform) per row of CSV text, JSON Lines text or a list of objects."""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if isinstance(data, str):
+        fmt = (fmt or ('jsonl' if data.lstrip().startswith('{') else 'csv')).lower()
+        if fmt == 'csv':
+            reader = csv.reader(io.StringIO(data))
+            # Column positions are resolved once, from the header
+            header = next(reader, [])
+            stamp, engagement, platform = _columns({name.strip().lower(): i for i, name in enumerate(header)})
+            for row in reader:
+                if len(row) != len(header):
+                    yield None
+                    continue
+                yield (row[stamp] if stamp is not None else None, [row[i] for i in engagement],
+                       row[platform] if platform is not None else None)
+            return
+        if fmt not in ('jsonl', 'ndjson', 'json'):
+            raise ValueError("Export format must be csv or jsonl.")
+        records = []
+        for number, line in enumerate(data.splitlines(), 1):
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    raise ValueError(f"Line {number} of the export is not valid JSON.")
+        data = records
+
+    layouts = {}
+    for record in data:
+        if not isinstance(record, dict):
+            yield None
+            continue
+        # Records from one export nearly always share their fields: resolve each layout once
+        shape = tuple(record)
+        if shape not in layouts:
+            layouts[shape] = _columns({str(key).strip().lower(): key for key in shape})
+        stamp, engagement, platform = layouts[shape]
+        yield record.get(stamp), [record.get(key) for key in engagement], record.get(platform)
+
+
+def parse_export(data, fmt: str = None, platform: str = None, export_timezone: str = None) -> dict:
+    """
+    Columns of an engagement export as arrays: UTC epoch seconds, engagement
+    and platform. Timestamps without an offset are read in export_timezone
+    (UTC by default). Rows without a usable timestamp or engagement (missing,
+    negative, NaN, infinite or above MAX_ENGAGEMENT) are skipped.
+    """
+    export_tz = get_timezone(export_timezone)
+    default_platform = (platform or '').strip().lower()
+    seconds, naive, engagement, platforms = [], [], [], []
+    skipped = 0
+    for row in _rows(data, fmt):
+        parsed = _parse_timestamp(row[0]) if row else None
+        try:
+            value = _engagement(row[1]) if parsed else None
+        except (TypeError, ValueError):
+            value = None
+        row_platform = str(row[2]).strip().lower() if row and row[2] else default_platform
+        if value is None or not math.isfinite(value) or not 0 <= value <= MAX_ENGAGEMENT or not row_platform:
+            skipped += 1
+            continue
+        seconds.append(parsed[0])
+        naive.append(parsed[1])
+        engagement.append(value)
+        platforms.append(row_platform)
+
+    seconds = np.array(seconds, dtype=np.float64).astype(np.int64)
+    naive = np.array(naive, dtype=bool)
+    if naive.any() and export_tz.zone != 'UTC':
+        seconds[naive] = wall_to_utc(seconds[naive], export_tz)
+    return {
+        'seconds': seconds,
+        'engagement': np.array(engagement, dtype=np.float64),
+        'platforms': np.array(platforms, dtype=object),
+        'skipped': skipped
+    }
+
+
+class EngagementStore:
+    """
+    Per-user engagement aggregates: for each platform, post counts and summed
+    engagement per hour of the week in the user's audience timezone. Exports
+    are folded in once (by content hash), so queries read 2 x 168 numbers no
+    matter how much history has been ingested.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or Config.ENGAGEMENT_DATA_DIR
+        self._profiles = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, user_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(user_id, threading.Lock())
+
+    def _path(self, user_id: str) -> str:
+        if not user_id or not _USER_ID_PATTERN.match(str(user_id)) or user_id in ('.', '..'):
+            raise ValueError("Invalid user id (letters, digits, '.', '_' and '-').")
+        return os.path.join(self.directory, f"{user_id}.json")
+
+    def profile(self, user_id: str) -> dict:
+        """The user's aggregates, with numpy arrays, or None before the first ingest."""
+        path = self._path(user_id)
+        cached = self._profiles.get(user_id)
+        if cached is not None:
+            return cached
+        try:
+            with open(path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        for aggregate in stored['platforms'].values():
+            aggregate['posts'] = np.array(aggregate['posts'], dtype=np.int64)
+            # Profiles written before non-finite rows were rejected may hold NaN; count those cells as 0
+            aggregate['engagement'] = np.nan_to_num(
+                np.array(aggregate['engagement'], dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+        self._profiles[user_id] = stored
+        return stored
+
+    def _save(self, profile: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        stored = dict(profile, platforms={
+            name: dict(aggregate, posts=aggregate['posts'].tolist(),
+                       engagement=[round(v, 3) for v in aggregate['engagement'].tolist()])
+            for name, aggregate in profile['platforms'].items()
+        })
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, separators=(',', ':'))
+        os.replace(tmp_path, self._path(profile['user_id']))
+
+    def ingest(self, user_id: str, data, fmt: str = None, platform: str = None, timezone: str = None,
+               export_timezone: str = None) -> dict:
+        """
+        Fold an export into the user's aggregates. timezone is the audience
+        timezone the histogram is kept in; it is fixed by the first ingest.
+        """
+        self._path(user_id)
+        raw = data if isinstance(data, (str, bytes)) else json.dumps(data, sort_keys=True, default=str)
+        digest = hashlib.sha256(raw.encode('utf-8') if isinstance(raw, str) else raw).hexdigest()
+
+        with self._lock(user_id):
+            profile = self.profile(user_id) or {
+                'user_id': user_id,
+                'timezone': get_timezone(timezone).zone,
+                'exports': [],
+                'platforms': {}
+            }
+            if timezone and get_timezone(timezone).zone != profile['timezone'] and profile['platforms']:
+                raise ValueError(f"Engagement for this user is already kept in {profile['timezone']}; "
+                                 f"query in any timezone instead of re-ingesting.")
+            if digest in profile['exports']:
+                return dict(self.summary(user_id), ingested=0, skipped=0, duplicate=True)
+
+            columns = parse_export(data, fmt, platform, export_timezone)
+            _rows_total.inc(columns['skipped'], outcome='skipped')
+            if not len(columns['seconds']):
+                raise ValueError("The export has no rows with a timestamp, engagement and platform.")
+
+            # One bincount for every platform: platform code * 168 + hour of the week
+            names, codes = np.unique(columns['platforms'], return_inverse=True)
+            bins = codes.reshape(-1) * SLOTS + utc_to_slots(columns['seconds'], get_timezone(profile['timezone']))
+            posts = np.bincount(bins, minlength=len(names) * SLOTS).reshape(len(names), SLOTS)
+            engagement = np.bincount(bins, weights=columns['engagement'],
+                                     minlength=len(names) * SLOTS).reshape(len(names), SLOTS)
+
+            platforms = {name: dict(aggregate) for name, aggregate in profile['platforms'].items()}
+            for row, name in enumerate(names):
+                mask = codes.reshape(-1) == row
+                aggregate = platforms.get(name) or {
+                    'posts': np.zeros(SLOTS, dtype=np.int64), 'engagement': np.zeros(SLOTS, dtype=np.float64),
+                    'first': None, 'last': None
+                }
+                first, last = int(columns['seconds'][mask].min()), int(columns['seconds'][mask].max())
+                platforms[name] = {
+                    'posts': aggregate['posts'] + posts[row],
+                    'engagement': aggregate['engagement'] + engagement[row],
+                    'first': first if aggregate['first'] is None else min(aggregate['first'], first),
+                    'last': last if aggregate['last'] is None else max(aggregate['last'], last)
+                }
+
+            profile = dict(profile, platforms=platforms,
+                           exports=(profile['exports'] + [digest])[-MAX_EXPORT_DIGESTS:],
+                           updated_at=datetime.now(dt_timezone.utc).isoformat())
+            self._save(profile)
+            self._profiles[user_id] = profile
+            _rows_total.inc(len(columns['seconds']), outcome='ingested')
+
+        return dict(self.summary(user_id), ingested=int(len(columns['seconds'])),
+                    skipped=columns['skipped'], duplicate=False)
+
+    def best_slots(self, user_id: str, platform: str, top: int = None) -> dict:
+        """
+        The highest-engagement hours of the week for a platform, or None without
+        enough history. Mean engagement per slot is shrunk towards the overall
+        mean by ENGAGEMENT_PRIOR_POSTS, so a single viral post does not make a slot.
+        """
+        profile = self.profile(user_id)
+        aggregate = (profile or {}).get('platforms', {}).get(platform)
+        if aggregate is None or int(aggregate['posts'].sum()) < Config.ENGAGEMENT_MIN_POSTS:
+            return None
+        posts, engagement = aggregate['posts'], aggregate['engagement']
+        mean = engagement.sum() / posts.sum()
+        prior = Config.ENGAGEMENT_PRIOR_POSTS
+        scores = (engagement + prior * mean) / (posts + prior)
+        scores[posts == 0] = -np.inf
+        ranked = np.argsort(-scores, kind='stable')[:top or Config.ENGAGEMENT_TOP_SLOTS]
+        return {
+            'timezone': profile['timezone'],
+            'posts': int(posts.sum()),
+            'mean_engagement': round(float(mean), 2),
+            'slots': [{
+                'day': int(slot // 24),
+                'hour': int(slot % 24),
+                'score': round(float(scores[slot]), 2),
+                'lift': round(float(scores[slot] / mean), 3) if mean else 0.0,
+                'posts': int(posts[slot])
+            } for slot in ranked if np.isfinite(scores[slot])]
+        }
+
+    def summary(self, user_id: str, heatmap: bool = False) -> dict:
+        profile = self.profile(user_id)
+        if profile is None:
+            return None
+        platforms = {}
+        for name, aggregate in profile['platforms'].items():
+            posts, engagement = aggregate['posts'], aggregate['engagement']
+            platforms[name] = {
+                'posts': int(posts.sum()),
+                'first_post': datetime.fromtimestamp(aggregate['first'], dt_timezone.utc).isoformat(),
+                'last_post': datetime.fromtimestamp(aggregate['last'], dt_timezone.utc).isoformat()
+            }
+            if heatmap:
+                # Mean engagement per post, one row per weekday, one column per hour
+                means = np.divide(engagement, posts, out=np.zeros(SLOTS), where=posts > 0)
+                platforms[name]['heatmap'] = np.round(means.reshape(7, 24), 2).tolist()
+                platforms[name]['post_counts'] = posts.reshape(7, 24).tolist()
+        return {
+            'user_id': user_id,
+            'timezone': profile['timezone'],
+            'updated_at': profile.get('updated_at'),
+            'platforms': platforms
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_engagement_store() -> EngagementStore:
+    """Process-wide store, so aggregates are loaded once and shared."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EngagementStore()
+        return _store
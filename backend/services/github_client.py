@@ -0,0 +1,227 @@
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+import contextvars
+from urllib.parse import urlencode, urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+import requests # type: ignore
+from requests.adapters import HTTPAdapter # type: ignore
+from config import Config
+from services.metrics import metrics, track_cache, track_executor
+from services.resilience import call_with_resilience
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_fetch_executor = ThreadPoolExecutor(max_workers=Config.GITHUB_FETCH_WORKERS, thread_name_prefix='github-fetch')
+track_executor('github-fetch', _fetch_executor)
+
+_LINK_PATTERN = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+_USERNAME_PATTERN = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})$')
+_REPO_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,100}$')
+
+_requests_total = metrics.counter(
+    'github_requests_total', "GitHub API lookups by how they were served", ('outcome',))
+
+
+def _parse_links(header: str) -> dict:
+    """rel -> url from a GitHub Link header."""
+    return {rel: url for url, rel in _LINK_PATTERN.findall(header or '')}
+
+
+def _user_path(username: str) -> str:
+    if not username or not _USERNAME_PATTERN.match(username):
+        raise ValueError("Invalid GitHub username.")
+    return f"/users/{username}"
+
+
+def _repo_path(owner: str, repo: str) -> str:
+    _user_path(owner)
+    if not repo or repo in ('.', '..') or not _REPO_PATTERN.match(repo):
+        raise ValueError("Invalid GitHub repository name.")
+    return f"/repos/{owner}/{repo}"
+
+
+def _page_of(url: str) -> int:
+    try:
+        return int(parse_qs(urlparse(url).query)['page'][0])
+    except (KeyError, ValueError, IndexError):
+        return None
+
+
+class GitHubCache:
+    """
+    Responses keyed by URL with their ETag, kept in memory and persisted as one
+    JSON file per URL so revalidation survives restarts.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or Config.GITHUB_CACHE_DIR
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._hits = 0
+        self._lookups = 0
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url: str) -> dict:
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is not None:
+            return entry
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        with self._lock:
+            self._entries[url] = entry
+        return entry
+
+    def put(self, url: str, entry: dict):
+        with self._lock:
+            self._entries[url] = entry
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, separators=(',', ':'))
+            os.replace(tmp_path, self._path(url))
+        except OSError as e:
+            logger.warning("Could not persist GitHub cache entry: %s", str(e))
+
+    def record(self, hit: bool):
+        with self._lock:
+            self._lookups += 1
+            self._hits += int(hit)
+
+    def hit_counts(self) -> tuple:
+        with self._lock:
+            return self._hits, self._lookups
+
+
+class GitHubClient:
+    """
+    Minimal GitHub REST client. Every GET is cached with its ETag: entries younger
+    than GITHUB_CACHE_FRESH_SECONDS are served without a request, older ones are
+    revalidated with If-None-Match (a 304 costs no rate limit). Repository lists
+    are fetched in pages of GITHUB_PAGE_SIZE, all pages at once.
+    """
+
+    def __init__(self, token: str = None, base_url: str = None, cache: GitHubCache = None):
+        self.base_url = (base_url or Config.GITHUB_API_URL).rstrip('/')
+        self.cache = cache or get_github_cache()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.GITHUB_FETCH_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'X-GitHub-Api-Version': '2022-11-28'
+        })
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+
+    def get(self, path: str, params: dict = None) -> tuple:
+        """GET a path; returns (json body, Link header rels)."""
+        url = self.base_url + path
+        if params:
+            url += '?' + urlencode(sorted(params.items()))
+        cached = self.cache.get(url)
+        if cached is not None and time.time() - cached['fetched_at'] < Config.GITHUB_CACHE_FRESH_SECONDS:
+            self.cache.record(True)
+            _requests_total.inc(outcome='fresh')
+            return cached['body'], cached['links']
+
+        headers = {}
+        if cached is not None:
+            headers['If-None-Match'] = cached['etag']
+
+        def fetch(timeout):
+            response = self.session.get(url, headers=headers, timeout=timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
+
+        with span('github.request', path=path, page=(params or {}).get('page')) as current:
+            response = call_with_resilience('github', fetch)
+            current.set(status=response.status_code,
+                        rate_limit_remaining=response.headers.get('X-RateLimit-Remaining'))
+
+        if response.status_code == 304:
+            self.cache.record(True)
+            _requests_total.inc(outcome='not_modified')
+            cached = dict(cached, fetched_at=time.time())
+            self.cache.put(url, cached)
+            return cached['body'], cached['links']
+
+        self.cache.record(False)
+        _requests_total.inc(outcome='fetched')
+        body, links = response.json(), _parse_links(response.headers.get('Link'))
+        # 202 means GitHub is still computing (repository statistics); nothing to keep yet
+        if response.status_code == 200 and response.headers.get('ETag'):
+            self.cache.put(url, {'etag': response.headers['ETag'], 'fetched_at': time.time(),
+                                 'body': body, 'links': links})
+        return body, links
+
+    def get_user(self, username: str) -> dict:
+        return self.get(_user_path(username))[0]
+
+    def list_repos(self, username: str, expected: int = None) -> list:
+        """
+        All repositories owned by a user. When the expected count is known (the
+        profile's public_repos), every page is requested concurrently; any pages
+        beyond it that the Link header still points to are followed afterwards.
+        """
+        path = _user_path(username) + "/repos"
+        per_page = Config.GITHUB_PAGE_SIZE
+
+        def page(number):
+            return self.get(path, {'type': 'owner', 'sort': 'full_name', 'per_page': per_page, 'page': number})
+
+        pages = min(max(math.ceil((expected or 0) / per_page), 1), Config.GITHUB_MAX_PAGES)
+        futures = [_fetch_executor.submit(contextvars.copy_context().run, page, number)
+                   for number in range(1, pages + 1)]
+        results = [future.result() for future in futures]
+
+        repos = [repo for body, _ in results for repo in body]
+        next_url = results[-1][1].get('next')
+        while next_url and pages < Config.GITHUB_MAX_PAGES:
+            pages = _page_of(next_url) or pages + 1
+            body, links = page(pages)
+            repos.extend(body)
+            next_url = links.get('next')
+        return repos
+
+    def get_languages(self, owner: str, repo: str) -> dict:
+        """Bytes of code per language in a repository."""
+        return self.get(_repo_path(owner, repo) + "/languages")[0]
+
+    def get_participation(self, owner: str, repo: str) -> dict:
+        """
+        Weekly commit counts for the last 52 weeks ({'all': [...], 'owner': [...]}),
+        or None while GitHub is still computing them.
+        """
+        body = self.get(_repo_path(owner, repo) + "/stats/participation")[0]
+        return body if isinstance(body, dict) and 'all' in body else None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_github_cache() -> GitHubCache:
+    """Process-wide GitHub response cache, shared by every client."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GitHubCache()
+            track_cache('github', _cache.hit_counts)
+        return _cache
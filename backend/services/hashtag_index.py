@@ -0,0 +1,285 @@
+import os
+import re
+import json
+import math
+import time
+import heapq
+import logging
+import threading
+from collections import Counter
+from config import Config
+from services.metrics import track_cache
+
+logger = logging.getLogger(__name__)
+
+_HASHTAG_PATTERN = re.compile(r'(?<![\w#&])#(\w{2,100})', re.UNICODE)
+_TERM_PATTERN = re.compile(r"[^\W\d_][\w'+-]*", re.UNICODE)
+_CAMEL_PATTERN = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+')
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further get got had has have having he her here him his
+how i if in into is it its just let like me more most my new no nor not now of off on once one only or other our
+out over own really same she should so some such than that the their them then there these they this those through
+to today too under until up very via was we were what when where which while who why will with would you your
+""".split())
+
+TERM_TAGS_LIMIT = 20  # strongest hashtags kept per term
+MIN_SUGGESTIONS = 3  # fewer confident hashtags than this lowers confidence
+TRENDING_CACHE_SECONDS = 30
+TRENDING_CACHED = 50
+MAX_MOMENTUM = 5.0
+
+
+def extract_hashtags(text: str) -> list:
+    """Hashtags in text, without the '#', in order of appearance."""
+    return _HASHTAG_PATTERN.findall(text or '')
+
+
+def _tag_terms(tag: str) -> list:
+    """Words inside a hashtag: #MachineLearning -> machinelearning, machine, learning."""
+    parts = [p.lower() for p in _CAMEL_PATTERN.findall(tag.replace('_', ' '))]
+    return [tag.lower()] + (parts if len(parts) > 1 else [])
+
+
+def terms_of(text: str) -> set:
+    """Topic terms of a text: lowercase words without stopwords, plus the words inside its hashtags."""
+    without_tags = _HASHTAG_PATTERN.sub(' ', text or '')
+    terms = {w.strip("'-").lower() for w in _TERM_PATTERN.findall(without_tags)}
+    for tag in extract_hashtags(text):
+        terms.update(_tag_terms(tag))
+    return {t for t in terms if len(t) > 2 and t not in STOPWORDS}
+
+
+class HashtagIndex:
+    """
+    Hashtag statistics from a corpus of posts: how often each hashtag is used
+    (overall and per platform), which topic terms it appears with, and a
+    recency-weighted usage score that halves every HASHTAG_TRENDING_HALF_LIFE_DAYS.
+    The corpus is kept as JSON lines and replayed on start.
+    """
+
+    def __init__(self, path: str = None, half_life_days: float = None):
+        self.path = path or Config.HASHTAG_CORPUS_PATH
+        self.half_life = (half_life_days or Config.HASHTAG_TRENDING_HALF_LIFE_DAYS) * 86400
+        self._lock = threading.Lock()
+        self._posts = 0
+        self._platform_posts = Counter()
+        self._tag_counts = Counter()
+        self._platform_tag_counts = {}
+        self._display = {}
+        self._term_posts = Counter()
+        self._cooccurrence = {}
+        self._term_tags = {}
+        # Decayed weights are stored as 2 ** ((t - reference) / half_life), so old
+        # entries never need touching; only ratios between them are ever used
+        self._reference = time.time()
+        self._recent = {}
+        self._trending = {}
+        self._stats = {'lookups': 0, 'local': 0, 'low_confidence': 0}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        post = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    # A malformed line is skipped rather than stopping the app from starting
+                    if isinstance(post, dict) and isinstance(post.get('text'), str):
+                        self._index(post)
+        logger.info("Hashtag index loaded: %d posts, %d hashtags", self._posts, len(self._tag_counts))
+
+    def _index(self, post: dict):
+        tags = list(dict.fromkeys(extract_hashtags(post['text'])))
+        if not tags:
+            return
+        platform = post.get('platform') if isinstance(post.get('platform'), str) else ''
+        timestamp = post.get('timestamp')
+        usable = isinstance(timestamp, (int, float)) and math.isfinite(timestamp)
+        posted_at = min(timestamp if usable else time.time(), time.time())
+        keys = []
+        for tag in tags:
+            key = tag.lower()
+            keys.append(key)
+            forms = self._display.setdefault(key, Counter())
+            forms[tag] += 1
+        keys = list(dict.fromkeys(keys))
+        terms = terms_of(post['text'])
+
+        self._posts += 1
+        self._tag_counts.update(keys)
+        # Posts without a platform only count towards '*', the all-platforms scope
+        if platform:
+            self._platform_posts[platform] += 1
+            self._platform_tag_counts.setdefault(platform, Counter()).update(keys)
+        self._term_posts.update(terms)
+        for term in terms:
+            self._cooccurrence.setdefault(term, Counter()).update(keys)
+            self._term_tags.pop(term, None)
+
+        weight = 2 ** ((posted_at - self._reference) / self.half_life)
+        for scope in {platform or '*', '*'}:
+            recent = self._recent.setdefault(scope, Counter())
+            for key in keys:
+                recent[key] += weight
+        self._trending.clear()
+
+    def add_posts(self, posts: list) -> dict:
+        """Index posts ({'text', 'platform', 'timestamp'}) and append them to the corpus."""
+        accepted = []
+        for post in posts or []:
+            if isinstance(post, str):
+                post = {'text': post}
+            if not isinstance(post, dict) or not isinstance(post.get('text'), str) or not post['text'].strip():
+                continue
+            timestamp = post.get('timestamp')
+            accepted.append({
+                'text': post['text'],
+                'platform': str(post.get('platform') or '').strip().lower(),
+                'timestamp': float(timestamp) if isinstance(timestamp, (int, float)) else time.time()
+            })
+        with self._lock:
+            for post in accepted:
+                self._index(post)
+            if accepted:
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.writelines(json.dumps(post, separators=(',', ':'), ensure_ascii=False) + '\n'
+                                     for post in accepted)
+                except OSError as e:
+                    logger.error("Could not persist hashtag corpus: %s", str(e))
+        return dict(self.stats(), added=len(accepted), rejected=len(posts or []) - len(accepted))
+
+    def _tags_for(self, term: str) -> list:
+        """
+        (hashtag, weight) pairs for a term: P(hashtag | term) scaled by how
+        specific the hashtag is, so ubiquitous tags do not win every query.
+        Computed on first use and kept until a new post mentions the term.
+        """
+        cached = self._term_tags.get(term)
+        if cached is None:
+            posts = self._term_posts[term]
+            cached = heapq.nlargest(TERM_TAGS_LIMIT, (
+                (tag, count / posts * math.log((self._posts + 1) / (self._tag_counts[tag] + 1)) + 1e-9)
+                for tag, count in self._cooccurrence[term].items()
+            ), key=lambda pair: pair[1])
+            self._term_tags[term] = cached
+        return cached
+
+    def suggest(self, text: str, platform: str = None, limit: int = None) -> dict:
+        """
+        Hashtags for a topic or draft post, strongest first, with a confidence
+        between 0 and 1: the share of the text's terms the corpus knows, reduced
+        when fewer than MIN_SUGGESTIONS hashtags are supported.
+        """
+        limit = limit or Config.HASHTAG_SUGGESTIONS
+        platform = (platform or '').lower()
+        terms = terms_of(text)
+        present = {tag.lower() for tag in extract_hashtags(text)}
+        with self._lock:
+            self._stats['lookups'] += 1
+            known = [t for t in terms if self._term_posts[t] >= Config.HASHTAG_MIN_TERM_POSTS]
+            scores = Counter()
+            for term in known:
+                # Rare terms say more about the topic than common ones
+                specificity = math.log((self._posts + 1) / self._term_posts[term])
+                for tag, weight in self._tags_for(term):
+                    scores[tag] += weight * specificity
+                if term in self._tag_counts:
+                    scores[term] += specificity
+
+            platform_posts = self._platform_posts.get(platform)
+            platform_counts = self._platform_tag_counts.get(platform, {})
+            recent = self._recent.get(platform if platform_posts else '*', {})
+            top_recent = max(recent.values(), default=0) or 1
+            ranked = []
+            for tag, score in scores.items():
+                if tag in present:
+                    continue
+                if platform_posts:
+                    # Lift of the hashtag on this platform over its overall share, kept within [0.5, 2]
+                    expected = self._tag_counts[tag] * platform_posts / self._posts
+                    score *= min(max((platform_counts.get(tag, 0) + 1) / (expected + 1), 0.5), 2.0)
+                score *= 1 + Config.HASHTAG_TRENDING_WEIGHT * recent.get(tag, 0) / top_recent
+                ranked.append((score, tag))
+            ranked = heapq.nlargest(limit, ranked)
+            if ranked:
+                # Weak tail suggestions are noise, not support
+                ranked = [(s, t) for s, t in ranked if s >= ranked[0][0] * 0.1]
+
+            coverage = len(known) / len(terms) if terms else 0.0
+            confidence = round(coverage * min(len(ranked) / MIN_SUGGESTIONS, 1.0), 3)
+            if confidence >= Config.HASHTAG_MIN_CONFIDENCE:
+                self._stats['local'] += 1
+            else:
+                self._stats['low_confidence'] += 1
+            return {
+                'hashtags': ['#' + self._display[tag].most_common(1)[0][0] for _, tag in ranked],
+                'scores': [round(score, 3) for score, _ in ranked],
+                'confidence': confidence,
+                'known_terms': len(known),
+                'terms': len(terms)
+            }
+
+    def trending(self, platform: str = None, limit: int = 10) -> list:
+        """
+        Hashtags ranked by recency-weighted use (each post counts half as much
+        per half-life of age) times momentum: the hashtag's share of recent use
+        over its all-time share, capped at MAX_MOMENTUM, so steady evergreen tags
+        rank by volume and rising ones are lifted.
+        """
+        platform = (platform or '').lower()
+        now = time.time()
+        with self._lock:
+            scope = platform if platform and platform in self._recent else '*'
+            cached = self._trending.get(scope)
+            if cached is None or now - cached[0] > TRENDING_CACHE_SECONDS:
+                recent = self._recent.get(scope, {})
+                counts = self._tag_counts if scope == '*' else self._platform_tag_counts.get(scope, {})
+                decay = 2 ** ((self._reference - now) / self.half_life)
+                total_recent = sum(recent.values()) or 1
+                total_uses = sum(counts.values()) or 1
+                ranked = []
+                for tag, weight in recent.items():
+                    if counts[tag] < Config.HASHTAG_MIN_TERM_POSTS:
+                        continue
+                    momentum = (weight / total_recent) / (counts[tag] / total_uses)
+                    ranked.append((weight * min(momentum, MAX_MOMENTUM), tag, weight, momentum))
+                cached = (now, [{
+                    'hashtag': '#' + self._display[tag].most_common(1)[0][0],
+                    'score': round(weight * decay, 3),
+                    'momentum': round(momentum, 3),
+                    'posts': counts[tag]
+                } for _, tag, weight, momentum in heapq.nlargest(TRENDING_CACHED, ranked)])
+                self._trending[scope] = cached
+            return cached[1][:limit]
+
+    def hit_counts(self) -> tuple:
+        with self._lock:
+            return self._stats['local'], self._stats['lookups']
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(posts=self._posts, hashtags=len(self._tag_counts), terms=len(self._term_posts))
+        return stats
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_hashtag_index() -> HashtagIndex:
+    """Process-wide hashtag index, loaded from the corpus once."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = HashtagIndex()
+            track_cache('hashtag_index', _index.hit_counts)
+        return _index
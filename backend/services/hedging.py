@@ -0,0 +1,199 @@
+import time
+import logging
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import Config
+from services.metrics import track_executor
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=Config.HEDGE_POOL_SIZE, thread_name_prefix='llm-hedge')
+track_executor('llm-hedge', _executor)
+
+
+class HedgeCancelled(Exception):
+    """Raised inside an attempt that lost the race and was cancelled."""
+
+
+class CancelToken:
+    """
+    Cancellation signal for one attempt. Closers registered with on_cancel (an
+    open response, say) run on the winner's thread when the token is set, so a
+    loser blocked in a read is torn down instead of waiting out its timeout.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._closers = []
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def on_cancel(self, closer):
+        with self._lock:
+            if not self._event.is_set():
+                self._closers.append(closer)
+                return
+        closer()
+
+    def set(self):
+        with self._lock:
+            self._event.set()
+            closers, self._closers = self._closers, []
+        for closer in closers:
+            try:
+                closer()
+            except Exception as e:
+                logger.debug("Closing a cancelled attempt failed: %s", str(e))
+
+
+class LatencyTracker:
+    """Rolling window of first-token latencies used to pick the hedge threshold."""
+
+    def __init__(self, window: int = None):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window or Config.HEDGE_WINDOW)
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float):
+        with self._lock:
+            if len(self._samples) < Config.HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+
+class HedgeBudget:
+    """Token bucket capping hedges to a fraction of requests."""
+
+    def __init__(self, max_ratio: float = None, burst: float = 5.0):
+        self.max_ratio = Config.HEDGE_MAX_RATIO if max_ratio is None else max_ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.max_ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class Hedger:
+    """
+    Runs an attempt and, if it has not produced a first token by the rolling
+    percentile threshold, fires a duplicate and keeps whichever finishes first.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency = LatencyTracker()
+        self.budget = HedgeBudget()
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'hedges_fired': 0, 'hedge_wins': 0, 'primary_wins': 0, 'budget_denied': 0}
+
+    def threshold(self) -> float:
+        observed = self.latency.percentile(Config.HEDGE_PERCENTILE)
+        if observed is None:
+            return Config.HEDGE_DEFAULT_DELAY
+        return max(observed, Config.HEDGE_MIN_DELAY)
+
+    def run(self, attempt):
+        """
+        attempt(cancel, on_first_token) performs one upstream request; it must call
+        on_first_token() when output starts, register anything blocking with
+        cancel.on_cancel() and stop early once cancel.is_set().
+        """
+        self._count('requests')
+        self.budget.deposit()
+        progress = threading.Event()
+
+        primary_cancel = CancelToken()
+        # Attempts run on pool threads, so carry the caller's context (priority, tenant) along
+        primary = _executor.submit(contextvars.copy_context().run, self._attempt, attempt, primary_cancel, progress)
+        if progress.wait(self.threshold()):
+            return primary.result()
+
+        if not self.budget.try_spend():
+            self._count('budget_denied')
+            return primary.result()
+
+        self._count('hedges_fired')
+        hedge_cancel = CancelToken()
+        hedge = _executor.submit(contextvars.copy_context().run, self._attempt, attempt, hedge_cancel,
+                                 threading.Event())
+        cancels = {primary: primary_cancel, hedge: hedge_cancel}
+
+        pending = {primary, hedge}
+        failure = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        cancels[other].set()
+                    self._count('hedge_wins' if future is hedge else 'primary_wins')
+                    return future.result()
+                if failure is None or future is primary:
+                    failure = future.exception()
+        raise failure
+
+    def _attempt(self, attempt, cancel, progress):
+        started = time.monotonic()
+        threshold = self.threshold()
+        first_token = []
+
+        def on_first_token():
+            first_token.append(True)
+            self.latency.add(time.monotonic() - started)
+            progress.set()
+
+        try:
+            return attempt(cancel, on_first_token)
+        finally:
+            progress.set()
+            # No first token: the elapsed time is a lower bound on the latency. Once it has
+            # outlasted the threshold it is recorded, so hung or timed-out attempts raise the
+            # percentile instead of dropping out of the window; quick failures say nothing.
+            elapsed = time.monotonic() - started
+            if not first_token and elapsed >= threshold:
+                self.latency.add(elapsed)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['threshold_seconds'] = round(self.threshold(), 3)
+        return stats
+
+
+_hedgers = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(name: str) -> Hedger:
+    with _hedgers_lock:
+        if name not in _hedgers:
+            _hedgers[name] = Hedger(name)
+        return _hedgers[name]
+
+
+def hedge_stats() -> dict:
+    with _hedgers_lock:
+        hedgers = list(_hedgers.values())
+    return {hedger.name: hedger.to_dict() for hedger in hedgers}
@@ -1,136 +1,268 @@
 import os
-import json
-import requests # type: ignore
 import logging
 from dotenv import load_dotenv # type: ignore
+from config import Config
+from services.llm_client import LLMClient
+from services.prompt_builder import PromptBuilder, count_tokens, compact_json, compact_text, truncate_to_tokens
+from services.interview_session import InterviewSessionEngine
+from services.question_bank import get_question_bank
+from services.structured_output import parse_structured, validate, StructuredOutputError
+from services.answer_prescorer import prescore_answer, answer_signals
+from services.log_pipeline import configure_logging
 
 # Load environment variables from .env
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    filename="debug.log",
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logger = logging.getLogger(__name__)
 
 class InterviewService:
-    API_URL = "https://api.perplexity.ai/chat/completions"
+    SYSTEM_PROMPT = "You are an expert technical interviewer."
 
-    def __init__(self, api_key: str):
+    # Batched answer generation budget
+    BATCH_MAX_COMPLETION_TOKENS = 4000
+    ANSWER_TOKENS_PER_QUESTION = 300
+    ANSWERS_PROMPT = """
+        Job Context:
+        {job_context}
+
+        Generate a strong sample answer for each of these {difficulty} difficulty interview questions:
+        {numbered}
+
+        Format response as JSON, keyed by question number:
+        {{
+            "answers": {{"1": "Detailed answer to question 1", "2": "Detailed answer to question 2", ...}}
+        }}
+        """
+
+    # Transcript feedback
+    FEEDBACK_TOKENS_PER_ANSWER = 250
+    FEEDBACK_COMPETENCIES = ('technical_depth', 'problem_solving', 'communication', 'structure', 'role_fit')
+    FEEDBACK_PROMPT = """
+        Job Context:
+        {job_context}
+
+        Evaluate each answer in this interview transcript:
+        {transcript}
+
+        Score every answer from 0 to 100 overall and on each competency: {competencies}.
+        Format response as JSON, keyed by answer number:
+        {{
+            "answers": {{"1": {{"score": 75, "competencies": {{"technical_depth": 70, ...}},
+            "strengths": "What went well", "improvements": "What to improve"}}, ...}}
+        }}
+        """
+
+    def __init__(self, api_key: str = None):
         """Initialize the service with API key and default parameters."""
+        api_key = api_key or Config.PERPLEXITY_API_KEY or ('stub' if Config.LLM_STUB_URL else None)
         if not api_key:
             raise ValueError("API key is required.")
         
         self.api_key = api_key
         self.model = "sonar-pro"
         self.temperature = 0.3
+        self.llm = LLMClient('perplexity', model=self.model, temperature=self.temperature, api_key=api_key)
+        self.sessions = InterviewSessionEngine(self)
 
-    def _send_request(self, prompt: str, max_tokens: int = 500):
+    def _send_request(self, prompt: str, max_tokens: int = 500, endpoint: str = 'interview'):
         """Helper function to send API requests and handle responses."""
-        payload = {
-            "model": self.model,
-            "messages": [
-                {"role": "system", "content": "You are an expert technical interviewer."},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": max_tokens,
-            "temperature": self.temperature
-        }
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        content = self.llm.chat(prompt, system=self.SYSTEM_PROMPT, endpoint=endpoint, max_tokens=max_tokens)
+        # Full responses are bulky: the log pipeline samples and truncates the payload
+        logger.info("LLM response received", extra={'endpoint': endpoint, 'payload': content})
+
+        if not content:
+            raise ValueError("API returned an empty response.")
+
+        return content
 
+    def _parse_response(self, response_text: str, schema: dict):
+        """Parse the model's JSON reply, repairing fences, prose and truncation."""
         try:
-            response = requests.post(self.API_URL, json=payload, headers=headers)
-            response.raise_for_status()  # Raise an error for HTTP failures
+            return parse_structured(response_text, schema)
+        except StructuredOutputError as e:
+            logger.error("Unexpected response format (%s): %s", str(e), response_text[:500])
+            raise ValueError(f"Unexpected API response format: {str(e)}")
 
-            response_json = response.json()
-            logging.info("API Response: %s", json.dumps(response_json, indent=2))
+    def generate_questions(self, job_description: str, difficulty: str = 'medium', num_questions: int = 5):
+        """Generate interview questions based on job description."""
+        if not job_description:
+            raise ValueError("Job description is required.")
 
-            if "choices" not in response_json or not response_json["choices"]:
-                raise ValueError("Invalid API response: Missing 'choices' key or empty response.")
+        if not Config.QUESTION_BANK_ENABLED:
+            return self._request_questions(job_description, difficulty, num_questions)
+
+        bank = get_question_bank()
+        match = bank.lookup(job_description, difficulty)
+        if match is None:
+            questions = self._request_questions(job_description, difficulty, num_questions)
+            bank.store(job_description, difficulty, questions)
+            return questions
+
+        banked, similarity = match
+        logger.info("Question bank hit (similarity %.2f, %d questions)", similarity, len(banked))
+        fresh_count = max(num_questions - len(banked), 0) or min(Config.QUESTION_BANK_FRESH_QUESTIONS, num_questions)
+        if not fresh_count:
+            return banked[:num_questions]
+
+        fresh = self._request_questions(job_description, difficulty, fresh_count)
+        bank.store(job_description, difficulty, fresh, top_up=True)
+        questions = list(dict.fromkeys(fresh + banked))
+        return questions[:num_questions]
+
+    def _request_questions(self, job_description: str, difficulty: str, num_questions: int):
+        """Ask the model for a fresh set of interview questions."""
+        prompt = PromptBuilder('interview.generate_questions').build("""
+        Given this job description:
+        {job_description}
 
-            content = response_json["choices"][0].get("message", {}).get("content", "").strip()
+        Generate {num_questions} interview questions at {difficulty} difficulty level.
+        Format response as JSON:
+        {{
+            "questions": ["Question 1", "Question 2", ...]
+        }}
+        """, job_description=job_description, num_questions=num_questions, difficulty=difficulty)
 
-            if not content:
-                raise ValueError("API returned an empty response.")
+        response_text = self._send_request(prompt, endpoint='interview.generate_questions')
 
-            return content
+        result = self._parse_response(response_text, {"questions": list})
 
-        except requests.RequestException as e:
-            logging.error("API request failed: %s", str(e))
-            raise Exception(f"API request error: {str(e)}")
-        except json.JSONDecodeError:
-            logging.error("Failed to parse JSON response from API.")
-            raise ValueError("Invalid JSON response from API.")
+        return [q for q in result["questions"] if isinstance(q, str) and q.strip()]
 
-    def generate_questions(self, job_description: str, difficulty: str = 'medium', num_questions: int = 5):
-        """Generate interview questions based on job description."""
+    def generate_next_question(self, job_description: str, asked_questions: list, difficulty: str = 'medium'):
+        """Generate one new interview question that does not repeat those already asked."""
         if not job_description:
             raise ValueError("Job description is required.")
 
-        prompt = f"""
+        asked = "\n".join(f"- {q}" for q in asked_questions) or "None"
+        prompt = PromptBuilder('interview.generate_next_question').build("""
         Given this job description:
         {job_description}
 
-        Generate {num_questions} interview questions at {difficulty} difficulty level.
+        Questions already asked:
+        {asked}
+
+        Generate the next interview question at {difficulty} difficulty level.
+        Do not repeat or closely rephrase a question already asked.
         Format response as JSON:
         {{
-            "questions": ["Question 1", "Question 2", ...]
+            "question": "The next question"
         }}
-        """
+        """, job_description=job_description, asked=asked, difficulty=difficulty)
 
-        response_text = self._send_request(prompt)
+        response_text = self._send_request(prompt, max_tokens=150, endpoint='interview.generate_next_question')
 
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            logging.error("Invalid JSON format in API response.")
-            raise ValueError("API returned an invalid JSON response.")
+        result = self._parse_response(response_text, {"question": str})
+        if not result["question"].strip():
+            raise ValueError("Unexpected API response format: empty question.")
+
+        return result["question"]
+
+    def conduct_mock_interview(self, job_description: str, duration: int = 30, difficulty: str = 'medium'):
+        """Start a stateful mock interview session and return its first question."""
+        return self.sessions.start(job_description, duration, difficulty)
 
-        if not isinstance(result, dict) or "questions" not in result:
-            logging.error("Unexpected response format: %s", result)
-            raise ValueError("Unexpected API response format.")
+    def get_mock_interview(self, session_id: str):
+        """Return the current state of a mock interview session."""
+        return self.sessions.get(session_id)
 
-        return result["questions"]
+    def answer_mock_interview(self, session_id: str, answer: str):
+        """Submit an answer to the current mock interview question."""
+        return self.sessions.submit_answer(session_id, answer)
 
-    def generate_answers(self, question: str, job_context: str):
+    def generate_answers(self, question: str, job_context: str, difficulty: str = 'medium'):
         """Generate sample answers for a given interview question."""
         if not question:
             raise ValueError("Question is required.")
         if not job_context:
             raise ValueError("Job context is required.")
 
-        prompt = f"""
+        prompt = PromptBuilder('interview.generate_answers').build("""
         Given this interview question:
         {question}
 
         Job Context:
         {job_context}
 
-        Generate a strong sample answer.
+        Generate a strong sample answer for a {difficulty} difficulty interview.
         Format response as JSON:
         {{
             "strong_answer": "Your detailed answer"
         }}
-        """
-
-        response_text = self._send_request(prompt)
+        """, question=question, job_context=job_context, difficulty=difficulty)
 
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            logging.error("Invalid JSON format in API response.")
-            raise ValueError("API returned an invalid JSON response.")
+        response_text = self._send_request(prompt, endpoint='interview.generate_answers')
 
-        if not isinstance(result, dict) or "strong_answer" not in result:
-            logging.error("Unexpected response format: %s", result)
-            raise ValueError("Unexpected API response format.")
+        result = self._parse_response(response_text, {"strong_answer": str})
 
         return result["strong_answer"]
 
+    def generate_answers_batch(self, questions: list, job_context: str, difficulty: str = 'medium'):
+        """Generate sample answers for a whole question set, keyed by question."""
+        if not questions:
+            raise ValueError("Questions are required.")
+        if not job_context:
+            raise ValueError("Job context is required.")
+
+        if not isinstance(questions, list) or not all(isinstance(q, str) for q in questions):
+            raise ValueError("Questions must be a list of strings.")
+
+        # Preserve order while dropping duplicate and blank questions
+        unique_questions = list(dict.fromkeys(q.strip() for q in questions if q.strip()))
+        answers = {}
+
+        # Capped here rather than by the prompt builder, so chunking counts exactly what is sent
+        prompt_context = truncate_to_tokens(
+            compact_text(job_context), PromptBuilder('interview.generate_answers_batch').budget // 2)
+        for chunk in self._chunk_questions(unique_questions, prompt_context, difficulty):
+            answers.update(self._generate_answer_chunk(chunk, prompt_context, difficulty))
+
+        # Anything the model skipped falls back to a single-question request
+        for question in unique_questions:
+            if question not in answers:
+                logger.warning("Batch response missed a question, retrying individually: %s", question)
+                answers[question] = self.generate_answers(question, job_context, difficulty)
+
+        return {question: answers[question] for question in unique_questions}
+
+    def _chunk_questions(self, questions: list, job_context: str, difficulty: str = 'medium'):
+        """Split questions into chunks that fit the batch prompt and completion budgets."""
+        builder = PromptBuilder('interview.generate_answers_batch')
+        # Everything but the questions: the template's own text and the job context
+        context_tokens = builder.fixed_tokens(self.ANSWERS_PROMPT, job_context=job_context, difficulty=difficulty)
+        chunk, prompt_tokens = [], context_tokens
+        for question in questions:
+            cost = count_tokens(question) + 4
+            completion_tokens = self.ANSWER_TOKENS_PER_QUESTION * (len(chunk) + 1)
+            if chunk and (prompt_tokens + cost > builder.budget
+                          or completion_tokens > self.BATCH_MAX_COMPLETION_TOKENS):
+                yield chunk
+                chunk, prompt_tokens = [], context_tokens
+            chunk.append(question)
+            prompt_tokens += cost
+        if chunk:
+            yield chunk
+
+    def _generate_answer_chunk(self, questions: list, job_context: str, difficulty: str):
+        """Generate answers for one chunk of questions in a single request."""
+        numbered = "\n".join(f"{i}. {q}" for i, q in enumerate(questions, 1))
+        prompt = PromptBuilder('interview.generate_answers_batch').build(
+            self.ANSWERS_PROMPT, job_context=job_context, difficulty=difficulty, numbered=numbered)
+
+        max_tokens = min(self.BATCH_MAX_COMPLETION_TOKENS, self.ANSWER_TOKENS_PER_QUESTION * len(questions))
+        response_text = self._send_request(prompt, max_tokens=max_tokens, endpoint='interview.generate_answers_batch')
+
+        result = self._parse_response(response_text, {"answers": dict})
+
+        answers = {}
+        for key, answer in result["answers"].items():
+            try:
+                index = int(key) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < len(questions) and answer:
+                answers[questions[index]] = answer
+        return answers
+
     def analyze_response(self, response: str, question: str, job_context: str):
         """Analyze an interview response and provide feedback."""
         if not response:
@@ -140,11 +272,27 @@ class InterviewService:
         if not job_context:
             raise ValueError("Job context is required.")
 
-        prompt = f"""
+        if Config.ANSWER_PRESCORE_ENABLED:
+            prescore = prescore_answer(response, question, job_context)
+            if prescore['weak']:
+                # Clearly weak answers get instant local feedback instead of an upstream call
+                logger.info("Answer pre-scored locally", extra={'signals': prescore['signals']})
+                return {
+                    "analysis": prescore['analysis'],
+                    "score": prescore['score'],
+                    "signals": prescore['signals'],
+                    "source": "local"
+                }
+            signals = prescore['signals']
+        else:
+            signals = answer_signals(response, question, job_context)
+
+        prompt = PromptBuilder('interview.analyze_response').build("""
         Analyze this interview response:
         Question: {question}
         Response: {response}
         Job Context: {job_context}
+        Automated signals (word count, filler-word ratio, STAR structure, keyword overlap): {signals}
 
         Provide a detailed analysis and score.
         Format response as JSON:
@@ -152,27 +300,195 @@ class InterviewService:
             "analysis": "Detailed feedback",
             "score": 85
         }}
+        """, question=question, response=response, job_context=job_context, signals=signals)
+
+        response_text = self._send_request(prompt, endpoint='interview.analyze_response')
+
+        result = self._parse_response(response_text, {"analysis": str, "score": (int, float)})
+
+        return {
+            "analysis": result["analysis"],
+            "score": result["score"],
+            "signals": signals,
+            "source": "llm"
+        }
+
+    def generate_feedback(self, interview_data, job_context=None):
         """
+        Score a whole interview transcript in a few chunked requests and aggregate
+        per-competency scores locally. interview_data is a list of {question, answer}
+        pairs, a dict holding such a list, or {"session_id": ...} for a mock interview.
+        """
+        pairs, job_context = self._transcript_pairs(interview_data, job_context)
+        if not pairs:
+            raise ValueError("Interview data must contain at least one question and answer.")
+        if not job_context:
+            raise ValueError("Job context is required.")
 
-        response_text = self._send_request(prompt)
+        results = [None] * len(pairs)
+        pending = []
+        for index, (question, answer) in enumerate(pairs):
+            if not answer:
+                results[index] = self._local_feedback(0, "No answer was given.", None)
+                continue
+            if Config.ANSWER_PRESCORE_ENABLED:
+                prescore = prescore_answer(answer, question, job_context)
+                if prescore['weak']:
+                    results[index] = self._local_feedback(prescore['score'], prescore['analysis'], prescore['signals'])
+                    continue
+            pending.append(index)
+
+        # Capped here rather than by the prompt builder, so chunking counts exactly what is sent
+        prompt_context = truncate_to_tokens(
+            compact_text(job_context), PromptBuilder('interview.generate_feedback').budget // 4)
+        calls, remaining = 0, list(pending)
+        for chunk in self._chunk_transcript([pairs[i] for i in pending], prompt_context):
+            indexes, remaining = remaining[:len(chunk)], remaining[len(chunk):]
+            for offset, feedback in self._generate_feedback_chunk(chunk, prompt_context).items():
+                results[indexes[offset]] = feedback
+            calls += 1
+
+        # Anything the model skipped falls back to a single-answer analysis
+        for index, (question, answer) in enumerate(pairs):
+            if results[index] is None:
+                logger.warning("Feedback response missed an answer, analyzing individually: %s", question)
+                analysis = self.analyze_response(answer, question, job_context)
+                if analysis.get('source') == 'llm':
+                    calls += 1
+                results[index] = self._local_feedback(analysis['score'], analysis['analysis'], analysis.get('signals'))
+                results[index]['source'] = analysis.get('source', 'llm')
+
+        answers = [dict(result, question=question, answer=answer) for (question, answer), result in zip(pairs, results)]
+        return {
+            'answers': answers,
+            'overall': self._aggregate_feedback(answers),
+            'llm_calls': calls
+        }
 
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            logging.error("Invalid JSON format in API response.")
-            raise ValueError("API returned an invalid JSON response.")
+    def _transcript_pairs(self, interview_data, job_context):
+        """Normalize the accepted transcript shapes into (question, answer) pairs."""
+        if isinstance(interview_data, dict) and interview_data.get('session_id'):
+            session = self.sessions.store.load(interview_data['session_id'])
+            if session is None:
+                raise ValueError("Interview session not found.")
+            job_context = job_context or session['job_description']
+            interview_data = [q for q in session['questions'] if 'answer' in q]
+        elif isinstance(interview_data, dict):
+            interview_data = (interview_data.get('answers') or interview_data.get('questions')
+                              or interview_data.get('transcript') or [])
+        if not isinstance(interview_data, list):
+            raise ValueError("Interview data must be a list of question and answer pairs.")
+
+        pairs = []
+        for entry in interview_data:
+            if not isinstance(entry, dict) or not str(entry.get('question') or '').strip():
+                continue
+            answer = entry.get('answer') or entry.get('response') or ''
+            pairs.append((str(entry['question']).strip(), str(answer).strip()))
+        if isinstance(job_context, (dict, list)):
+            job_context = compact_json(job_context) if job_context else ''
+        return pairs, job_context
+
+    def _chunk_transcript(self, pairs: list, job_context: str):
+        """Split Q/A pairs into chunks that fit the feedback prompt and completion budgets."""
+        builder = PromptBuilder('interview.generate_feedback')
+        # Everything but the transcript: the template's own text, the competencies and the job context
+        context_tokens = builder.fixed_tokens(self.FEEDBACK_PROMPT, job_context=job_context,
+                                              competencies=", ".join(self.FEEDBACK_COMPETENCIES))
+        chunk, prompt_tokens = [], context_tokens
+        for question, answer in pairs:
+            cost = count_tokens(question) + count_tokens(answer) + 8
+            completion_tokens = self.FEEDBACK_TOKENS_PER_ANSWER * (len(chunk) + 1)
+            if chunk and (prompt_tokens + cost > builder.budget
+                          or completion_tokens > self.BATCH_MAX_COMPLETION_TOKENS):
+                yield chunk
+                chunk, prompt_tokens = [], context_tokens
+            chunk.append((question, answer))
+            prompt_tokens += cost
+        if chunk:
+            yield chunk
+
+    def _generate_feedback_chunk(self, pairs: list, job_context: str) -> dict:
+        """Score one chunk of Q/A pairs in a single request; returns feedback keyed by chunk offset."""
+        transcript = "\n\n".join(f"{i}. Q: {q}\nA: {a}" for i, (q, a) in enumerate(pairs, 1))
+        competencies = ", ".join(self.FEEDBACK_COMPETENCIES)
+        prompt = PromptBuilder('interview.generate_feedback').build(
+            self.FEEDBACK_PROMPT, job_context=job_context, transcript=transcript, competencies=competencies)
+
+        max_tokens = min(self.BATCH_MAX_COMPLETION_TOKENS, self.FEEDBACK_TOKENS_PER_ANSWER * len(pairs))
+        response_text = self._send_request(prompt, max_tokens=max_tokens, endpoint='interview.generate_feedback')
+        result = self._parse_response(response_text, {"answers": dict})
+
+        feedback = {}
+        for key, entry in result["answers"].items():
+            try:
+                offset = int(key) - 1
+                validate(entry, {"score": (int, float)})
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= offset < len(pairs):
+                continue
+            scored = entry.get("competencies") if isinstance(entry.get("competencies"), dict) else {}
+            competencies = {}
+            for name in self.FEEDBACK_COMPETENCIES:
+                try:
+                    validate(scored, {name: (int, float)})
+                except ValueError:
+                    continue
+                competencies[name] = max(0, min(100, scored[name]))
+            feedback[offset] = {
+                'score': max(0, min(100, entry["score"])),
+                'competencies': competencies,
+                'strengths': str(entry.get("strengths") or ""),
+                'improvements': str(entry.get("improvements") or ""),
+                'source': 'llm'
+            }
+        return feedback
+
+    def _local_feedback(self, score, analysis: str, signals) -> dict:
+        # A locally scored answer is weak across the board
+        return {
+            'score': score,
+            'competencies': {name: score for name in self.FEEDBACK_COMPETENCIES},
+            'strengths': "",
+            'improvements': analysis,
+            'signals': signals,
+            'source': 'local'
+        }
 
-        if not isinstance(result, dict) or "analysis" not in result or "score" not in result:
-            logging.error("Unexpected response format: %s", result)
-            raise ValueError("Unexpected API response format.")
+    def _aggregate_feedback(self, answers: list) -> dict:
+        """Average per-answer scores into overall and per-competency scores."""
+        competency_scores = {}
+        for name in self.FEEDBACK_COMPETENCIES:
+            values = [a['competencies'][name] for a in answers if name in a['competencies']]
+            if values:
+                competency_scores[name] = round(sum(values) / len(values), 1)
+
+        scores = [a['score'] for a in answers]
+        overall_score = round(sum(scores) / len(scores), 1)
+        ranked = sorted(competency_scores, key=competency_scores.get)
+        summary = [f"Overall score {overall_score} across {len(answers)} answers."]
+        if ranked:
+            summary.append(f"Strongest competency: {ranked[-1].replace('_', ' ')} "
+                           f"({competency_scores[ranked[-1]]}).")
+            if len(ranked) > 1:
+                summary.append(f"Needs the most work: {ranked[0].replace('_', ' ')} "
+                               f"({competency_scores[ranked[0]]}).")
+        weakest = min(range(len(answers)), key=lambda i: answers[i]['score'])
+        if answers[weakest]['improvements']:
+            summary.append(f"Weakest answer (question {weakest + 1}): {answers[weakest]['improvements']}")
 
         return {
-            "analysis": result["analysis"],
-            "score": result["score"]
+            'score': overall_score,
+            'competencies': competency_scores,
+            'strongest_competency': ranked[-1] if ranked else None,
+            'weakest_competency': ranked[0] if ranked else None,
+            'summary': ' '.join(summary)
         }
 
 # Example Usage:
 if __name__ == "__main__":
+    configure_logging()
     API_KEY = os.getenv("PERPLEXITY_API_KEY")  # Load from environment API removed for security
     interview_service = InterviewService(API_KEY)
 
@@ -0,0 +1,257 @@
+import os
+import json
+import uuid
+import weakref
+import logging
+import tempfile
+import threading
+import contextvars
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from services.metrics import track_executor
+
+logger = logging.getLogger(__name__)
+
+_prefetch_executor = ThreadPoolExecutor(
+    max_workers=Config.INTERVIEW_PREFETCH_WORKERS, thread_name_prefix='interview-prefetch')
+track_executor('interview-prefetch', _prefetch_executor)
+
+
+class SessionConflictError(Exception):
+    """Raised when an answer races another answer to the same question."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class InterviewSessionStore:
+    """Persists interview sessions as JSON files so they survive worker restarts."""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or Config.INTERVIEW_SESSION_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        # Session ids are generated uuid hex strings; reject anything else
+        if not session_id or not all(c in '0123456789abcdef' for c in session_id):
+            raise ValueError("Invalid session id.")
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def load(self, session_id: str) -> dict:
+        try:
+            with open(self._path(session_id), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, session: dict):
+        session['updated_at'] = _now()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(session, f, separators=(',', ':'))
+        os.replace(tmp_path, self._path(session['id']))
+
+
+class InterviewSessionEngine:
+    """
+    Runs stateful mock interviews. While the candidate answers the current
+    question, the next question and the current question's model answer are
+    generated in the background, so advancing is instant.
+    """
+
+    MINUTES_PER_QUESTION = 5
+
+    def __init__(self, interview_service, store: InterviewSessionStore = None):
+        self.interview_service = interview_service
+        self.store = store or InterviewSessionStore()
+        # A session's lock lives while some request holds or waits on it, so ended and
+        # abandoned sessions leave nothing behind
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+        self._prefetching = {}
+        self._scoring = set()
+
+    def _lock(self, session_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(session_id, threading.Lock())
+
+    def start(self, job_description: str, duration: int = 30, difficulty: str = 'medium') -> dict:
+        """Create a session and return it with its first question."""
+        if not job_description:
+            raise ValueError("Job description is required.")
+
+        total = min(max(int(duration) // self.MINUTES_PER_QUESTION, 3), Config.INTERVIEW_MAX_QUESTIONS)
+        first_question = self.interview_service.generate_next_question(job_description, [], difficulty)
+        session = {
+            'id': uuid.uuid4().hex,
+            'job_description': job_description,
+            'difficulty': difficulty,
+            'duration': duration,
+            'total_questions': total,
+            'status': 'in_progress',
+            'created_at': _now(),
+            'questions': [{'question': first_question}],
+            'next_question': None,
+            'running_score': None
+        }
+        with self._lock(session['id']):
+            self.store.save(session)
+        self._prefetch(session)
+        return self._public_view(session)
+
+    def get(self, session_id: str) -> dict:
+        """Return the session state, resuming background prefetch if a restart dropped it."""
+        session = self._load(session_id)
+        self._prefetch(session)
+        return self._public_view(session)
+
+    def submit_answer(self, session_id: str, answer: str) -> dict:
+        """Score the answer to the current question and advance to the next one."""
+        if not answer:
+            raise ValueError("Answer is required.")
+
+        with self._lock(session_id):
+            session = self._load(session_id)
+            if session['status'] != 'in_progress':
+                raise ValueError("Interview session is already completed.")
+            if session_id in self._scoring:
+                raise SessionConflictError("An answer to this question is already being scored.")
+            self._scoring.add(session_id)
+            index = len(session['questions']) - 1
+            question = session['questions'][index]['question']
+
+        # Score outside the lock so the background prefetch can store its results meanwhile
+        try:
+            analysis = self.interview_service.analyze_response(answer, question, session['job_description'])
+        finally:
+            self._scoring.discard(session_id)
+
+        with self._lock(session_id):
+            session = self._load(session_id)
+            # Another worker sharing the session store may have recorded an answer meanwhile
+            if session['status'] != 'in_progress' or len(session['questions']) - 1 != index:
+                raise SessionConflictError("The interview moved on while this answer was scored.")
+            current = session['questions'][index]
+            current['answer'] = answer
+            current['analysis'] = analysis['analysis']
+            current['score'] = analysis['score']
+
+            scores = [q['score'] for q in session['questions'] if isinstance(q.get('score'), (int, float))]
+            session['running_score'] = round(sum(scores) / len(scores), 1) if scores else None
+
+            if len(session['questions']) >= session['total_questions']:
+                session['status'] = 'completed'
+            else:
+                next_question = session.get('next_question')
+                session['next_question'] = None
+                if next_question is None:
+                    # Prefetch has not finished (or was lost); generate inline
+                    asked = [q['question'] for q in session['questions']]
+                    next_question = self.interview_service.generate_next_question(
+                        session['job_description'], asked, session['difficulty'])
+                session['questions'].append({'question': next_question})
+            self.store.save(session)
+
+        self._prefetch(session)
+        result = self._public_view(session)
+        result['feedback'] = {
+            'question': question,
+            'analysis': current['analysis'],
+            'score': current['score'],
+            'model_answer': current.get('model_answer')
+        }
+        return result
+
+    def _load(self, session_id: str) -> dict:
+        session = self.store.load(session_id)
+        if session is None:
+            raise ValueError("Interview session not found.")
+        return session
+
+    def _prefetch(self, session: dict):
+        """Generate the next question and the current model answer in the background."""
+        if session['status'] != 'in_progress':
+            return
+        session_id = session['id']
+        with self._locks_guard:
+            if self._prefetching.get(session_id):
+                return
+            self._prefetching[session_id] = True
+        # Keep the request's tenant and priority for the background calls
+        _prefetch_executor.submit(contextvars.copy_context().run, self._run_prefetch, session_id)
+
+    def _run_prefetch(self, session_id: str):
+        try:
+            # Bounded so an empty model reply cannot spin forever
+            for _ in range(3):
+                self._prefetch_once(session_id)
+                with self._lock(session_id):
+                    # The candidate may have answered meanwhile; if so go again for the new question
+                    session = self.store.load(session_id)
+                    current = session['questions'][-1]
+                    if session['status'] != 'in_progress' or (
+                            current.get('model_answer') and (
+                                session.get('next_question') is not None
+                                or len(session['questions']) >= session['total_questions'])):
+                        # Cleared before the session lock is released, so an answer saved after
+                        # this check always finds no prefetch running and schedules a new one
+                        with self._locks_guard:
+                            self._prefetching.pop(session_id, None)
+                        return
+        except Exception as e:
+            logger.error("Prefetch failed for interview session %s: %s", session_id, str(e))
+        with self._locks_guard:
+            self._prefetching.pop(session_id, None)
+
+    def _prefetch_once(self, session_id: str):
+        session = self.store.load(session_id)
+        current = session['questions'][-1]
+        asked = [q['question'] for q in session['questions']]
+        needs_next = (session.get('next_question') is None
+                      and len(session['questions']) < session['total_questions'])
+
+        model_answer = None
+        if not current.get('model_answer'):
+            model_answer = self.interview_service.generate_answers(
+                current['question'], session['job_description'], session['difficulty'])
+        next_question = None
+        if needs_next:
+            next_question = self.interview_service.generate_next_question(
+                session['job_description'], asked, session['difficulty'])
+
+        with self._lock(session_id):
+            session = self.store.load(session_id)
+            # The candidate may have moved on while we were generating
+            if model_answer and session['questions'][-1]['question'] == current['question']:
+                session['questions'][-1]['model_answer'] = model_answer
+            elif model_answer:
+                for entry in session['questions']:
+                    if entry['question'] == current['question'] and not entry.get('model_answer'):
+                        entry['model_answer'] = model_answer
+            if next_question and len(session['questions']) == len(asked) and session['status'] == 'in_progress':
+                session['next_question'] = next_question
+            self.store.save(session)
+
+    def _public_view(self, session: dict) -> dict:
+        answered = [
+            {
+                'question': q['question'],
+                'answer': q['answer'],
+                'analysis': q.get('analysis'),
+                'score': q.get('score'),
+                'model_answer': q.get('model_answer')
+            }
+            for q in session['questions'] if 'answer' in q
+        ]
+        current = session['questions'][-1] if session['status'] == 'in_progress' else None
+        return {
+            'session_id': session['id'],
+            'status': session['status'],
+            'question_number': len(session['questions']),
+            'total_questions': session['total_questions'],
+            'current_question': current['question'] if current else None,
+            'answered': answered,
+            'running_score': session.get('running_score')
+        }
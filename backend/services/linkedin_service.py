@@ -1,24 +1,24 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
 import requests
-from bs4 import BeautifulSoup
-import json
+from services.llm_client import LLMClient
+from services.overload import OVERLOAD_ERRORS
+from services.prompt_builder import PromptBuilder
+from services.tracing import span
+from config import Config
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client with API key from environment
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
 class LinkedInService:
     def __init__(self):
         self.linkedin_client_id = os.getenv('LINKEDIN_CLIENT_ID')
         self.linkedin_client_secret = os.getenv('LINKEDIN_CLIENT_SECRET')
         self.linkedin_redirect_uri = os.getenv('LINKEDIN_REDIRECT_URI')
         self.is_configured = bool(self.linkedin_client_id and self.linkedin_client_secret)
-        self.model = os.getenv('OPENAI_MODEL')
-        self.temperature = float(os.getenv('OPENAI_TEMPERATURE'))
+        self.model = os.getenv('OPENAI_MODEL') or Config.OPENAI_MODEL
+        self.temperature = float(os.getenv('OPENAI_TEMPERATURE') or Config.OPENAI_TEMPERATURE)
+        self.llm = LLMClient('openai', model=self.model, temperature=self.temperature)
 
     def analyze_profile(self, profile_url: str) -> dict:
         """
@@ -33,9 +33,10 @@ class LinkedInService:
         try:
             # In a real implementation, you would use the LinkedIn API
             # For now, we'll simulate profile data
-            profile_data = self._fetch_profile_data(profile_url)
+            with span('linkedin.fetch_profile'):
+                profile_data = self._fetch_profile_data(profile_url)
             
-            prompt = f"""
+            prompt = PromptBuilder('linkedin.analyze_profile').build("""
             Analyze this LinkedIn profile and provide detailed feedback on:
             1. Profile completeness and professionalism
             2. Content quality and impact
@@ -43,22 +44,24 @@ class LinkedInService:
             4. Strengths and weaknesses
             
             Profile data:
-            {json.dumps(profile_data, indent=2)}
-            """
+            {profile_data}
+            """, profile_data=profile_data)
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert LinkedIn profile reviewer."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature
+            content = self.llm.chat(
+                prompt,
+                system="You are an expert LinkedIn profile reviewer.",
+                endpoint='linkedin.analyze_profile'
             )
             
+            with span('linkedin.extract_keywords'):
+                keywords = self._extract_keywords(profile_data)
+
             return {
-                "analysis": response.choices[0].message.content,
-                "keywords": self._extract_keywords(profile_data)
+                "analysis": content,
+                "keywords": keywords
             }
+        except OVERLOAD_ERRORS:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
@@ -74,9 +77,9 @@ class LinkedInService:
             }
 
         try:
-            prompt = f"""
+            prompt = PromptBuilder('linkedin.optimize_profile').build("""
             Provide detailed optimization suggestions for this LinkedIn profile:
-            {json.dumps(profile_data, indent=2)}
+            {profile_data}
             
             Include suggestions for:
             1. Headline optimization
@@ -84,21 +87,20 @@ class LinkedInService:
             3. Experience descriptions
             4. Skills and endorsements
             5. Profile photo and background
-            """
+            """, profile_data=profile_data)
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert LinkedIn profile optimizer."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature
+            content = self.llm.chat(
+                prompt,
+                system="You are an expert LinkedIn profile optimizer.",
+                endpoint='linkedin.optimize_profile'
             )
             
             return {
-                "suggestions": response.choices[0].message.content,
+                "suggestions": content,
                 "optimized_headline": self._generate_headline(profile_data)
             }
+        except OVERLOAD_ERRORS:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
@@ -114,7 +116,7 @@ class LinkedInService:
             }
 
         try:
-            prompt = f"""
+            prompt = PromptBuilder('linkedin.generate_post').build("""
             Create an engaging LinkedIn post about:
             Topic: {topic}
             Tone: {tone}
@@ -125,21 +127,20 @@ class LinkedInService:
             2. Include relevant hashtags
             3. Encourage interaction
             4. Provide value to the reader
-            """
+            """, topic=topic, tone=tone, length=length)
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert LinkedIn content creator."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature
+            content = self.llm.chat(
+                prompt,
+                system="You are an expert LinkedIn content creator.",
+                endpoint='linkedin.generate_post'
             )
             
             return {
-                "post": response.choices[0].message.content,
+                "post": content,
                 "hashtags": self._generate_hashtags(topic)
             }
+        except OVERLOAD_ERRORS:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
@@ -155,30 +156,30 @@ class LinkedInService:
             }
 
         try:
-            prompt = f"""
+            prompt = PromptBuilder('linkedin.suggest_keywords').build("""
             Suggest relevant keywords and skills for this LinkedIn profile:
-            {json.dumps(profile_data, indent=2)}
+            {profile_data}
             
             Include:
             1. Industry-specific keywords
             2. Skill-related keywords
             3. Job title variations
             4. Trending terms in the field
-            """
+            """, profile_data=profile_data)
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a keyword optimization expert."},
-                    {"role": "user", "content": prompt}
-                ],
+            content = self.llm.chat(
+                prompt,
+                system="You are a keyword optimization expert.",
+                endpoint='linkedin.suggest_keywords',
                 temperature=0.3
             )
             
             return {
-                "keywords": response.choices[0].message.content.split('\n'),
+                "keywords": content.split('\n'),
                 "trending_terms": self._get_trending_terms(profile_data)
             }
+        except OVERLOAD_ERRORS:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
@@ -210,27 +211,27 @@ class LinkedInService:
             }
 
         try:
-            prompt = f"""
+            prompt = PromptBuilder('linkedin.generate_headline').build("""
             Create an optimized LinkedIn headline for this profile:
-            {json.dumps(profile_data, indent=2)}
+            {profile_data}
             
             The headline should:
             1. Be attention-grabbing
             2. Include key skills
             3. Be optimized for search
             4. Be under 220 characters
-            """
+            """, profile_data=profile_data)
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a LinkedIn headline expert."},
-                    {"role": "user", "content": prompt}
-                ],
+            content = self.llm.chat(
+                prompt,
+                system="You are a LinkedIn headline expert.",
+                endpoint='linkedin.generate_headline',
                 temperature=0.7
             )
             
-            return response.choices[0].message.content
+            return content
+        except OVERLOAD_ERRORS:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
@@ -246,7 +247,7 @@ class LinkedInService:
             }
 
         try:
-            prompt = f"""
+            prompt = PromptBuilder('linkedin.generate_hashtags').build("""
             Generate relevant hashtags for a LinkedIn post about:
             {topic}
             
@@ -254,18 +255,18 @@ class LinkedInService:
             1. Industry-specific hashtags
             2. Trending hashtags
             3. Professional development hashtags
-            """
+            """, topic=topic)
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a social media hashtag expert."},
-                    {"role": "user", "content": prompt}
-                ],
+            content = self.llm.chat(
+                prompt,
+                system="You are a social media hashtag expert.",
+                endpoint='linkedin.generate_hashtags',
                 temperature=0.3
             )
             
-            return response.choices[0].message.content.split()
+            return content.split()
+        except OVERLOAD_ERRORS:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
@@ -286,23 +287,23 @@ class LinkedInService:
             }
 
         try:
-            prompt = f"""
+            prompt = PromptBuilder('linkedin.extract_keywords').build("""
             Extract the most important keywords from this LinkedIn profile:
-            {json.dumps(profile_data, indent=2)}
+            {profile_data}
             
             Return them as a comma-separated list.
-            """
+            """, profile_data=profile_data)
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a keyword extraction expert."},
-                    {"role": "user", "content": prompt}
-                ],
+            content = self.llm.chat(
+                prompt,
+                system="You are a keyword extraction expert.",
+                endpoint='linkedin.extract_keywords',
                 temperature=0.3
             )
             
-            return response.choices[0].message.content.split(',')
+            return content.split(',')
+        except OVERLOAD_ERRORS:
+            raise
         except Exception as e:
             return {
                 "error": str(e),
@@ -0,0 +1,300 @@
+import json
+import time
+import socket
+from contextlib import ExitStack
+import logging
+import threading
+import requests # type: ignore
+from config import Config
+from services.prompt_builder import count_tokens
+from services.resilience import call_with_resilience, CircuitOpenError, DeadlineExceededError
+from services.hedging import get_hedger, HedgeCancelled
+from services.llm_scheduler import scheduled_slot, tenant_budgets, current_tenant
+from services.metrics import metrics, LLM_BUCKETS
+from services.tracing import span, start_span
+
+logger = logging.getLogger(__name__)
+
+
+class TokenUsageTracker:
+    """Thread-safe per-endpoint record of prompt and completion tokens."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage = {}
+
+    def record(self, endpoint: str, prompt_tokens: int, completion_tokens: int, estimated: bool = False):
+        with self._lock:
+            entry = self._usage.setdefault(endpoint, {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "estimated_calls": 0
+            })
+            entry["calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            if estimated:
+                entry["estimated_calls"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {endpoint: dict(entry) for endpoint, entry in self._usage.items()}
+
+
+token_usage = TokenUsageTracker()
+
+llm_latency = metrics.histogram(
+    'llm_request_duration_seconds', "LLM call latency per service method", ('provider', 'endpoint', 'outcome'),
+    buckets=LLM_BUCKETS)
+llm_tokens = metrics.counter('llm_tokens_total', "LLM tokens per service method", ('provider', 'endpoint', 'kind'))
+llm_errors = metrics.counter('llm_errors_total', "Failed LLM calls per service method", ('provider', 'endpoint', 'error'))
+
+
+class LLMClient:
+    """Chat-completions client shared by all services."""
+
+    PROVIDERS = {
+        'openai': {'url': Config.OPENAI_API_URL, 'api_key': Config.OPENAI_API_KEY},
+        'perplexity': {'url': Config.PERPLEXITY_API_URL, 'api_key': Config.PERPLEXITY_API_KEY}
+    }
+
+    def __init__(self, provider: str = 'openai', model: str = None, temperature: float = None, api_key: str = None,
+                 hedge: bool = None):
+        if provider not in self.PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+
+        self.provider = provider
+        base_url = Config.LLM_STUB_URL or self.PROVIDERS[provider]['url']
+        self.api_url = base_url.rstrip('/') + '/chat/completions'
+        self.api_key = api_key or self.PROVIDERS[provider]['api_key'] or ('stub' if Config.LLM_STUB_URL else None)
+        self.model = model or Config.OPENAI_MODEL
+        self.temperature = Config.OPENAI_TEMPERATURE if temperature is None else temperature
+        self.hedge = Config.LLM_HEDGING_ENABLED if hedge is None else hedge
+
+    def chat(self, prompt: str, system: str = None, endpoint: str = 'default',
+             max_tokens: int = None, temperature: float = None, hedge: bool = None) -> str:
+        """Send a chat completion request and return the message content."""
+        messages, payload, headers = self._prepare(prompt, system, max_tokens, temperature)
+
+        if self.hedge if hedge is None else hedge:
+            hedger = get_hedger(self.provider)
+
+            def fetch(timeout):
+                return hedger.run(lambda cancel, on_first_token: self._stream(
+                    payload, headers, timeout, cancel, on_first_token))
+        else:
+            def fetch(timeout):
+                return self._post(payload, headers, timeout)
+
+        with span('llm.chat', provider=self.provider, endpoint=endpoint) as chat_span:
+            tenant, reserved = self._reserve(messages, max_tokens)
+            started, used = time.perf_counter(), 0
+            try:
+                try:
+                    response_json = self._call(fetch)
+                except Exception as e:
+                    self._record_failure(endpoint, e, started)
+                    raise
+                llm_latency.observe(time.perf_counter() - started, provider=self.provider, endpoint=endpoint,
+                                    outcome='ok')
+
+                if "choices" not in response_json or not response_json["choices"]:
+                    raise ValueError("Invalid API response: Missing 'choices' key or empty response.")
+
+                content = (response_json["choices"][0].get("message", {}).get("content") or "").strip()
+                used = self._record_usage(endpoint, messages, content, response_json.get("usage"))
+                chat_span.set(tokens=used)
+                return content
+            finally:
+                # Every reservation is settled, whatever ended the call
+                tenant_budgets.settle(tenant, reserved, used)
+
+    def chat_stream(self, prompt: str, system: str = None, endpoint: str = 'default',
+                    max_tokens: int = None, temperature: float = None):
+        """
+        Stream a chat completion, yielding content pieces as they arrive. Only opening
+        the stream is retried; a failure mid-stream is raised to the caller.
+        """
+        messages, payload, headers = self._prepare(prompt, system, max_tokens, temperature)
+        tenant, reserved = self._reserve(messages, max_tokens)
+        pieces, usage = [], None
+        started, failure = time.perf_counter(), None
+        # Not made current: the caller's own spans run between our yields
+        stream_span = start_span('llm.chat_stream', provider=self.provider, endpoint=endpoint)
+        try:
+            with ExitStack() as slot:
+                def open_stream(timeout):
+                    # A slot per attempt: a failed attempt gives it back before the retry backoff
+                    slot.enter_context(scheduled_slot(self.provider))
+                    try:
+                        return self._open_stream(payload, headers, timeout)
+                    except BaseException:
+                        slot.close()
+                        raise
+
+                response = self._call(open_stream)
+                with response:
+                    for piece, chunk_usage in self._sse_chunks(response):
+                        usage = chunk_usage or usage
+                        if piece:
+                            pieces.append(piece)
+                            yield piece
+        except requests.RequestException as e:
+            logger.error("%s stream failed: %s", self.provider, str(e))
+            failure = e
+            raise Exception(f"API request error: {str(e)}")
+        except Exception as e:
+            failure = e
+            raise
+        finally:
+            used = self._record_usage(endpoint, messages, ''.join(pieces), usage) if pieces else 0
+            tenant_budgets.settle(tenant, reserved, used)
+            if failure is not None:
+                self._record_failure(endpoint, failure, started)
+                stream_span.fail(failure)
+            else:
+                llm_latency.observe(time.perf_counter() - started, provider=self.provider, endpoint=endpoint,
+                                    outcome='ok')
+            stream_span.set(tokens=used, pieces=len(pieces))
+            stream_span.finish()
+
+    def _prepare(self, prompt: str, system: str, max_tokens: int, temperature: float) -> tuple:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature if temperature is None else temperature
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        return messages, payload, headers
+
+    def _reserve(self, messages: list, max_tokens: int) -> tuple:
+        """Reserve the prompt plus expected completion against the tenant's token budget."""
+        tenant = current_tenant()
+        reserved = sum(count_tokens(m["content"]) for m in messages) + (max_tokens or Config.LLM_COMPLETION_ESTIMATE)
+        tenant_budgets.reserve(tenant, reserved)
+        return tenant, reserved
+
+    def _call(self, fetch):
+        """Run fetch through the resilience layer, normalizing transport errors."""
+        try:
+            return call_with_resilience(self.provider, fetch)
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
+        except requests.RequestException as e:
+            logger.error("%s request failed: %s", self.provider, str(e))
+            raise Exception(f"API request error: {str(e)}")
+        except json.JSONDecodeError:
+            logger.error("Failed to parse JSON response from %s.", self.provider)
+            raise ValueError("Invalid JSON response from API.")
+
+    def _post(self, payload: dict, headers: dict, timeout) -> dict:
+        with scheduled_slot(self.provider), span('llm.upstream', provider=self.provider) as upstream_span:
+            response = requests.post(self.api_url, json=payload, headers=headers, timeout=timeout)
+            upstream_span.set(status=response.status_code)
+            response.raise_for_status()
+            return response.json()
+
+    def _open_stream(self, payload: dict, headers: dict, timeout):
+        response = requests.post(self.api_url, json=dict(payload, stream=True), headers=headers,
+                                 timeout=timeout, stream=True)
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
+
+    @staticmethod
+    def _sse_chunks(response):
+        """Yield (content_piece, usage) pairs from a server-sent-events completion stream."""
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                return
+            chunk = json.loads(data)
+            usage = chunk.get('usage')
+            for choice in chunk.get('choices', []) or [{}]:
+                yield choice.get('delta', {}).get('content'), usage
+
+    @staticmethod
+    def _abort(response):
+        """
+        Tear down a streaming response from another thread. Closing alone would
+        wait for a read blocked on the socket; shutting the socket down wakes it.
+        """
+        sock = getattr(getattr(response.raw, '_connection', None), 'sock', None)
+        if sock is None:
+            # "Connection: close" responses own their socket through http.client's file object
+            fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+            sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+        if sock is None:
+            return
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            return
+        response.close()
+
+    def _stream(self, payload: dict, headers: dict, timeout, cancel, on_first_token) -> dict:
+        """
+        Stream a completion so the first token can be timed. If the attempt is
+        cancelled, the winner's thread aborts the response, so the slot and pool
+        thread are freed even while waiting for the first byte.
+        """
+        with scheduled_slot(self.provider), span('llm.upstream', provider=self.provider, stream=True), \
+                self._open_stream(payload, headers, timeout) as response:
+            cancel.on_cancel(lambda: self._abort(response))
+            pieces, usage = [], None
+            try:
+                for piece, chunk_usage in self._sse_chunks(response):
+                    if cancel.is_set():
+                        raise HedgeCancelled()
+                    usage = chunk_usage or usage
+                    if piece:
+                        if not pieces:
+                            on_first_token()
+                        pieces.append(piece)
+            except HedgeCancelled:
+                raise
+            except Exception:
+                # Whatever the aborted read raised, the attempt was cancelled
+                if cancel.is_set():
+                    raise HedgeCancelled()
+                raise
+            if cancel.is_set():
+                raise HedgeCancelled()
+
+        return {
+            "choices": [{"message": {"role": "assistant", "content": ''.join(pieces)}}],
+            "usage": usage
+        }
+
+    def _record_failure(self, endpoint: str, error: Exception, started: float):
+        llm_latency.observe(time.perf_counter() - started, provider=self.provider, endpoint=endpoint, outcome='error')
+        llm_errors.inc(provider=self.provider, endpoint=endpoint, error=type(error).__name__)
+
+    def _record_usage(self, endpoint: str, messages: list, content: str, usage: dict):
+        """Record token counts reported by the provider, or count them locally."""
+        if usage and "prompt_tokens" in usage:
+            prompt_tokens, completion_tokens = usage["prompt_tokens"], usage.get("completion_tokens", 0)
+            token_usage.record(endpoint, prompt_tokens, completion_tokens)
+        else:
+            prompt_tokens = sum(count_tokens(m["content"]) for m in messages)
+            completion_tokens = count_tokens(content)
+            token_usage.record(endpoint, prompt_tokens, completion_tokens, estimated=True)
+        llm_tokens.inc(prompt_tokens, provider=self.provider, endpoint=endpoint, kind='prompt')
+        llm_tokens.inc(completion_tokens, provider=self.provider, endpoint=endpoint, kind='completion')
+        return prompt_tokens + completion_tokens
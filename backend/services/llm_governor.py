@@ -0,0 +1,164 @@
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from config import Config
+from services.metrics import metrics
+
+
+class GovernorTimeout(Exception):
+    """Raised when no outbound slot frees up within the queue timeout."""
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'event', 'cancelled')
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.event = threading.Event()
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ConcurrencyGovernor:
+    """
+    Caps concurrent outbound calls to one provider. Waiters are served by
+    priority (0 is most urgent), in arrival order within a priority, and a
+    released slot is handed straight to the next waiter. The last `reserved`
+    slots are kept for priority 0 so background work cannot fill the provider.
+    """
+
+    def __init__(self, name: str, limit: int, reserved: int = 0):
+        self.name = name
+        self.limit = limit
+        self.reserved = min(reserved, limit - 1)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._waits = {}
+
+    def _can_start(self, priority: int) -> bool:
+        limit = self.limit if priority == 0 else self.limit - self.reserved
+        return self._active < limit
+
+    def acquire(self, timeout: float = None, priority: int = 0) -> float:
+        """Take a slot, returning the seconds spent queued."""
+        started = time.monotonic()
+        with self._lock:
+            if self._can_start(priority) and not any(
+                    not w.cancelled and w.priority <= priority for w in self._waiters):
+                self._active += 1
+                self._record_wait(priority, 0.0)
+                return 0.0
+            waiter = _Waiter(priority, next(self._seq))
+            heapq.heappush(self._waiters, waiter)
+
+        granted = waiter.event.wait(timeout)
+        with self._lock:
+            waited = time.monotonic() - started
+            if granted or waiter.event.is_set():
+                self._record_wait(priority, waited)
+                return waited
+            waiter.cancelled = True
+            self._record_wait(priority, waited, timed_out=True)
+        raise GovernorTimeout(f"Timed out waiting for a {self.name} request slot")
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            self._dispatch()
+
+    def _dispatch(self):
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.cancelled:
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_start(waiter.priority):
+                break
+            heapq.heappop(self._waiters)
+            self._active += 1
+            waiter.event.set()
+
+    def _record_wait(self, priority: int, waited: float, timed_out: bool = False):
+        stats = self._waits.get(priority)
+        if stats is None:
+            stats = self._waits[priority] = {
+                'count': 0, 'timeouts': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+                'recent': deque(maxlen=200)
+            }
+        stats['count'] += 1
+        stats['total_seconds'] += waited
+        stats['max_seconds'] = max(stats['max_seconds'], waited)
+        stats['recent'].append(waited)
+        if timed_out:
+            stats['timeouts'] += 1
+
+    @contextmanager
+    def slot(self, timeout: float = None, priority: int = 0):
+        self.acquire(Config.LLM_QUEUE_TIMEOUT if timeout is None else timeout, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return sum(1 for w in self._waiters if not w.cancelled)
+
+    def wait_stats(self) -> dict:
+        """Queue-wait statistics per priority."""
+        with self._lock:
+            result = {}
+            for priority, stats in self._waits.items():
+                recent = sorted(stats['recent'])
+                result[priority] = {
+                    'count': stats['count'],
+                    'timeouts': stats['timeouts'],
+                    'mean_seconds': round(stats['total_seconds'] / stats['count'], 4),
+                    'p95_seconds': round(recent[int(0.95 * (len(recent) - 1))], 4) if recent else 0.0,
+                    'max_seconds': round(stats['max_seconds'], 4)
+                }
+            return result
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'reserved': self.reserved,
+                'active': self._active,
+                'queued': sum(1 for w in self._waiters if not w.cancelled)
+            }
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(provider: str) -> ConcurrencyGovernor:
+    with _governors_lock:
+        if provider not in _governors:
+            limit = Config.LLM_MAX_CONCURRENCY.get(provider, Config.LLM_MAX_CONCURRENCY_DEFAULT)
+            _governors[provider] = ConcurrencyGovernor(provider, limit, Config.LLM_INTERACTIVE_RESERVED_SLOTS)
+        return _governors[provider]
+
+
+def all_governors() -> list:
+    with _governors_lock:
+        return list(_governors.values())
+
+
+def governor_states() -> dict:
+    return {governor.name: governor.to_dict() for governor in all_governors()}
+
+
+metrics.gauge_callback('llm_queue_depth', "LLM calls waiting for an outbound slot",
+                       lambda: {name: state['queued'] for name, state in governor_states().items()}, ('provider',))
+metrics.gauge_callback('llm_active_calls', "LLM calls holding an outbound slot",
+                       lambda: {name: state['active'] for name, state in governor_states().items()}, ('provider',))
@@ -0,0 +1,139 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from config import Config
+from services.llm_governor import get_governor, all_governors
+
+INTERACTIVE = 'interactive'
+DEFAULT = 'default'
+BATCH = 'batch'
+PRIORITIES = {INTERACTIVE: 0, DEFAULT: 1, BATCH: 2}
+
+_priority = contextvars.ContextVar('llm_priority', default=DEFAULT)
+_tenant = contextvars.ContextVar('llm_tenant', default='anonymous')
+
+
+class TenantBudgetExceeded(Exception):
+    """Raised when a tenant has used up its LLM token budget."""
+
+    def __init__(self, tenant: str, retry_after: float):
+        self.tenant = tenant
+        self.retry_after = retry_after
+        super().__init__(f"Token budget exhausted for tenant {tenant}, retry in {retry_after:.0f}s")
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Run LLM calls made inside the block at the given priority class."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def set_request_context(priority: str = None, tenant: str = None):
+    """Set the priority class and tenant for the current request (worker threads are reused)."""
+    _priority.set(priority if priority in PRIORITIES else DEFAULT)
+    _tenant.set(tenant or 'anonymous')
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def current_tenant() -> str:
+    return _tenant.get()
+
+
+class TenantBudgets:
+    """
+    Per-tenant token buckets, refilled continuously at a tokens-per-minute rate.
+    A bucket that has refilled completely is the same as a new one, so idle
+    tenants are dropped every EVICT_INTERVAL seconds; used_tokens counts from
+    a tenant's last return after such an idle spell.
+    """
+
+    EVICT_INTERVAL = 60.0
+
+    def __init__(self, tokens_per_minute: int = None):
+        self.tokens_per_minute = tokens_per_minute or Config.TENANT_TOKENS_PER_MINUTE
+        self._lock = threading.Lock()
+        self._balances = {}
+        self._used = {}
+        self._evicted_at = time.monotonic()
+
+    def _evict_idle(self, now: float):
+        if now - self._evicted_at < self.EVICT_INTERVAL:
+            return
+        self._evicted_at = now
+        for tenant, (balance, updated_at) in list(self._balances.items()):
+            if balance + (now - updated_at) * self.tokens_per_minute / 60.0 >= self.tokens_per_minute:
+                del self._balances[tenant]
+                self._used.pop(tenant, None)
+
+    def _refill(self, tenant: str, now: float) -> float:
+        balance, updated_at = self._balances.get(tenant, (float(self.tokens_per_minute), now))
+        balance = min(self.tokens_per_minute, balance + (now - updated_at) * self.tokens_per_minute / 60.0)
+        self._balances[tenant] = (balance, now)
+        return balance
+
+    def reserve(self, tenant: str, tokens: int, timeout: float = None):
+        """Reserve tokens for a call, waiting for refill up to timeout seconds."""
+        tokens = min(tokens, self.tokens_per_minute)
+        deadline = time.monotonic() + (Config.LLM_QUEUE_TIMEOUT if timeout is None else timeout)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._evict_idle(now)
+                balance = self._refill(tenant, now)
+                if balance >= tokens:
+                    self._balances[tenant] = (balance - tokens, now)
+                    return
+                wait = (tokens - balance) * 60.0 / self.tokens_per_minute
+            if now + wait > deadline:
+                raise TenantBudgetExceeded(tenant, wait)
+            time.sleep(wait)
+
+    def settle(self, tenant: str, reserved: int, actual: int):
+        """Correct a reservation once the real token count is known."""
+        with self._lock:
+            now = time.monotonic()
+            balance = self._refill(tenant, now)
+            self._balances[tenant] = (min(self.tokens_per_minute, balance + reserved - actual), now)
+            self._used[tenant] = self._used.get(tenant, 0) + actual
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                tenant: {
+                    'available_tokens': int(self._refill(tenant, now)),
+                    'used_tokens': self._used.get(tenant, 0)
+                }
+                for tenant in list(self._balances)
+            }
+
+
+tenant_budgets = TenantBudgets()
+
+
+@contextmanager
+def scheduled_slot(provider: str):
+    """Hold an outbound slot for the current priority class."""
+    with get_governor(provider).slot(priority=PRIORITIES[current_priority()]):
+        yield
+
+
+def scheduler_stats() -> dict:
+    names = {rank: name for name, rank in PRIORITIES.items()}
+    return {
+        'queue_wait': {
+            governor.name: {names[rank]: stats for rank, stats in governor.wait_stats().items()}
+            for governor in all_governors()
+        },
+        'tenants': tenant_budgets.to_dict()
+    }
@@ -0,0 +1,161 @@
+import os
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime, timezone
+from config import Config
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def _truncate(value: str, limit: int) -> str:
+    if len(value) <= limit:
+        return value
+    return f"{value[:limit]}...[truncated {len(value) - limit} chars]"
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Formats each record as one line of JSON, including any extra= fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class PayloadSampler(logging.Filter):
+    """Keeps a sample of info/debug records carrying a bulky payload (extra={'payload': ...})."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not hasattr(record, 'payload'):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue without ever blocking the caller: message
+    formatting and truncation happen here, disk I/O on the listener thread, and
+    records are dropped (and counted) when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = _truncate(record.getMessage(), Config.LOG_MESSAGE_MAX_CHARS)
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _truncate(logging.Formatter().formatException(record.exc_info),
+                                        Config.LOG_MESSAGE_MAX_CHARS)
+            record.exc_info = None
+        if hasattr(record, 'payload'):
+            payload = record.payload if isinstance(record.payload, str) else json.dumps(record.payload, default=str)
+            record.payload = _truncate(payload, Config.LOG_PAYLOAD_MAX_CHARS)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+_listener = None
+_handler = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging():
+    """
+    Route the root logger through a queue to a rotating JSON-lines file
+    (idempotent). The queue handler becomes the root's only handler: console
+    output and any handlers installed earlier are written by the listener thread.
+    """
+    global _listener, _handler
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        os.makedirs(os.path.dirname(Config.LOG_FILE), exist_ok=True)
+        file_handler = RotatingFileHandler(
+            Config.LOG_FILE, maxBytes=Config.LOG_MAX_BYTES, backupCount=Config.LOG_BACKUP_COUNT, encoding='utf-8')
+        file_handler.setFormatter(JsonLineFormatter())
+
+        log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        _handler = NonBlockingQueueHandler(log_queue)
+        _handler.addFilter(PayloadSampler(Config.LOG_PAYLOAD_SAMPLE_RATE))
+
+        root = logging.getLogger()
+        root.setLevel(Config.LOG_LEVEL)
+        handlers = list(root.handlers)
+        for existing in handlers:
+            root.removeHandler(existing)
+        if Config.LOG_TO_CONSOLE and not handlers:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+            handlers.append(console_handler)
+        handlers.insert(0, file_handler)
+        root.addHandler(_handler)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def queued_file_logger(name: str, path: str) -> logging.Logger:
+    """A logger writing raw lines to its own rotating file, through the same non-blocking queue."""
+    with _configure_lock:
+        logger = logging.getLogger(name)
+        if logger.handlers:
+            return logger
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_handler = RotatingFileHandler(
+            path, maxBytes=Config.LOG_MAX_BYTES, backupCount=Config.LOG_BACKUP_COUNT, encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter('%(message)s'))
+
+        log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        logger.addHandler(NonBlockingQueueHandler(log_queue))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        listener = QueueListener(log_queue, file_handler)
+        listener.start()
+        atexit.register(listener.stop)
+        return logger
+
+
+def log_stats() -> dict:
+    if _handler is None:
+        return {'configured': False}
+    return {
+        'configured': True,
+        'queued': _handler.queue.qsize(),
+        'dropped': _handler.dropped
+    }
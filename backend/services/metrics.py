@@ -0,0 +1,249 @@
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+SIZE_BUCKETS = (10e3, 50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6, 16e6)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values, extra: tuple = ()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        unknown = set(labels) - set(self.labelnames)
+        if unknown:
+            raise ValueError(f"Unknown labels for {self.name}: {', '.join(sorted(unknown))}")
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class CallbackGauge(_Metric):
+    """Gauge read at scrape time; fn returns a number or {label value(s): number}."""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, fn, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def samples(self) -> list:
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = []
+        for key, value in sorted(values.items(), key=lambda item: str(item[0])):
+            if value is None:
+                continue
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][i] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> list:
+        with self._lock:
+            items = sorted((key, dict(entry, counts=list(entry['counts']))) for key, entry in self._values.items())
+        lines = []
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['counts']):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, (('le', _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry['sum'])}")
+            lines.append(f"{self.name}_count{labels} {entry['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = None) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def gauge_callback(self, name: str, documentation: str, fn, labelnames: tuple = ()) -> CallbackGauge:
+        return self._get_or_create(CallbackGauge, name, documentation, fn, labelnames)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:  # A broken callback must not take down the whole scrape
+                samples = []
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+_pools = {}
+_caches = {}
+_tracked_lock = threading.Lock()
+
+
+def track_executor(name: str, executor):
+    """Report a ThreadPoolExecutor's backlog as worker_pool_queue_depth{pool=name}."""
+    with _tracked_lock:
+        _pools[name] = executor
+
+
+def track_cache(name: str, stats_fn):
+    """Report a cache's hit ratio; stats_fn returns (hits, lookups)."""
+    with _tracked_lock:
+        _caches[name] = stats_fn
+
+
+def _pool_depths() -> dict:
+    with _tracked_lock:
+        pools = dict(_pools)
+    # _work_queue holds submitted tasks not yet picked up by a worker
+    return {name: executor._work_queue.qsize() for name, executor in pools.items()}
+
+
+def _cache_ratios() -> dict:
+    with _tracked_lock:
+        caches = dict(_caches)
+    ratios = {}
+    for name, stats_fn in caches.items():
+        hits, lookups = stats_fn()
+        ratios[name] = round(hits / lookups, 4) if lookups else None
+    return ratios
+
+
+metrics.gauge_callback('worker_pool_queue_depth', "Tasks waiting for a worker thread", _pool_depths, ('pool',))
+metrics.gauge_callback('cache_hit_ratio', "Share of cache lookups served from the cache", _cache_ratios, ('cache',))
+
+
+def init_metrics(app):
+    """Time every request per route and expose the registry at /metrics."""
+    from flask import request, g, Response  # type: ignore
+
+    request_latency = metrics.histogram(
+        'http_request_duration_seconds', "Request latency per route", ('endpoint', 'method', 'status'))
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_latency(response):
+        started = g.pop('metrics_started', None)
+        if started is not None and request.endpoint != 'metrics':
+            request_latency.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unmatched',
+                                    method=request.method, status=response.status_code)
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,31 @@
+from flask import jsonify # type: ignore
+from config import Config
+from services.resilience import CircuitOpenError
+from services.llm_governor import GovernorTimeout
+from services.llm_scheduler import TenantBudgetExceeded
+
+# Routes and services re-raise these past their generic `except Exception` so the app answers them
+OVERLOAD_ERRORS = (CircuitOpenError, GovernorTimeout, TenantBudgetExceeded)
+
+
+def _shed(error, status: int, retry_after: float):
+    response = jsonify({'error': str(error)})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(int(retry_after + 0.999), 1))
+    return response
+
+
+def init_overload_handlers(app):
+    """Answer load-shedding errors with 503/429 and a Retry-After header instead of a generic 500."""
+
+    @app.errorhandler(CircuitOpenError)
+    def circuit_open(error):
+        return _shed(error, 503, error.retry_after)
+
+    @app.errorhandler(GovernorTimeout)
+    def governor_timeout(error):
+        return _shed(error, 503, Config.LLM_QUEUE_RETRY_AFTER)
+
+    @app.errorhandler(TenantBudgetExceeded)
+    def tenant_budget_exceeded(error):
+        return _shed(error, 429, error.retry_after)
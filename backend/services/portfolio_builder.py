@@ -0,0 +1,269 @@
+import os
+import re
+import gzip
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime, timezone
+from config import Config
+from services.metrics import metrics
+
+try:
+    import brotli # type: ignore
+except ImportError:  # listed in requirements; where it cannot be installed, sites get gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_SITE_ID_PATTERN = re.compile(r'^[a-z0-9](?:[a-z0-9-]{0,62}[a-z0-9])?$')
+_STRING_OR_COMMENT = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*[\s\S]*?\*/')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_HTML_RAW_BLOCK = re.compile(r'<(pre|textarea|script|style)\b[\s\S]*?</\1\s*>', re.IGNORECASE)
+_HTML_COMMENT = re.compile(r'<!--(?!\[if)[\s\S]*?-->')
+
+# index.html keeps its name so the site URL stays stable; everything it links to is fingerprinted
+ASSETS = (('css', 'styles.css'), ('js', 'script.js'))
+MIN_COMPRESS_BYTES = 256
+
+_deploy_bytes = metrics.counter(
+    'portfolio_deploy_bytes_total', "Bytes written by portfolio deploys (unchanged files are skipped)", ('kind',))
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and insignificant whitespace, leaving strings untouched."""
+    parts = []
+    last = 0
+    for match in _STRING_OR_COMMENT.finditer(css):
+        parts.append(_minify_css_code(css[last:match.start()]))
+        parts.append(match.group(1) or '')
+        last = match.end()
+    parts.append(_minify_css_code(css[last:]))
+    return ''.join(parts).strip()
+
+
+def _minify_css_code(code: str) -> str:
+    code = re.sub(r'\s+', ' ', code)
+    code = _CSS_PUNCTUATION.sub(r'\1', code)
+    code = re.sub(r':\s+', ':', code)  # Only after colons: "a :hover" differs from "a:hover"
+    return code.replace(';}', '}')
+
+
+def minify_js(js: str) -> str:
+    """
+    Conservative: drop comment-only lines, block comments that start a line,
+    indentation and blank lines. Line breaks stay, so automatic semicolon
+    insertion behaves exactly as before.
+    """
+    lines, in_comment = [], False
+    for line in js.splitlines():
+        stripped = line.strip()
+        if in_comment:
+            if '*/' in stripped:
+                in_comment = False
+                stripped = stripped.split('*/', 1)[1].strip()
+            else:
+                continue
+        if stripped.startswith('/*'):
+            if '*/' not in stripped:
+                in_comment = True
+                continue
+            stripped = stripped.split('*/', 1)[1].strip()
+        if stripped and not stripped.startswith('//'):
+            lines.append(stripped)
+    return '\n'.join(lines)
+
+
+def minify_html(html: str) -> str:
+    """Drop comments and collapse whitespace outside pre, textarea, script and style."""
+    raw_blocks = []
+
+    def keep(match):
+        raw_blocks.append(match.group(0))
+        return f"\x00{len(raw_blocks) - 1}\x00"
+
+    html = _HTML_RAW_BLOCK.sub(keep, html)
+    html = _HTML_COMMENT.sub('', html)
+    html = re.sub(r'\s+', ' ', html)
+    html = re.sub(r'>\s+<', '> <', html).strip()
+    return re.sub(r'\x00(\d+)\x00', lambda m: raw_blocks[int(m.group(1))], html)
+
+
+def site_slug(name: str) -> str:
+    """A site id derived from a display name."""
+    slug = re.sub(r'[^a-z0-9]+', '-', (name or '').lower()).strip('-')[:63].rstrip('-')
+    return slug or 'portfolio'
+
+
+def _fingerprint(name: str, data: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def build_site(site: dict) -> dict:
+    """
+    Minify a rendered site and fingerprint its assets. Returns {path: bytes}
+    with index.html rewritten to reference the fingerprinted names.
+    """
+    files = {}
+    html = site.get('html') or ''
+    for key, name in ASSETS:
+        source = site.get(key) or ''
+        data = (minify_css(source) if key == 'css' else minify_js(source)).encode('utf-8')
+        hashed = _fingerprint(name, data)
+        files[hashed] = data
+        html = re.sub(r'(\b(?:href|src)=["\'])' + re.escape(name) + r'(["\'])', r'\g<1>' + hashed + r'\g<2>', html)
+    files['index.html'] = minify_html(html).encode('utf-8')
+    return files
+
+
+def _compressed(data: bytes) -> dict:
+    """Precompressed variants that are actually smaller than the original."""
+    if len(data) < MIN_COMPRESS_BYTES:
+        return {}
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+_ENCODING_SUFFIX = {'gzip': '.gz', 'br': '.br'}
+
+
+class SiteDeployer:
+    """
+    Deploys built sites to PORTFOLIO_DEPLOY_DIR/<site_id>/. A manifest records
+    every file's content hash, so a redeploy writes only files that changed.
+    index.html and the manifest are written last, and replaced assets are kept
+    for one more deploy, so a reader never sees a page pointing at missing files.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or Config.PORTFOLIO_DEPLOY_DIR
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._manifests = {}
+
+    def _lock(self, site_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(site_id, threading.Lock())
+
+    def site_dir(self, site_id: str) -> str:
+        if not site_id or not _SITE_ID_PATTERN.match(site_id):
+            raise ValueError("Invalid site id (lowercase letters, digits and dashes).")
+        return os.path.join(self.root, site_id)
+
+    def manifest(self, site_id: str) -> dict:
+        path = os.path.join(self.site_dir(site_id), 'manifest.json')
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._manifests.get(site_id)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        self._manifests[site_id] = (mtime, manifest)
+        return manifest
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _is_current(self, path: str, entry: dict, digest: str) -> bool:
+        return bool(entry) and entry['sha256'] == digest and all(
+            os.path.exists(path + suffix) for suffix in [''] + [_ENCODING_SUFFIX[e] for e in entry['encodings']])
+
+    def _remove(self, directory: str, name: str, entry: dict):
+        for suffix in [''] + [_ENCODING_SUFFIX[e] for e in entry['encodings']]:
+            try:
+                os.remove(os.path.join(directory, name + suffix))
+            except OSError:
+                pass
+
+    def deploy(self, site_id: str, files: dict) -> dict:
+        directory = self.site_dir(site_id)
+        with self._lock(site_id):
+            os.makedirs(directory, exist_ok=True)
+            manifest = self.manifest(site_id) or {}
+            previous = manifest.get('files', {})
+            entries, stats = {}, {'written': [], 'unchanged': [], 'removed': [], 'bytes_written': 0}
+
+            # Assets before index.html, so the new page never references a file not yet on disk
+            for name in sorted(files, key=lambda n: n == 'index.html'):
+                data = files[name]
+                digest = hashlib.sha256(data).hexdigest()
+                path = os.path.join(directory, name)
+                if self._is_current(path, previous.get(name), digest):
+                    entries[name] = previous[name]
+                    stats['unchanged'].append(name)
+                    continue
+
+                variants = _compressed(data)
+                self._write(path, data)
+                for encoding, body in variants.items():
+                    self._write(path + _ENCODING_SUFFIX[encoding], body)
+                written = len(data) + sum(len(body) for body in variants.values())
+                stats['written'].append(name)
+                stats['bytes_written'] += written
+                _deploy_bytes.inc(written, kind='written')
+                entries[name] = {
+                    'sha256': digest,
+                    'size': len(data),
+                    'encodings': sorted(variants),
+                    'compressed_sizes': {encoding: len(body) for encoding, body in variants.items()}
+                }
+
+            # Assets dropped by this deploy stay one more generation for pages already loading
+            retired = {name: entry for name, entry in previous.items() if name not in entries}
+            self._write(os.path.join(directory, 'manifest.json'), json.dumps({
+                'site_id': site_id,
+                'deployed_at': datetime.now(timezone.utc).isoformat(),
+                'files': entries,
+                'retired': retired
+            }, indent=2).encode('utf-8'))
+
+            for name, entry in manifest.get('retired', {}).items():
+                if name not in entries and name not in retired:
+                    self._remove(directory, name, entry)
+                    stats['removed'].append(name)
+            _deploy_bytes.inc(sum(entries[name]['size'] for name in stats['unchanged']), kind='skipped')
+        return stats
+
+    def resolve(self, site_id: str, filename: str, accept_encoding: str = '') -> tuple:
+        """
+        (path, content encoding or None, immutable) for a deployed file, picking
+        the best precompressed variant the client accepts. None when not deployed.
+        """
+        manifest = self.manifest(site_id)
+        entry = (manifest or {}).get('files', {}).get(filename)
+        if entry is None:
+            return None
+        accepted = {
+            token.split(';')[0].strip().lower()
+            for token in (accept_encoding or '').split(',')
+            if not re.search(r';\s*q=0(\.0*)?\s*$', token)
+        }
+        path = os.path.join(self.site_dir(site_id), filename)
+        encoding = next((e for e in ('br', 'gzip') if e in entry['encodings'] and e in accepted), None)
+        if encoding:
+            path += _ENCODING_SUFFIX[encoding]
+        return path, encoding, filename != 'index.html'
+
+
+_deployer = None
+_deployer_lock = threading.Lock()
+
+
+def get_site_deployer() -> SiteDeployer:
+    """Process-wide deployer, so per-site locks and manifests are shared."""
+    global _deployer
+    with _deployer_lock:
+        if _deployer is None:
+            _deployer = SiteDeployer()
+        return _deployer
@@ -0,0 +1,384 @@
+import os
+import re
+import copy
+import logging
+import threading
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape # type: ignore
+from config import Config
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SECTION_TITLES = {
+    'about': 'About Me',
+    'skills': 'Skills',
+    'projects': 'Projects',
+    'experience': 'Experience',
+    'contact': 'Contact'
+}
+
+THEMES = {
+    'classic': {
+        'layout': 'classic',
+        'palette': {
+            'primary': '#1f4e79',
+            'accent': '#e8913a',
+            'background': '#ffffff',
+            'surface': '#f3f5f8',
+            'text': '#1b1f24',
+            'muted': '#5b6470'
+        },
+        'fonts': {
+            'heading': "Georgia, 'Times New Roman', serif",
+            'body': "'Helvetica Neue', Arial, sans-serif"
+        },
+        'sections': ['about', 'skills', 'projects', 'experience', 'contact']
+    },
+    'minimal': {
+        'layout': 'minimal',
+        'palette': {
+            'primary': '#111111',
+            'accent': '#2f6fed',
+            'background': '#fcfcfc',
+            'surface': '#ececec',
+            'text': '#222222',
+            'muted': '#6b6b6b'
+        },
+        'fonts': {
+            'heading': "'Inter', system-ui, sans-serif",
+            'body': "'Inter', system-ui, sans-serif"
+        },
+        'sections': ['about', 'projects', 'experience', 'skills', 'contact']
+    }
+}
+DEFAULT_THEME = 'classic'
+
+_COLOR_PATTERN = re.compile(
+    r'^(#[0-9a-fA-F]{3,4}|#[0-9a-fA-F]{6}|#[0-9a-fA-F]{8}|[a-zA-Z]{3,20}'
+    r'|(rgb|rgba|hsl|hsla)\(\s*[0-9.%]+(\s*[,\s/]\s*[0-9.%]+){2,3}\s*\))$')
+_FONT_PATTERN = re.compile(r'^[A-Za-z0-9 ,\'"-]{1,200}$')
+CUSTOMIZATION_KEYS = {'theme', 'palette', 'fonts', 'sections', 'enable_sections', 'disable_sections', 'instructions'}
+
+_WEB_URL = re.compile(r'https?://[^\s/?#]+', re.IGNORECASE)
+_EMAIL = re.compile(r'(?:mailto:)?([^@\s:/?#]+@[^@\s:/?#]+)$', re.IGNORECASE)
+
+_render_seconds = metrics.histogram(
+    'portfolio_render_duration_seconds', "Local portfolio template rendering time", ('theme',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+
+
+def _as_list(value, separators: str = r'[,\n;]') -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in re.split(separators, value) if item.strip()]
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _text(value) -> str:
+    """Model copy is untrusted: anything that is not a string counts as missing."""
+    return value.strip() if isinstance(value, str) else ''
+
+
+def _url(value):
+    """An http(s) link, None for anything else (javascript:, data: and relative hrefs included)."""
+    text = _text(value)
+    return text if _WEB_URL.match(text) else None
+
+
+def _email(value):
+    """A bare address for the template's mailto: link, with any mailto: prefix removed."""
+    match = _EMAIL.match(_text(value))
+    return match.group(1) if match else None
+
+
+def _first_sentence(text: str, limit: int = 155) -> str:
+    text = re.sub(r'\s+', ' ', text or '').strip()
+    sentence = re.split(r'(?<=[.!?])\s', text, maxsplit=1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit - 1].rsplit(' ', 1)[0] + '…'
+
+
+def _count(value) -> int:
+    """A non-negative count from user data ("5", 5, 5.0), 0 for anything else."""
+    try:
+        return max(int(float(value)), 0)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def _projects(user_data: dict) -> list:
+    github = user_data.get('github') if isinstance(user_data.get('github'), dict) else {}
+    raw = user_data.get('projects') or user_data.get('repositories') or github.get('repositories') or []
+    projects = []
+    for project in _as_list(raw):
+        if isinstance(project, str):
+            project = {'name': project}
+        if not isinstance(project, dict) or not project.get('name'):
+            continue
+        projects.append({
+            'name': str(project['name']),
+            'description': project.get('description') or '',
+            'url': _url(project.get('url')) or _url(project.get('html_url')),
+            'language': project.get('language'),
+            'stars': _count(project.get('stars', project.get('stargazers_count')))
+        })
+    projects.sort(key=lambda p: p['stars'], reverse=True)
+    return projects[:Config.PORTFOLIO_MAX_PROJECTS]
+
+
+def _experience(value) -> list:
+    entries = []
+    for entry in _as_list(value, r'\n+'):
+        if isinstance(entry, dict):
+            entries.append({
+                'title': entry.get('title') or entry.get('role'),
+                'company': entry.get('company'),
+                'period': entry.get('period') or entry.get('dates'),
+                'summary': entry.get('summary') or entry.get('description') or ''
+            })
+        elif str(entry).strip():
+            entries.append({'title': None, 'company': None, 'period': None, 'summary': str(entry).strip()})
+    return entries
+
+
+def build_content(user_data: dict, copy_fields: dict = None) -> dict:
+    """
+    Merge the user's own data with the model-written copy into the content every
+    template renders from. Any copy field the model left out falls back to what
+    the user wrote, so a page can always be rendered.
+    """
+    if not isinstance(user_data, dict):
+        raise ValueError("User data must be an object.")
+    copy_fields = copy_fields if isinstance(copy_fields, dict) else {}
+
+    name = str(user_data.get('name') or '').strip() or 'Portfolio'
+    title = str(user_data.get('title') or '').strip()
+    about = _text(copy_fields.get('about')) or _text(user_data.get('about'))
+    skills = [str(skill) for skill in _as_list(user_data.get('skills'))]
+
+    projects = _projects(user_data)
+    blurbs = copy_fields.get('projects') if isinstance(copy_fields.get('projects'), dict) else {}
+    for project in projects:
+        project['blurb'] = _text(blurbs.get(project['name'])) or project.pop('description')
+        project.pop('description', None)
+
+    experience = _experience(user_data.get('experience'))
+    summaries = copy_fields.get('experience') if isinstance(copy_fields.get('experience'), list) else []
+    for entry, summary in zip(experience, summaries):
+        if _text(summary):
+            entry['summary'] = _text(summary)
+
+    contact = user_data.get('contact') if isinstance(user_data.get('contact'), dict) else {}
+    keywords = copy_fields.get('keywords') if isinstance(copy_fields.get('keywords'), list) else skills
+    return {
+        'name': name,
+        'title': title,
+        'headline': _text(copy_fields.get('headline')) or title,
+        'about': [p.strip() for p in re.split(r'\n\s*\n', about) if p.strip()],
+        'skills': skills,
+        'projects': projects,
+        'experience': experience,
+        'contact': {
+            'email': _email(contact.get('email')) or _email(user_data.get('email')),
+            'github': _url(contact.get('github')) or _url(user_data.get('github_url')),
+            'linkedin': _url(contact.get('linkedin')) or _url(user_data.get('linkedin_url')),
+            'website': _url(contact.get('website')) or _url(user_data.get('website'))
+        },
+        'meta': {
+            'description': _text(copy_fields.get('meta_description')) or _first_sentence(about) or f"{name} {title}".strip(),
+            'keywords': [str(keyword) for keyword in keywords][:12]
+        }
+    }
+
+
+def normalize_content(content) -> dict:
+    """
+    Content that came back from the client, rebuilt in the shapes the templates
+    expect. Fields of the wrong type, and links that are not http(s) or an email
+    address, are dropped rather than rendered.
+    """
+    if not isinstance(content, dict):
+        raise ValueError("Portfolio content must be an object.")
+
+    def optional(value):
+        return _text(value) or None
+
+    about = content.get('about')
+    about = ([_text(p) for p in about if _text(p)] if isinstance(about, list)
+             else [p.strip() for p in re.split(r'\n\s*\n', _text(about)) if p.strip()])
+    projects = [{
+        'name': _text(project.get('name')),
+        'blurb': _text(project.get('blurb')),
+        'url': _url(project.get('url')),
+        'language': optional(project.get('language')),
+        'stars': _count(project.get('stars'))
+    } for project in _as_list(content.get('projects')) if isinstance(project, dict) and _text(project.get('name'))]
+    experience = [
+        dict({key: optional(entry.get(key)) for key in ('title', 'company', 'period')},
+             summary=_text(entry.get('summary')))
+        for entry in _as_list(content.get('experience')) if isinstance(entry, dict)
+    ]
+    contact = content.get('contact') if isinstance(content.get('contact'), dict) else {}
+    meta = content.get('meta') if isinstance(content.get('meta'), dict) else {}
+    return {
+        'name': _text(content.get('name')) or 'Portfolio',
+        'title': _text(content.get('title')),
+        'headline': _text(content.get('headline')),
+        'about': about,
+        'skills': [str(skill) for skill in _as_list(content.get('skills')) if isinstance(skill, (str, int, float))],
+        'projects': projects,
+        'experience': experience,
+        'contact': dict({'email': _email(contact.get('email'))},
+                        **{key: _url(contact.get(key)) for key in ('github', 'linkedin', 'website')}),
+        'meta': {
+            'description': _text(meta.get('description')),
+            'keywords': [_text(k) for k in _as_list(meta.get('keywords')) if _text(k)][:12]
+        }
+    }
+
+
+def _reject(message: str, strict: bool):
+    if strict:
+        raise ValueError(message)
+    logger.warning("Ignoring customization: %s", message)
+
+
+def _section_list(value, strict: bool) -> list:
+    sections = []
+    for section in _as_list(value):
+        section = str(section).strip().lower()
+        if section not in SECTION_TITLES:
+            _reject(f"Unknown section '{section}'. Sections: {', '.join(SECTION_TITLES)}.", strict)
+        elif section not in sections:
+            sections.append(section)
+    return sections
+
+
+def apply_customization(design: dict, customization: dict, strict: bool = True) -> tuple:
+    """
+    Patch a design with structured options: theme, palette colors, fonts, section
+    order and enabling/disabling sections. Returns (new design, free-text
+    instructions left for the model). Invalid values raise ValueError when strict
+    and are skipped otherwise (for patches the model proposed).
+    """
+    if not isinstance(customization, dict):
+        raise ValueError("Customization must be an object or a free-text request.")
+    unknown = set(customization) - CUSTOMIZATION_KEYS
+    if unknown:
+        _reject(f"Unknown customization options: {', '.join(sorted(unknown))}.", strict)
+
+    if customization.get('theme'):
+        base = PortfolioRenderer.design(customization['theme'])
+        # Keep sections the user already chose; the new theme brings its own look
+        base['sections'] = design.get('sections', base['sections'])
+        design = base
+    else:
+        design = copy.deepcopy(design)
+
+    palette = customization.get('palette') or {}
+    if not isinstance(palette, dict):
+        _reject("Palette must map color roles to colors.", strict)
+        palette = {}
+    for role, color in palette.items():
+        if role not in design['palette']:
+            _reject(f"Unknown palette role '{role}'. Roles: {', '.join(design['palette'])}.", strict)
+        elif not isinstance(color, str) or not _COLOR_PATTERN.match(color.strip()):
+            _reject(f"Invalid color for '{role}': {color!r}.", strict)
+        else:
+            design['palette'][role] = color.strip()
+
+    fonts = customization.get('fonts') or {}
+    if isinstance(fonts, str):
+        fonts = {'heading': fonts, 'body': fonts}
+    if not isinstance(fonts, dict):
+        _reject("Fonts must be a font stack or map 'heading'/'body' to font stacks.", strict)
+        fonts = {}
+    for role, stack in fonts.items():
+        if role not in design['fonts']:
+            _reject(f"Unknown font role '{role}'. Roles: {', '.join(design['fonts'])}.", strict)
+        elif not isinstance(stack, str) or not _FONT_PATTERN.match(stack.strip()):
+            _reject(f"Invalid font stack for '{role}': {stack!r}.", strict)
+        else:
+            design['fonts'][role] = stack.strip()
+
+    if 'sections' in customization:
+        design['sections'] = _section_list(customization['sections'], strict)
+    for section in _section_list(customization.get('disable_sections'), strict):
+        if section in design['sections']:
+            design['sections'].remove(section)
+    for section in _section_list(customization.get('enable_sections'), strict):
+        if section not in design['sections']:
+            design['sections'].append(section)
+
+    instructions = customization.get('instructions')
+    return design, instructions.strip() if isinstance(instructions, str) else ''
+
+
+class PortfolioRenderer:
+    """
+    Renders portfolio sites from the Jinja2 templates in templates/portfolio.
+    Every template is compiled once when the renderer is created, and the
+    bytecode is cached on disk across restarts. Rendering makes no model calls
+    and the same content and design always produce the same files.
+    """
+
+    def __init__(self, template_dir: str = None, cache_dir: str = None):
+        cache_dir = cache_dir or Config.PORTFOLIO_TEMPLATE_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir or Config.PORTFOLIO_TEMPLATE_DIR),
+            autoescape=select_autoescape(['html']),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+            auto_reload=False,
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        self.templates = {name: self.env.get_template(name) for name in self.env.list_templates()}
+        logger.info("Compiled %d portfolio templates", len(self.templates))
+
+    @staticmethod
+    def design(theme: str = None) -> dict:
+        """A fresh copy of a theme's design (layout, palette, fonts, section order)."""
+        theme = theme or DEFAULT_THEME
+        if theme not in THEMES:
+            raise ValueError(f"Unknown theme '{theme}'. Available themes: {', '.join(THEMES)}.")
+        return copy.deepcopy(THEMES[theme])
+
+    @staticmethod
+    def _has_content(content: dict, section: str) -> bool:
+        value = content.get(section)
+        return any(value.values()) if isinstance(value, dict) else bool(value)
+
+    def render(self, content: dict, design: dict) -> dict:
+        """Render the site's HTML, CSS, JS and meta tags."""
+        context = {
+            'content': content,
+            'layout': design['layout'],
+            'palette': design['palette'],
+            'fonts': design['fonts'],
+            'sections': [s for s in design['sections'] if s in SECTION_TITLES and self._has_content(content, s)],
+            'section_titles': SECTION_TITLES
+        }
+        with _render_seconds.time(theme=design['layout']):
+            return {
+                'html': self.templates[f"{design['layout']}.html"].render(context),
+                'css': self.templates['styles.css'].render(context),
+                'js': self.templates['script.js'].render(context),
+                'meta': self.templates['meta.html'].render(context)
+            }
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_portfolio_renderer() -> PortfolioRenderer:
+    """Process-wide renderer, so templates are compiled once."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = PortfolioRenderer()
+        return _renderer
@@ -1,219 +1,259 @@
-import openai
 from config import Config
-from github import Github
-import json
-import os
+import logging
 from dotenv import load_dotenv
+from services.llm_client import LLMClient
+from services.overload import OVERLOAD_ERRORS
+from services.prompt_builder import PromptBuilder
+from services.github_client import GitHubClient
+from services.portfolio_renderer import (
+    get_portfolio_renderer, build_content, normalize_content, apply_customization, DEFAULT_THEME, THEMES,
+    SECTION_TITLES
+)
+from services.portfolio_builder import build_site, get_site_deployer, site_slug
+from services.structured_output import parse_structured, StructuredOutputError
+from services.repo_stats import RepoStatsAggregator
+from services.tracing import span
 
 load_dotenv()
 
-openai.api_key = Config.OPENAI_API_KEY
-github = Github(Config.GITHUB_API_KEY)
+logger = logging.getLogger(__name__)
 
 class PortfolioService:
     def __init__(self):
         self.model = Config.OPENAI_MODEL
         self.temperature = Config.OPENAI_TEMPERATURE
-        self.github_token = os.getenv('GITHUB_TOKEN')
-        self.github_client = Github(self.github_token) if self.github_token else None
-
-    def generate_portfolio(self, user_data):
-        """Generate a portfolio website based on user data"""
-        prompt = f"""
-        Create a complete portfolio website structure for this user:
-        {json.dumps(user_data, indent=2)}
-        
-        Generate:
-        1. HTML structure
-        2. CSS styling
-        3. JavaScript functionality
-        4. Responsive design
-        5. SEO optimization
-        
-        Include sections for:
-        - Hero/Introduction
-        - About Me
-        - Skills
-        - Projects
-        - Experience
-        - Contact
+        self.llm = LLMClient('openai', model=self.model, temperature=self.temperature)
+        self.github_token = Config.GITHUB_TOKEN
+        # Unauthenticated calls work too, with GitHub's lower rate limit
+        self.github_client = GitHubClient(self.github_token)
+        self.renderer = get_portfolio_renderer()
+        self.deployer = get_site_deployer()
+
+    def generate_portfolio(self, user_data, theme=None):
         """
-        
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are an expert web developer and portfolio designer."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=self.temperature
+        Generate a portfolio website: the model writes only the copy, as structured
+        fields, and the site is rendered locally from precompiled templates
+        """
+        design = self.renderer.design(theme)
+        with span('portfolio.generate', theme=design['layout']):
+            copy_fields = self._generate_copy(user_data)
+            content = build_content(user_data, copy_fields)
+            site = self.renderer.render(content, design)
+
+        return dict(site, theme=theme or DEFAULT_THEME, design=design, content=content)
+
+    def _generate_copy(self, user_data):
+        """Ask the model for the site's copy as JSON; missing fields fall back to the user's text"""
+        if not isinstance(user_data, dict):
+            raise ValueError("User data must be an object.")
+        projects = [
+            {'name': p['name'], 'description': p['blurb'], 'language': p['language']}
+            for p in build_content(user_data)['projects']
+        ]
+        prompt = PromptBuilder('portfolio.generate_portfolio').build("""
+        Write the copy for a personal portfolio website.
+        Name: {name}
+        Title: {title}
+        About (their own words): {about}
+        Skills: {skills}
+        Experience: {experience}
+        Projects: {projects}
+
+        Respond with JSON only:
+        {{
+            "headline": "one-line value proposition",
+            "about": "2 short paragraphs in first person, separated by a blank line",
+            "projects": {{"<project name>": "one or two sentence blurb"}},
+            "experience": ["one-sentence summary per experience entry, same order"],
+            "meta_description": "SEO description under 155 characters",
+            "keywords": ["up to 10 SEO keywords"]
+        }}
+        """, name=user_data.get('name', ''), title=user_data.get('title', ''),
+            about=user_data.get('about', ''), skills=user_data.get('skills', ''),
+            experience=user_data.get('experience', ''), projects=projects)
+
+        content = self.llm.chat(
+            prompt,
+            system="You are a copywriter for developer portfolios. Reply with JSON only.",
+            endpoint='portfolio.generate_portfolio',
+            max_tokens=Config.PORTFOLIO_COPY_MAX_TOKENS
         )
-        
-        return {
-            "html": self._extract_html(response.choices[0].message.content),
-            "css": self._extract_css(response.choices[0].message.content),
-            "js": self._extract_js(response.choices[0].message.content),
-            "meta": self._generate_meta_tags(user_data)
-        }
+        try:
+            return parse_structured(content)
+        except StructuredOutputError as e:
+            logger.warning("Portfolio copy was not valid JSON (%s); using the user's own text", str(e))
+            return {}
 
-    def analyze_github(self, username):
+    def analyze_github(self, username, include_stats=True):
         """
         Analyzes a GitHub profile and returns relevant information
         """
         try:
-            if not self.github_client:
-                raise Exception("GitHub token not configured")
-
-            user = self.github_client.get_user(username)
-            
-            # Get user's repositories
-            repos = []
-            for repo in user.get_repos():
-                if not repo.fork:  # Only include non-forked repositories
-                    repos.append({
-                        'name': repo.name,
-                        'description': repo.description,
-                        'language': repo.language,
-                        'stars': repo.stargazers_count,
-                        'url': repo.html_url
-                    })
-
-            # Get user's contributions
-            contributions = {
-                'public_repos': user.public_repos,
-                'public_gists': user.public_gists,
-                'followers': user.followers,
-                'following': user.following
-            }
-
-            return {
-                'user': {
-                    'name': user.name,
-                    'bio': user.bio,
-                    'location': user.location,
-                    'company': user.company,
-                    'blog': user.blog,
-                    'email': user.email,
-                    'hireable': user.hireable
-                },
-                'repositories': repos,
-                'contributions': contributions
-            }
+            with span('github.analyze', username=username) as current:
+                profile = self._fetch_github_profile(username)
+                profile['primary_languages'] = self._extract_languages(profile['repositories'])
+                if include_stats:
+                    # Language bytes and commit activity per repo, merged; partial past the deadline
+                    profile['statistics'] = RepoStatsAggregator(self.github_client).aggregate(
+                        username, profile['repositories'])
+                current.set(repositories=len(profile['repositories']))
+            return profile
+        except OVERLOAD_ERRORS:
+            raise
         except Exception as e:
             raise Exception(f"Failed to analyze GitHub profile: {str(e)}")
 
-    def customize_portfolio(self, portfolio_data, customization):
-        """Customize the portfolio website based on user preferences"""
-        prompt = f"""
-        Customize this portfolio website:
-        Portfolio Data: {json.dumps(portfolio_data, indent=2)}
-        Customization Options: {json.dumps(customization, indent=2)}
-        
-        Apply the following customizations:
-        1. Color scheme
-        2. Layout
-        3. Typography
-        4. Animations
-        5. Additional sections
-        """
-        
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are an expert web designer."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=self.temperature
-        )
+    def _fetch_github_profile(self, username):
+        """Fetch a GitHub user's profile and repositories"""
+        user = self.github_client.get_user(username)
         
+        # Get user's repositories (all pages at once, revalidated against the cache)
+        repos = []
+        for repo in self.github_client.list_repos(username, expected=user.get('public_repos')):
+            if not repo.get('fork'):  # Only include non-forked repositories
+                repos.append({
+                    'name': repo.get('name'),
+                    'description': repo.get('description'),
+                    'language': repo.get('language'),
+                    'stars': repo.get('stargazers_count', 0),
+                    'url': repo.get('html_url')
+                })
+
+        # Get user's contributions
+        contributions = {
+            'public_repos': user.get('public_repos'),
+            'public_gists': user.get('public_gists'),
+            'followers': user.get('followers'),
+            'following': user.get('following')
+        }
+
         return {
-            "html": self._extract_html(response.choices[0].message.content),
-            "css": self._extract_css(response.choices[0].message.content),
-            "js": self._extract_js(response.choices[0].message.content)
+            'user': {
+                'name': user.get('name'),
+                'bio': user.get('bio'),
+                'location': user.get('location'),
+                'company': user.get('company'),
+                'blog': user.get('blog'),
+                'email': user.get('email'),
+                'hireable': user.get('hireable')
+            },
+            'repositories': repos,
+            'contributions': contributions
         }
 
-    def deploy_portfolio(self, portfolio_id):
+    def customize_portfolio(self, portfolio_data, customization):
         """
-        Deploys the generated portfolio to a hosting service
+        Customize the portfolio website. Structured options (theme, palette, fonts,
+        sections) are applied locally as a patch to the design and the site is
+        re-rendered; only free-text requests go to the model, which answers with
+        the same kind of patch
+        """
+        if not isinstance(portfolio_data, dict):
+            raise ValueError("Portfolio data must be an object.")
+        if isinstance(customization, str):
+            customization = {'instructions': customization}
+
+        # Portfolios from generate_portfolio carry their content and design; older ones are rebuilt
+        content = portfolio_data.get('content')
+        content = normalize_content(content) if content else build_content(portfolio_data)
+        design = self.renderer.design(portfolio_data.get('theme'))
+        previous = portfolio_data.get('design')
+        if isinstance(previous, dict):
+            # The design comes back from the client, so it is validated like any other patch
+            design, _ = apply_customization(
+                design, {key: previous[key] for key in ('palette', 'fonts', 'sections') if key in previous})
+        with span('portfolio.customize') as current:
+            design, instructions = apply_customization(design, customization)
+            source = 'local'
+            if instructions:
+                design, content = self._interpret_customization(instructions, design, content)
+                source = 'llm'
+            site = self.renderer.render(content, design)
+            current.set(source=source)
+
+        return dict(site, theme=design['layout'], design=design, content=content, source=source)
+
+    def _interpret_customization(self, instructions, design, content):
+        """Turn a free-text request into a design patch and copy edits, then apply them"""
+        prompt = PromptBuilder('portfolio.customize_portfolio').build("""
+        A user wants to change their portfolio website: {instructions}
+
+        Current design: {design}
+        Current copy: headline "{headline}"; about "{about}"
+        Available themes: {themes}. Sections: {sections}.
+
+        Respond with JSON only, including just the keys that should change:
+        {{
+            "theme": "theme name",
+            "palette": {{"primary|accent|background|surface|text|muted": "#hex color"}},
+            "fonts": {{"heading|body": "CSS font stack"}},
+            "sections": ["sections in display order; omitted ones are hidden"],
+            "headline": "rewritten headline",
+            "about": "rewritten about text, paragraphs separated by a blank line"
+        }}
+        """, instructions=instructions, design=design, headline=content.get('headline', ''),
+            about=' '.join(content.get('about') or []), themes=', '.join(THEMES),
+            sections=', '.join(SECTION_TITLES))
+
+        response_text = self.llm.chat(
+            prompt,
+            system="You are an expert web designer. Reply with JSON only.",
+            endpoint='portfolio.customize_portfolio',
+            max_tokens=Config.PORTFOLIO_COPY_MAX_TOKENS,
+            temperature=0.3
+        )
+        try:
+            patch = parse_structured(response_text)
+        except StructuredOutputError as e:
+            raise ValueError(f"Could not interpret the customization request: {str(e)}")
+
+        content = dict(content)
+        if isinstance(patch.get('headline'), str) and patch['headline'].strip():
+            content['headline'] = patch['headline'].strip()
+        if isinstance(patch.get('about'), str) and patch['about'].strip():
+            content['about'] = [p.strip() for p in patch['about'].split('\n\n') if p.strip()]
+        design_patch = {key: patch[key] for key in ('theme', 'palette', 'fonts', 'sections') if patch.get(key)}
+        if design_patch.get('theme') not in (None, *THEMES):
+            design_patch.pop('theme')
+        design, _ = apply_customization(design, design_patch, strict=False)
+        return design, content
+
+    def deploy_portfolio(self, portfolio_data, site_id=None):
+        """
+        Builds the portfolio (minified, fingerprinted, precompressed) and deploys
+        it to the local sites directory; a redeploy only writes files that changed
         """
         try:
-            # Here you would implement the deployment logic
-            # This could involve:
-            # 1. Setting up hosting (e.g., GitHub Pages, Netlify, Vercel)
-            # 2. Uploading files
-            # 3. Configuring domain settings
-            
+            if not isinstance(portfolio_data, dict):
+                raise ValueError("Portfolio data must be an object.")
+            site = portfolio_data
+            content = normalize_content(portfolio_data['content']) if portfolio_data.get('content') else None
+            if not site.get('html'):
+                if content is None:
+                    raise ValueError("Portfolio data must include the rendered site or its content.")
+                site = self.renderer.render(content, self.renderer.design(portfolio_data.get('theme')))
+            site_id = site_id or portfolio_data.get('site_id') or site_slug(
+                (content or {}).get('name') or str(portfolio_data.get('name') or ''))
+
+            with span('portfolio.deploy', site_id=site_id) as current:
+                files = build_site(site)
+                stats = self.deployer.deploy(site_id, files)
+                current.set(written=len(stats['written']), unchanged=len(stats['unchanged']))
+
+            url = f"{Config.PORTFOLIO_SITE_BASE_URL.rstrip('/')}/{site_id}/"
             return {
                 'status': 'success',
                 'message': 'Portfolio deployed successfully',
-                'deployed_url': 'https://your-portfolio-url.com'
+                'site_id': site_id,
+                'url': url,
+                'deployed_url': url,
+                **stats
             }
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to deploy portfolio: {str(e)}")
 
-    def _extract_html(self, content):
-        """Extract HTML code from the response"""
-        # In a real implementation, this would parse the content properly
-        return f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Portfolio</title>
-        </head>
-        <body>
-            {content}
-        </body>
-        </html>
-        """
-
-    def _extract_css(self, content):
-        """Extract CSS code from the response"""
-        # In a real implementation, this would parse the content properly
-        return """
-        /* Portfolio Styles */
-        body {
-            font-family: 'Arial', sans-serif;
-            line-height: 1.6;
-            margin: 0;
-            padding: 0;
-        }
-        """
-
-    def _extract_js(self, content):
-        """Extract JavaScript code from the response"""
-        # In a real implementation, this would parse the content properly
-        return """
-        // Portfolio JavaScript
-        document.addEventListener('DOMContentLoaded', () => {
-            // Initialize portfolio functionality
-        });
-        """
-
-    def _generate_meta_tags(self, user_data):
-        """Generate SEO meta tags for the portfolio"""
-        prompt = f"""
-        Generate SEO meta tags for this portfolio:
-        {json.dumps(user_data, indent=2)}
-        
-        Include:
-        1. Title
-        2. Description
-        3. Keywords
-        4. Open Graph tags
-        """
-        
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are an SEO expert."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
-        
-        return response.choices[0].message.content
-
     def _extract_languages(self, repo_data):
         """Extract programming languages from repository data"""
         languages = {}
@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread: a background thread snapshots the
+    target's stack every interval and counts identical stacks. Nothing is
+    hooked into the interpreter, so code outside a profiled request pays nothing.
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval or Config.PROFILE_INTERVAL
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stacks = Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None and not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+            self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self._stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl, speedscope and inferno."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def top(self, limit: int = 15) -> list:
+        """Functions by share of samples where they were on top of the stack."""
+        leaf = Counter()
+        for stack, count in self._stacks.items():
+            leaf[stack.rsplit(';', 1)[-1]] += count
+        total = self.samples or 1
+        return [{'function': name, 'samples': count, 'share': round(count / total, 3)}
+                for name, count in leaf.most_common(limit)]
+
+
+class ProfileStore:
+    """Keeps the most recent profiles on disk as .folded stacks plus a JSON summary."""
+
+    def __init__(self, directory: str = None, max_profiles: int = None):
+        self.directory = directory or Config.PROFILE_DIR
+        self.max_profiles = max_profiles or Config.PROFILE_MAX_STORED
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        if not profile_id or not all(c in '0123456789abcdef' for c in profile_id):
+            raise ValueError("Invalid profile id.")
+        return os.path.join(self.directory, f"{profile_id}{suffix}")
+
+    def save(self, profiler: SamplingProfiler, meta: dict) -> dict:
+        profile_id = uuid.uuid4().hex
+        summary = dict(meta, id=profile_id, samples=profiler.samples,
+                       duration_ms=round(profiler.duration * 1000, 1),
+                       interval_ms=round(profiler.interval * 1000, 2),
+                       created_at=datetime.now(timezone.utc).isoformat(), top=profiler.top())
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(profile_id, '.folded'), 'w', encoding='utf-8') as f:
+                f.write(profiler.collapsed())
+            with open(self._path(profile_id, '.json'), 'w', encoding='utf-8') as f:
+                json.dump(summary, f)
+            self._prune()
+        return summary
+
+    def _prune(self):
+        summaries = sorted(
+            (name for name in os.listdir(self.directory) if name.endswith('.json')),
+            key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+        for name in summaries[:max(len(summaries) - self.max_profiles, 0)]:
+            profile_id = name[:-len('.json')]
+            for suffix in ('.json', '.folded'):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except OSError:
+                    pass
+
+    def list(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    summary = json.load(f)
+                summary.pop('top', None)
+                summaries.append(summary)
+        return sorted(summaries, key=lambda s: s['created_at'], reverse=True)
+
+    def get(self, profile_id: str) -> dict:
+        try:
+            with open(self._path(profile_id, '.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def folded(self, profile_id: str) -> str:
+        try:
+            with open(self._path(profile_id, '.folded'), encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+profile_store = ProfileStore()
+
+
+def init_profiling(app):
+    """
+    Profile a request when it sends X-Profile with the admin token, or when it is
+    picked by PROFILE_SAMPLE_RATE. X-Profile: inline returns the collapsed stacks
+    instead of the response; otherwise the profile id is returned in X-Profile-Id.
+    """
+    from flask import request, g, Response  # type: ignore
+    from services.admin_auth import is_admin_request
+
+    @app.before_request
+    def start_profiler():
+        requested = request.headers.get(Config.PROFILE_HEADER)
+        if requested and is_admin_request():
+            g.profile_mode = requested.lower()
+        elif Config.PROFILE_SAMPLE_RATE and random.random() < Config.PROFILE_SAMPLE_RATE:
+            g.profile_mode = 'sampled'
+        else:
+            return
+        g.profiler = SamplingProfiler().start()
+
+    @app.after_request
+    def finish_profiler(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        try:
+            summary = profile_store.save(profiler, {
+                'endpoint': request.endpoint, 'method': request.method,
+                'path': request.path, 'status': response.status_code, 'mode': g.profile_mode})
+        except OSError as e:
+            logger.error("Could not store request profile: %s", str(e))
+            return response
+        if g.profile_mode == 'inline':
+            return Response(profiler.collapsed(), content_type='text/plain; charset=utf-8',
+                            headers={'X-Profile-Id': summary['id']})
+        response.headers['X-Profile-Id'] = summary['id']
+        return response
+
+    @app.teardown_request
+    def stop_profiler(error=None):
+        # after_request is skipped on unhandled errors; never leave a sampler running
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
@@ -0,0 +1,118 @@
+import re
+import json
+import math
+import string
+import textwrap
+from config import Config
+
+try:
+    import tiktoken # type: ignore
+except ImportError:  # tiktoken is optional, fall back to a local estimate
+    tiktoken = None
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SEGMENT_PATTERN = re.compile(r"[^\n.!?]*(?:[.!?]+|\n+|$)")
+_TRUNCATION_MARKER = "\n[...]\n"
+_encoding = None
+
+
+def compact_json(data) -> str:
+    """Serialize data as JSON without indentation or padding."""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def compact_text(text: str) -> str:
+    """Strip indentation and redundant whitespace from prompt text."""
+    text = textwrap.dedent(text or "")
+    lines = [' '.join(line.split()) for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", '\n'.join(lines))
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally, using tiktoken when it is installed."""
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    # BPE vocabularies keep short words whole and split long ones into ~4 char pieces
+    return sum(math.ceil(len(word) / 4) for word in _WORD_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, head_ratio: float = 0.7) -> str:
+    """Trim text to a token budget, keeping the start and end at sentence boundaries."""
+    if not text or count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    segments = [s for s in _SEGMENT_PATTERN.findall(text) if s]
+    costs = [count_tokens(s) for s in segments]
+    available = max_tokens - count_tokens(_TRUNCATION_MARKER)
+    head_budget = int(available * head_ratio)
+
+    head, used = 0, 0
+    while head < len(segments) and used + costs[head] <= head_budget:
+        used += costs[head]
+        head += 1
+
+    tail = len(segments)
+    while tail > head and used + costs[tail - 1] <= available:
+        tail -= 1
+        used += costs[tail]
+
+    if head == 0 and tail == len(segments):
+        # A single oversized sentence: fall back to a hard character cut
+        return text[:max(available, 0) * 4].rstrip() + _TRUNCATION_MARKER.rstrip()
+
+    return (''.join(segments[:head]).rstrip()
+            + _TRUNCATION_MARKER
+            + ''.join(segments[tail:]).lstrip())
+
+
+class PromptBuilder:
+    """Builds compact prompts that fit a per-endpoint token budget."""
+
+    def __init__(self, endpoint: str = None, budget: int = None):
+        self.endpoint = endpoint
+        self.budget = budget or Config.PROMPT_TOKEN_BUDGETS.get(
+            endpoint, Config.PROMPT_TOKEN_BUDGET_DEFAULT)
+
+    @staticmethod
+    def _values(fields: dict) -> dict:
+        return {
+            name: compact_json(value) if isinstance(value, (dict, list)) else compact_text(str(value))
+            for name, value in fields.items()
+        }
+
+    def fixed_tokens(self, template: str, **fields) -> int:
+        """Tokens of the template with the given fields filled in and every other field left empty."""
+        template = compact_text(template)
+        values = dict.fromkeys((name for _, name, _, _ in string.Formatter().parse(template) if name), '')
+        values.update(self._values(fields))
+        return count_tokens(template.format(**values))
+
+    def build(self, template: str, **fields) -> str:
+        """Fill a str.format template, trimming the largest fields to fit the budget."""
+        template = compact_text(template)
+        values = self._values(fields)
+
+        placeholders = {name for _, name, _, _ in string.Formatter().parse(template) if name}
+        fixed_tokens = count_tokens(template.format(**{name: "" for name in placeholders}))
+        remaining = self.budget - fixed_tokens
+        sizes = {name: count_tokens(values[name]) for name in placeholders}
+
+        if sum(sizes.values()) > remaining:
+            # Water-filling: small fields stay whole, large ones share what is left
+            pending = sorted(placeholders, key=sizes.get)
+            while pending:
+                share = max(remaining, 0) // len(pending)
+                name = pending.pop(0)
+                if sizes[name] > share:
+                    values[name] = truncate_to_tokens(values[name], share)
+                    sizes[name] = share
+                remaining -= sizes[name]
+
+        return template.format(**values)
@@ -0,0 +1,184 @@
+import os
+import re
+import json
+import uuid
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from config import Config
+from services.metrics import track_cache
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    """Word n-gram shingles of normalized text."""
+    words = re.sub(r'[^\w\s]', ' ', (text or '').lower()).split()
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash32(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+class MinHasher:
+    """MinHash signatures from universal hash permutations (a * x + b) mod p."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> list:
+        hashes = [_hash32(s) for s in _shingles(text)]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        ]
+
+    @staticmethod
+    def similarity(sig_a: list, sig_b: list) -> float:
+        """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def _band_layout(num_perm: int, threshold: float) -> tuple:
+    """Pick (bands, rows) so the LSH candidate threshold sits a little below the similarity threshold."""
+    best = (num_perm, 1)
+    for rows in (1, 2, 4, 8, 16, 32):
+        bands = num_perm // rows
+        if bands and (1.0 / bands) ** (1.0 / rows) <= max(threshold - 0.1, 0.05):
+            best = (bands, rows)
+    return best
+
+
+class QuestionBank:
+    """
+    Stores generated interview questions keyed by a MinHash signature of the job
+    description and the difficulty, and serves near-duplicate job descriptions
+    from the bank via LSH lookups.
+    """
+
+    def __init__(self, path: str = None, threshold: float = None, num_perm: int = 128):
+        self.path = path or Config.QUESTION_BANK_PATH
+        self.threshold = Config.QUESTION_BANK_SIMILARITY if threshold is None else threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = _band_layout(num_perm, self.threshold)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._buckets = {}
+        self._stats = {'lookups': 0, 'hits': 0, 'misses': 0, 'top_ups': 0}
+        self._load()
+
+    def _band_keys(self, difficulty: str, signature: list):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            yield (difficulty, band, hash(tuple(chunk)))
+
+    def _index(self, entry: dict):
+        self._entries[entry['id']] = entry
+        for key in self._band_keys(entry['difficulty'], entry['signature']):
+            self._buckets.setdefault(key, set()).add(entry['id'])
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    # Later lines for the same id carry the merged question list
+                    self._index(entry)
+
+    def _append(self, entry: dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def _best_match(self, difficulty: str, signature: list):
+        candidates = set()
+        for key in self._band_keys(difficulty, signature):
+            candidates |= self._buckets.get(key, set())
+        best, best_similarity = None, 0.0
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            similarity = MinHasher.similarity(signature, entry['signature'])
+            if similarity >= self.threshold and similarity > best_similarity:
+                best, best_similarity = entry, similarity
+        return best, best_similarity
+
+    def lookup(self, job_description: str, difficulty: str):
+        """Return (questions, similarity) for the closest stored job description, or None."""
+        signature = self.hasher.signature(job_description)
+        with self._lock:
+            self._stats['lookups'] += 1
+            entry, similarity = self._best_match(difficulty, signature)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            return list(entry['questions']), similarity
+
+    def store(self, job_description: str, difficulty: str, questions: list, top_up: bool = False):
+        """Add questions, merging them into the entry of a near-identical job description."""
+        signature = self.hasher.signature(job_description)
+        with self._lock:
+            if top_up:
+                self._stats['top_ups'] += 1
+            entry, _ = self._best_match(difficulty, signature)
+            if entry is None:
+                entry = {
+                    'id': uuid.uuid4().hex,
+                    'difficulty': difficulty,
+                    'signature': signature,
+                    'questions': [],
+                    'job_excerpt': ' '.join((job_description or '').split())[:200],
+                    'created_at': datetime.now(timezone.utc).isoformat()
+                }
+            merged = list(dict.fromkeys(entry['questions'] + [q for q in questions if q]))
+            if merged == entry['questions'] and entry['id'] in self._entries:
+                return
+            entry = dict(entry, questions=merged)
+            self._index(entry)
+            try:
+                self._append(entry)
+            except OSError as e:
+                logger.error("Could not persist question bank entry: %s", str(e))
+
+    def hit_counts(self) -> tuple:
+        with self._lock:
+            return self._stats['hits'], self._stats['lookups']
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        stats['hit_rate'] = round(stats['hits'] / stats['lookups'], 4) if stats['lookups'] else 0.0
+        stats['similarity_threshold'] = self.threshold
+        return stats
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """Process-wide question bank shared by every InterviewService."""
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            _bank = QuestionBank()
+            track_cache('question_bank', _bank.hit_counts)
+        return _bank
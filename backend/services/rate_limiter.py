@@ -0,0 +1,113 @@
+import re
+import time
+import logging
+import threading
+from flask import request, jsonify # type: ignore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+_RATE_PATTERN = re.compile(r"^\s*(\d+)\s*(?:per|/)\s*(second|minute|hour|day)s?\s*$", re.IGNORECASE)
+
+
+def parse_rate(rate: str) -> tuple:
+    """Parse a limit such as '100 per minute' into (requests, period_seconds)."""
+    match = _RATE_PATTERN.match(rate or "")
+    if not match:
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+    return int(match.group(1)), _PERIODS[match.group(2).lower()]
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to capacity tokens, refilled continuously."""
+
+    __slots__ = ('capacity', 'refill_rate', 'tokens', 'updated_at')
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def consume(self, now: float) -> float:
+        """Take one token; returns 0 on success, otherwise seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.refill_rate
+
+
+class RateLimiter:
+    """In-memory token-bucket limiter keyed by client and endpoint."""
+
+    def __init__(self, default_limit: str = None, endpoint_limits: dict = None, idle_ttl: float = 3600):
+        self.default_limit = parse_rate(default_limit or Config.RATELIMIT_DEFAULT)
+        self.endpoint_limits = {
+            endpoint: parse_rate(limit)
+            for endpoint, limit in (endpoint_limits or Config.RATELIMIT_ENDPOINT_LIMITS).items()
+        }
+        self.idle_ttl = idle_ttl
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def limit_for(self, endpoint: str) -> tuple:
+        return self.endpoint_limits.get(endpoint, self.default_limit)
+
+    def hit(self, client: str, endpoint: str) -> tuple:
+        """Record a request; returns (retry_after_seconds, remaining_tokens, limit)."""
+        limit, period = self.limit_for(endpoint)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get((client, endpoint))
+            if bucket is None:
+                bucket = self._buckets[(client, endpoint)] = TokenBucket(limit, period)
+            retry_after = bucket.consume(now)
+            remaining = int(bucket.tokens)
+            if now - self._last_sweep > self.idle_ttl:
+                self._sweep(now)
+        return retry_after, remaining, limit
+
+    def _sweep(self, now: float):
+        """Drop buckets that have been idle long enough to be full again."""
+        self._last_sweep = now
+        stale = [key for key, bucket in self._buckets.items() if now - bucket.updated_at > self.idle_ttl]
+        for key in stale:
+            del self._buckets[key]
+
+
+def _client_id() -> str:
+    # Behind a proxy, wrap the app in werkzeug's ProxyFix so remote_addr is the real client
+    return request.remote_addr or 'unknown'
+
+
+def init_rate_limiting(app):
+    """Enforce Config.RATELIMIT_* on every request of the Flask app."""
+    if not Config.RATELIMIT_ENABLED:
+        return None
+    if not Config.RATELIMIT_STORAGE_URL.startswith('memory://'):
+        logger.warning("Rate limit storage %s is not supported, using in-memory buckets",
+                       Config.RATELIMIT_STORAGE_URL)
+
+    limiter = RateLimiter()
+    exempt = set(Config.RATELIMIT_EXEMPT)
+
+    @app.before_request
+    def enforce_rate_limit():
+        if request.method == 'OPTIONS' or request.endpoint in exempt:
+            return None
+        retry_after, remaining, limit = limiter.hit(_client_id(), request.endpoint or request.path)
+        if retry_after > 0:
+            response = jsonify({'error': 'Rate limit exceeded. Please try again later.'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(max(int(retry_after + 0.999), 1))
+            response.headers['X-RateLimit-Limit'] = str(limit)
+            response.headers['X-RateLimit-Remaining'] = '0'
+            return response
+        return None
+
+    app.extensions['rate_limiter'] = limiter
+    return limiter
@@ -0,0 +1,136 @@
+import time
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
+from config import Config
+from services.metrics import metrics, track_executor
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=Config.GITHUB_STATS_WORKERS, thread_name_prefix='github-stats')
+track_executor('github-stats', _executor)
+
+_lookups_total = metrics.counter(
+    'github_repo_stats_total', "Per-repository statistics lookups by outcome", ('kind', 'outcome'))
+
+WEEKS = 52
+
+
+class RepoStatsAggregator:
+    """
+    Collects language bytes and weekly commit counts for many repositories at
+    once on a bounded pool and merges them into totals. Whatever has not arrived
+    by the deadline is left out and reported in coverage, so one slow repository
+    never holds up the analysis.
+    """
+
+    def __init__(self, github_client, deadline: float = None, max_repos: int = None):
+        self.github = github_client
+        self.deadline = deadline or Config.GITHUB_STATS_DEADLINE
+        self.max_repos = max_repos or Config.GITHUB_STATS_MAX_REPOS
+
+    def aggregate(self, owner: str, repos: list) -> dict:
+        """repos are dicts with at least 'name' (and optionally 'stars'), as returned by analyze_github."""
+        selected = sorted(repos, key=lambda r: r.get('stars') or 0, reverse=True)[:self.max_repos]
+        expires_at = time.monotonic() + self.deadline
+
+        with span('github.repo_stats', owner=owner, repos=len(selected)) as current:
+            futures = {}
+            for repo in selected:
+                for kind, fetch in (('languages', self.github.get_languages),
+                                    ('participation', self.github.get_participation)):
+                    future = _executor.submit(contextvars.copy_context().run, fetch, owner, repo['name'])
+                    futures[future] = (repo['name'], kind)
+
+            done, pending = wait(futures, timeout=max(expires_at - time.monotonic(), 0))
+            for future in pending:
+                # Queued lookups are dropped; running ones finish and still warm the cache
+                future.cancel()
+                _lookups_total.inc(kind=futures[future][1], outcome='timed_out')
+
+            collected = {repo['name']: {} for repo in selected}
+            failed = pending_stats = 0
+            for future in done:
+                name, kind = futures[future]
+                try:
+                    collected[name][kind] = future.result()
+                    if collected[name][kind] is None:
+                        # GitHub answered 202: statistics are still being computed
+                        pending_stats += 1
+                    _lookups_total.inc(kind=kind, outcome='ok' if collected[name][kind] is not None else 'pending')
+                except Exception as e:
+                    failed += 1
+                    _lookups_total.inc(kind=kind, outcome='error')
+                    logger.warning("GitHub %s lookup for %s/%s failed: %s", kind, owner, name, str(e))
+
+            result = self._merge(selected, collected)
+            result['coverage'] = {
+                'repositories': len(repos),
+                'analyzed': len(selected),
+                'lookups': len(futures),
+                'completed': len(done) - failed - pending_stats,
+                'failed': failed,
+                'still_computing': pending_stats,
+                'timed_out': len(pending),
+                'partial': bool(pending or failed or pending_stats)
+            }
+            current.set(timed_out=len(pending), failed=failed)
+        return result
+
+    @staticmethod
+    def _merge(repos: list, collected: dict) -> dict:
+        names = [repo['name'] for repo in repos]
+        languages = sorted({lang for data in collected.values() for lang in (data.get('languages') or {})})
+        column = {lang: i for i, lang in enumerate(languages)}
+
+        language_bytes = np.zeros((len(names), len(languages)), dtype=np.int64)
+        weekly = np.zeros((len(names), WEEKS), dtype=np.int64)
+        owner_weekly = np.zeros((len(names), WEEKS), dtype=np.int64)
+        for row, name in enumerate(names):
+            data = collected[name]
+            for lang, size in (data.get('languages') or {}).items():
+                language_bytes[row, column[lang]] = size
+            participation = data.get('participation')
+            if participation:
+                # Right-align so the last column is always the current week
+                for matrix, key in ((weekly, 'all'), (owner_weekly, 'owner')):
+                    counts = (participation.get(key) or [])[-WEEKS:]
+                    if counts:
+                        matrix[row, WEEKS - len(counts):] = counts
+        stars = np.array([repo.get('stars') or 0 for repo in repos], dtype=np.int64)
+
+        totals = language_bytes.sum(axis=0)
+        grand_total = int(totals.sum())
+        repos_per_language = (language_bytes > 0).sum(axis=0)
+        commits = weekly.sum(axis=0)
+        repo_bytes = language_bytes.sum(axis=1)
+        repo_commits = weekly.sum(axis=1)
+
+        return {
+            'languages': [{
+                'language': languages[i],
+                'bytes': int(totals[i]),
+                'share': round(int(totals[i]) / grand_total, 4) if grand_total else 0.0,
+                'repos': int(repos_per_language[i])
+            } for i in np.argsort(-totals, kind='stable')],
+            'commits': {
+                'last_year': int(commits.sum()),
+                'by_owner': int(owner_weekly.sum()),
+                'active_weeks': int(np.count_nonzero(commits)),
+                'weekly': commits.tolist()
+            },
+            'stars': {
+                'total': int(stars.sum()),
+                'median': float(np.median(stars)) if len(stars) else 0.0,
+                'max': int(stars.max()) if len(stars) else 0
+            },
+            'repositories': {
+                name: {
+                    'bytes': int(repo_bytes[row]),
+                    'top_language': languages[int(language_bytes[row].argmax())] if repo_bytes[row] else None,
+                    'commits_last_year': int(repo_commits[row])
+                } for row, name in enumerate(names)
+            }
+        }
@@ -0,0 +1,193 @@
+import time
+import random
+import logging
+import threading
+import requests # type: ignore
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is open and calls fail fast."""
+
+    def __init__(self, provider: str, retry_after: float):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} is unavailable (circuit open), retry in {retry_after:.0f}s")
+
+
+class DeadlineExceededError(Exception):
+    """Raised when the retry deadline for an upstream call runs out."""
+
+
+class CircuitBreaker:
+    """Per-provider breaker: opens after consecutive failures, probes again after a cool-down."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = None, recovery_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.BREAKER_FAILURE_THRESHOLD
+        self.recovery_timeout = recovery_timeout or Config.BREAKER_RECOVERY_TIMEOUT
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call is currently allowed."""
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self._opened_at + self.recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    self._stats['rejected'] += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN:
+                # Only one probe at a time while the provider is recovering
+                if self._probe_in_flight:
+                    self._stats['rejected'] += 1
+                    raise CircuitOpenError(self.name, self.recovery_timeout)
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self._failures = 0
+            self._probe_in_flight = False
+            self._state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._stats['failures'] += 1
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats['opened'] += 1
+                    logger.warning("Circuit for %s opened after %d failures", self.name, self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Release a half-open probe slot without judging the provider (e.g. a client error)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def to_dict(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                **self._stats
+            }
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by an overall deadline."""
+
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None):
+        self.max_attempts = max_attempts or Config.RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else Config.RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else Config.RETRY_MAX_DELAY
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Delay before the next attempt (attempt is 1-based)."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states() -> dict:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.to_dict() for breaker in breakers}
+
+
+def _status_code(error: Exception):
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None) is not None:
+        return response.status_code
+    return getattr(error, 'status', None)
+
+
+def _retry_after(error: Exception):
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(error, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection failures, 429 and 5xx are transient; other errors are not."""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def call_with_resilience(provider: str, fn, deadline: float = None, policy: RetryPolicy = None,
+                         timeout: float = None):
+    """
+    Call fn(timeout=...) through the provider's circuit breaker, retrying transient
+    failures with jittered backoff until the deadline (seconds from now) runs out.
+    """
+    breaker = get_breaker(provider)
+    policy = policy or RetryPolicy()
+    timeout = timeout or Config.UPSTREAM_READ_TIMEOUT
+    expires_at = time.monotonic() + (deadline or Config.UPSTREAM_DEADLINE)
+    attempt = 0
+
+    while True:
+        attempt += 1
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError(f"{provider} call exceeded its deadline after {attempt - 1} attempts")
+
+        breaker.before_call()
+        try:
+            result = fn(timeout=(Config.UPSTREAM_CONNECT_TIMEOUT, min(timeout, remaining)))
+        except Exception as e:
+            if not is_retryable(e):
+                # The provider answered; a bad request says nothing about its health
+                breaker.release()
+                raise
+            breaker.record_failure()
+            delay = policy.backoff(attempt, _retry_after(e))
+            if attempt >= policy.max_attempts or time.monotonic() + delay >= expires_at:
+                raise
+            logger.warning("%s call failed (%s), retry %d in %.2fs", provider, str(e), attempt, delay)
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
@@ -5,11 +5,18 @@ import logging
 from PyPDF2 import PdfReader
 from docx import Document
 from typing import Dict, List, Set
+from services.metrics import metrics, SIZE_BUCKETS
+from services.tracing import span
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+extraction_seconds = metrics.histogram(
+    'document_extraction_duration_seconds', "Time to extract text from an uploaded document", ('format',))
+document_bytes = metrics.histogram(
+    'document_size_bytes', "Size of uploaded documents", ('format',), buckets=SIZE_BUCKETS)
+extraction_errors = metrics.counter(
+    'document_extraction_errors_total', "Documents whose text could not be extracted", ('format',))
+
 class ResumeService:
     def __init__(self):
         # Common skills and keywords for matching
@@ -25,34 +32,39 @@ class ResumeService:
     def analyze_resume(self, resume_text: str, job_description: str) -> dict:
         try:
             # Clean and normalize text
-            resume_text = self._normalize_text(resume_text)
-            job_description = self._normalize_text(job_description)
+            with span('resume.normalize', chars=len(resume_text or '')):
+                resume_text = self._normalize_text(resume_text)
+                job_description = self._normalize_text(job_description)
 
             # Extract skills from both texts
-            resume_skills = self._extract_skills(resume_text)
-            job_skills = self._extract_skills(job_description)
+            with span('resume.match_skills') as skills_span:
+                resume_skills = self._extract_skills(resume_text)
+                job_skills = self._extract_skills(job_description)
 
-            # Find matching and missing skills
-            matching_skills = resume_skills.intersection(job_skills)
-            missing_skills = job_skills - resume_skills
+                # Find matching and missing skills
+                matching_skills = resume_skills.intersection(job_skills)
+                missing_skills = job_skills - resume_skills
+                skills_span.set(matching=len(matching_skills), required=len(job_skills))
 
-            # Calculate match score
-            total_required_skills = len(job_skills) if job_skills else 1
-            skill_match_score = (len(matching_skills) / total_required_skills) * 60
+            with span('resume.score'):
+                # Calculate match score
+                total_required_skills = len(job_skills) if job_skills else 1
+                skill_match_score = (len(matching_skills) / total_required_skills) * 60
 
-            # Analyze experience and education
-            experience_score = self._analyze_experience(resume_text, job_description) * 25
-            education_score = self._analyze_education(resume_text, job_description) * 15
+                # Analyze experience and education
+                experience_score = self._analyze_experience(resume_text, job_description) * 25
+                education_score = self._analyze_education(resume_text, job_description) * 15
 
-            # Calculate total score
-            match_score = int(skill_match_score + experience_score + education_score)
-            match_score = min(max(match_score, 0), 100)  # Ensure score is between 0-100
+                # Calculate total score
+                match_score = int(skill_match_score + experience_score + education_score)
+                match_score = min(max(match_score, 0), 100)  # Ensure score is between 0-100
 
-            # Generate improvement suggestions
-            suggestions = self._generate_suggestions(missing_skills, resume_text)
+            with span('resume.suggestions'):
+                # Generate improvement suggestions
+                suggestions = self._generate_suggestions(missing_skills, resume_text)
 
-            # Analyze ATS compatibility
-            ats_score, ats_suggestions = self._analyze_ats_compatibility(resume_text)
+                # Analyze ATS compatibility
+                ats_score, ats_suggestions = self._analyze_ats_compatibility(resume_text)
 
             return {
                 "match_score": match_score,
@@ -190,23 +202,33 @@ class ResumeService:
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file."""
         try:
-            reader = PdfReader(pdf_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            size = os.path.getsize(pdf_path)
+            document_bytes.observe(size, format='pdf')
+            with extraction_seconds.time(format='pdf'), span('resume.extract', format='pdf', bytes=size) as extract_span:
+                reader = PdfReader(pdf_path)
+                text = ""
+                for page in reader.pages:
+                    text += page.extract_text() + "\n"
+                extract_span.set(pages=len(reader.pages), chars=len(text))
             return text.strip()
         except Exception as e:
+            extraction_errors.inc(format='pdf')
             logger.error(f"Error extracting text from PDF: {str(e)}")
             raise Exception("Failed to extract text from PDF file. Please ensure the file is not corrupted.")
 
     def extract_text_from_docx(self, docx_path: str) -> str:
         """Extract text from DOCX file."""
         try:
-            doc = Document(docx_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            size = os.path.getsize(docx_path)
+            document_bytes.observe(size, format='docx')
+            with extraction_seconds.time(format='docx'), span('resume.extract', format='docx', bytes=size) as extract_span:
+                doc = Document(docx_path)
+                text = ""
+                for paragraph in doc.paragraphs:
+                    text += paragraph.text + "\n"
+                extract_span.set(paragraphs=len(doc.paragraphs), chars=len(text))
             return text.strip()
         except Exception as e:
+            extraction_errors.inc(format='docx')
             logger.error(f"Error extracting text from DOCX: {str(e)}")
             raise Exception("Failed to extract text from DOCX file. Please ensure the file is not corrupted.") 
\ No newline at end of file
@@ -1,19 +1,45 @@
-import openai
 from config import Config
 import json
 from datetime import datetime, timedelta
 import pytz
+from services.llm_client import LLMClient
+from services.prompt_builder import PromptBuilder
+from services.content_calendar import ContentCalendarGenerator
+from services.engagement_analytics import get_engagement_store, get_timezone, next_occurrence, WEEKDAYS
+from services.hashtag_index import get_hashtag_index, extract_hashtags
+from services.thread_splitter import split_thread, post_length, platform_spec
+from services.metrics import metrics
+
+_hashtag_suggestions = metrics.counter(
+    'social_hashtag_suggestions_total', "Hashtag suggestions by where they came from", ('source',))
 
-openai.api_key = Config.OPENAI_API_KEY
 
 class SocialService:
+    # General best practices, used until a user has enough engagement history
+    DEFAULT_BEST_TIMES = {
+        'linkedin': [
+            {'day': 'Tuesday', 'time': '10:00-12:00'},
+            {'day': 'Wednesday', 'time': '09:00-11:00'},
+            {'day': 'Thursday', 'time': '10:00-12:00'}
+        ],
+        'twitter': [
+            {'day': 'Monday', 'time': '09:00-11:00'},
+            {'day': 'Wednesday', 'time': '10:00-12:00'},
+            {'day': 'Friday', 'time': '09:00-11:00'}
+        ]
+    }
+
     def __init__(self):
         self.model = Config.OPENAI_MODEL
         self.temperature = Config.OPENAI_TEMPERATURE
+        self.llm = LLMClient('openai', model=self.model, temperature=self.temperature)
+        self.calendar = ContentCalendarGenerator(self)
+        self.engagement = get_engagement_store()
+        self.hashtags = get_hashtag_index()
 
     def generate_post(self, topic, platform='linkedin', tone='professional', length='medium'):
         """Generate a social media post based on topic and parameters"""
-        prompt = f"""
+        prompt = PromptBuilder('social.generate_post').build("""
         Create an engaging social media post for {platform} about:
         Topic: {topic}
         Tone: {tone}
@@ -24,26 +50,24 @@ class SocialService:
         2. Include relevant hashtags
         3. Encourage engagement
         4. Provide value to the reader
-        """
+        """, platform=platform, topic=topic, tone=tone, length=length)
         
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": f"You are an expert {platform} content creator."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=self.temperature
+        post = self.llm.chat(
+            prompt,
+            system=f"You are an expert {platform} content creator.",
+            endpoint='social.generate_post'
         )
         
         return {
-            "post": response.choices[0].message.content,
+            "post": post,
             "hashtags": self._generate_hashtags(topic, platform),
             "best_time": self.optimize_posting_time(platform)
         }
 
     def generate_thread(self, topic, platform='twitter', num_tweets=5):
         """Generate a thread of related posts"""
-        prompt = f"""
+        limit = platform_spec(platform)['limit']
+        prompt = PromptBuilder('social.generate_thread').build("""
         Create a thread of {num_tweets} related posts for {platform} about:
         Topic: {topic}
         
@@ -52,19 +76,17 @@ class SocialService:
         2. Build on each point
         3. Include relevant hashtags
         4. End with a call to action
-        """
+        Separate posts with a blank line; keep each under {limit} characters.
+        """, num_tweets=num_tweets, platform=platform, topic=topic, limit=limit)
         
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": f"You are an expert {platform} thread creator."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=self.temperature
+        content = self.llm.chat(
+            prompt,
+            system=f"You are an expert {platform} thread creator.",
+            endpoint='social.generate_thread'
         )
         
-        # Split the response into individual tweets
-        tweets = self._split_into_tweets(response.choices[0].message.content)
+        # Split the response into posts that fit the platform's limit
+        tweets = self._split_into_tweets(content, platform)
         
         return {
             "thread": tweets,
@@ -72,9 +94,27 @@ class SocialService:
             "best_time": self.optimize_posting_time(platform)
         }
 
+    def generate_calendar(self, topics, platforms=None, days=30, timezone='UTC', tone='professional',
+                          start_date=None, user_id=None):
+        """
+        Plan a content calendar and return a generator of its events; posts are
+        written in batched requests and yielded as each one is ready
+        """
+        slots = self.calendar.plan(topics, platforms, days, timezone, start_date, user_id)
+        return self.calendar.stream(slots, tone)
+
     def suggest_hashtags(self, content, platform='linkedin'):
-        """Suggest relevant hashtags for content"""
-        prompt = f"""
+        """Suggest relevant hashtags for content, from the local index when it is confident"""
+        local = self._local_hashtags(content, platform)
+        if local is not None:
+            return {
+                "hashtags": local['hashtags'],
+                "trending": self._get_trending_hashtags(platform),
+                "source": 'index',
+                "confidence": local['confidence']
+            }
+
+        prompt = PromptBuilder('social.suggest_hashtags').build("""
         Suggest relevant hashtags for this {platform} content:
         {content}
         
@@ -83,49 +123,96 @@ class SocialService:
         2. Trending hashtags
         3. Engagement hashtags
         4. Platform-specific hashtags
-        """
+        """, platform=platform, content=content)
         
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a social media hashtag expert."},
-                {"role": "user", "content": prompt}
-            ],
+        hashtags = self.llm.chat(
+            prompt,
+            system="You are a social media hashtag expert.",
+            endpoint='social.suggest_hashtags',
             temperature=0.3
         )
         
         return {
-            "hashtags": response.choices[0].message.content.split(),
-            "trending": self._get_trending_hashtags(platform)
+            "hashtags": self._parse_hashtags(hashtags),
+            "trending": self._get_trending_hashtags(platform),
+            "source": 'llm'
         }
 
-    def optimize_posting_time(self, platform, timezone='UTC'):
-        """Suggest optimal posting times based on platform and timezone"""
-        # In a real implementation, this would use platform-specific analytics
-        # For now, we'll return some general best practices
-        best_times = {
-            'linkedin': [
-                {'day': 'Tuesday', 'time': '10:00-12:00'},
-                {'day': 'Wednesday', 'time': '09:00-11:00'},
-                {'day': 'Thursday', 'time': '10:00-12:00'}
-            ],
-            'twitter': [
-                {'day': 'Monday', 'time': '09:00-11:00'},
-                {'day': 'Wednesday', 'time': '10:00-12:00'},
-                {'day': 'Friday', 'time': '09:00-11:00'}
+    def optimize_posting_time(self, platform, timezone='UTC', user_id=None):
+        """
+        Suggest optimal posting times in the given timezone: from the user's own
+        engagement history when there is enough of it, general best practices otherwise
+        """
+        tz = get_timezone(timezone)
+        history = self.engagement.best_slots(user_id, platform) if user_id else None
+        if history:
+            # Slots are hours of the week in the audience's timezone
+            windows = [(slot['day'], slot['hour'], 0, 60) for slot in history['slots']]
+            window_tz = get_timezone(history['timezone'])
+        else:
+            windows = [
+                (WEEKDAYS.index(w['day']), int(w['time'][:2]), int(w['time'][3:5]), self._window_minutes(w['time']))
+                for w in self.DEFAULT_BEST_TIMES.get(platform, [])
             ]
-        }
-        
+            window_tz = tz
+
+        now = datetime.now(pytz.utc)
+        starts = [next_occurrence(day, hour, minute, window_tz, now).astimezone(tz)
+                  for day, hour, minute, _ in windows]
+        best_times = [{
+            'day': WEEKDAYS[start.weekday()],
+            'time': f"{start:%H:%M}-{start + timedelta(minutes=minutes):%H:%M}"
+        } for start, (_, _, _, minutes) in zip(starts, windows)]
+        if history:
+            for window, slot in zip(best_times, history['slots']):
+                window.update(score=slot['score'], lift=slot['lift'], posts=slot['posts'])
+
         return {
             "platform": platform,
-            "timezone": timezone,
-            "best_times": best_times.get(platform, []),
-            "next_optimal_time": self._calculate_next_optimal_time(platform, timezone)
+            "timezone": tz.zone,
+            "best_times": best_times,
+            "next_optimal_time": min(starts).isoformat() if starts else None,
+            "source": 'history' if history else 'defaults',
+            "history": {key: history[key] for key in ('timezone', 'posts', 'mean_engagement')} if history else None
         }
 
+    @staticmethod
+    def _window_minutes(window):
+        start, end = (int(t[:2]) * 60 + int(t[3:5]) for t in window.split('-'))
+        return (end - start) % (24 * 60)
+
+    def ingest_engagement(self, user_id, data, fmt=None, platform=None, timezone=None, export_timezone=None):
+        """Fold an engagement export (CSV or JSON Lines) into the user's posting-time aggregates"""
+        return self.engagement.ingest(user_id, data, fmt, platform, timezone, export_timezone)
+
+    def engagement_summary(self, user_id):
+        """Per-platform post counts and the weekday x hour engagement heatmap"""
+        return self.engagement.summary(user_id, heatmap=True)
+
+    def _local_hashtags(self, text, platform):
+        """Suggestions from the hashtag index, or None when it is not confident enough to skip the model"""
+        if not Config.HASHTAG_INDEX_ENABLED:
+            return None
+        suggestion = self.hashtags.suggest(text, platform)
+        if suggestion['confidence'] < Config.HASHTAG_MIN_CONFIDENCE:
+            _hashtag_suggestions.inc(source='llm')
+            return None
+        _hashtag_suggestions.inc(source='index')
+        return suggestion
+
+    @staticmethod
+    def _parse_hashtags(text):
+        """Hashtags from a model reply, which may number or explain them"""
+        tags = list(dict.fromkeys('#' + tag for tag in extract_hashtags(text)))
+        return tags or text.split()
+
     def _generate_hashtags(self, topic, platform):
-        """Generate relevant hashtags for a topic and platform"""
-        prompt = f"""
+        """Hashtags for a topic and platform: from the local index, the model only when the index is unsure"""
+        local = self._local_hashtags(topic, platform)
+        if local is not None:
+            return local['hashtags']
+
+        prompt = PromptBuilder('social.generate_hashtags').build("""
         Generate relevant hashtags for {platform} about:
         {topic}
         
@@ -133,41 +220,50 @@ class SocialService:
         1. Industry-specific hashtags
         2. Trending hashtags
         3. Engagement hashtags
-        """
+        """, platform=platform, topic=topic)
         
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a social media hashtag expert."},
-                {"role": "user", "content": prompt}
-            ],
+        hashtags = self.llm.chat(
+            prompt,
+            system="You are a social media hashtag expert.",
+            endpoint='social.generate_hashtags',
             temperature=0.3
         )
         
-        return response.choices[0].message.content.split()
+        return self._parse_hashtags(hashtags)
 
-    def _split_into_tweets(self, content):
-        """Split content into individual tweets"""
-        # In a real implementation, this would handle Twitter's character limit
-        # and properly format the thread
-        tweets = content.split('\n\n')
-        return [tweet.strip() for tweet in tweets if tweet.strip()]
+    def _split_into_tweets(self, content, platform='twitter'):
+        """
+        Split content into numbered posts within the platform's weighted length
+        limit, one or more per paragraph, breaking at sentence boundaries
+        """
+        return split_thread(content, platform)
+
+    def split_thread(self, text, platform='twitter', numbering=True, keep_paragraphs=True):
+        """Split any text into a thread of posts, each with its length as the platform counts it"""
+        posts = split_thread(text, platform, numbering=numbering, keep_paragraphs=keep_paragraphs)
+        return {
+            "platform": platform,
+            "limit": platform_spec(platform)['limit'],
+            "posts": [{"text": post, "length": post_length(post, platform)} for post in posts]
+        }
 
     def _get_trending_hashtags(self, platform):
-        """Get trending hashtags for a platform (simulated)"""
-        # In a real implementation, this would use platform APIs
+        """Trending hashtags for a platform, by recency-weighted use in the corpus"""
+        trending = self.hashtags.trending(platform) if Config.HASHTAG_INDEX_ENABLED else []
+        if trending:
+            return [entry['hashtag'] for entry in trending]
+        # General defaults until the corpus has posts
         return {
             'linkedin': ['#leadership', '#innovation', '#careeradvice'],
             'twitter': ['#tech', '#coding', '#developer']
         }.get(platform, [])
 
-    def _calculate_next_optimal_time(self, platform, timezone):
-        """Calculate the next optimal posting time"""
-        # In a real implementation, this would use more sophisticated algorithms
-        now = datetime.now(pytz.timezone(timezone))
-        if platform == 'linkedin':
-            # If it's Monday, suggest Tuesday
-            if now.weekday() == 0:
-                next_day = now + timedelta(days=1)
-                return next_day.replace(hour=10, minute=0).isoformat()
-        return now.replace(hour=10, minute=0).isoformat() 
\ No newline at end of file
+    def add_hashtag_corpus(self, posts):
+        """Add published posts to the hashtag index"""
+        if not isinstance(posts, list):
+            raise ValueError("Posts must be a list of posts or {text, platform, timestamp} objects.")
+        return self.hashtags.add_posts(posts)
+
+    def trending_hashtags(self, platform=None, limit=10):
+        """Trending hashtags with their recency-weighted scores and momentum"""
+        return self.hashtags.trending(platform, limit)
@@ -0,0 +1,300 @@
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.S)
+_NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?')
+_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null', 'true': 'true', 'false': 'false', 'null': 'null'}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when model output cannot be turned into the expected structure."""
+
+
+def _strip_trailing(out: list, chars: str = ','):
+    """Drop trailing whitespace and any of chars from the repaired output."""
+    while out and (out[-1].isspace() or out[-1] in chars):
+        out.pop()
+
+
+def repair_json(text: str) -> str:
+    """
+    Repair common model-output damage in a JSON document that starts at text[0]:
+    single quotes, Python literals, trailing commas, comments, '...' placeholders,
+    raw newlines in strings and truncation (open strings and containers are closed).
+    Anything after the closing bracket of the document is ignored.
+    """
+    out, stack = [], []
+    in_string, quote, escaped = False, None, False
+    string_start = None
+    i, length = 0, len(text)
+
+    while i < length:
+        c = text[i]
+        if in_string:
+            if escaped:
+                if c == "'":
+                    out[-1] = c  # \' is not a JSON escape: the quote stands alone
+                else:
+                    out.append(c)
+                escaped = False
+            elif c == '\\':
+                out.append(c)
+                escaped = True
+            elif c == quote:
+                out.append('"')
+                in_string = False
+            elif c == '"':
+                out.append('\\"')  # Double quote inside a single-quoted string
+            elif c == '\n':
+                out.append('\\n')
+            elif c == '\t':
+                out.append('\\t')
+            elif ord(c) >= 0x20:
+                out.append(c)
+            i += 1
+            continue
+
+        if c in '"\'':
+            in_string, quote = True, c
+            string_start = len(out)
+            out.append('"')
+        elif c in '{[':
+            stack.append('}' if c == '{' else ']')
+            out.append(c)
+        elif c in '}]':
+            _strip_trailing(out)
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break
+        elif c == '/' and text.startswith('//', i):
+            newline = text.find('\n', i)
+            i = length if newline < 0 else newline
+            continue
+        elif c == '.' and text.startswith('...', i):
+            _strip_trailing(out)
+            i += 3
+            continue
+        elif c == '-' or '0' <= c <= '9':
+            # A whole number token, so an exponent's 'e' is not taken for a bare word
+            match = _NUMBER_PATTERN.match(text, i)
+            if match is None:
+                out.append(c)
+                i += 1
+            else:
+                number = match.group()
+                out.append(number[:-1] + '.0' if number.endswith('.') else number)
+                i = match.end()
+            continue
+        elif c.isalpha() or c == '_':
+            end = i
+            while end < length and (text[end].isalnum() or text[end] == '_'):
+                end += 1
+            word = text[i:end]
+            if word in _LITERALS:
+                out.append(_LITERALS[word])
+            else:
+                out.append(json.dumps(word))  # Unquoted key or bare word
+            i = end
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    if stack:
+        _strip_trailing(out)
+        if out and out[-1] == ':':
+            out.append('null')
+        elif stack[-1] == '}' and out and out[-1] == '"' and string_start is not None:
+            # A key cut off before its value
+            before = ''.join(out[:string_start]).rstrip()
+            if before.endswith(('{', ',')):
+                out.append(':null')
+        while stack:
+            out.append(stack.pop())
+    return ''.join(out)
+
+
+def _candidates(text: str, opener: str):
+    """Yield positions where a JSON document may start, fenced blocks first."""
+    blocks = [m.group(1) for m in _FENCE_PATTERN.finditer(text)] + [text]
+    for block in blocks:
+        start = block.find(opener)
+        attempts = 0
+        while start >= 0 and attempts < 5:
+            yield block[start:]
+            start = block.find(opener, start + 1)
+            attempts += 1
+
+
+def extract_json(text: str, expect: type = dict):
+    """Extract and repair the first JSON document of the expected type from model output."""
+    if not text:
+        raise StructuredOutputError("Model returned an empty response.")
+    try:
+        result = json.loads(text)
+        if isinstance(result, expect):
+            return result
+    except json.JSONDecodeError:
+        pass
+
+    opener = '{' if expect is dict else '['
+    for candidate in _candidates(text, opener):
+        try:
+            result = json.loads(repair_json(candidate))
+        except json.JSONDecodeError:
+            continue
+        if isinstance(result, expect):
+            return result
+    raise StructuredOutputError("Could not find valid JSON in the model response.")
+
+
+def validate(data: dict, schema: dict) -> dict:
+    """
+    Check data against a schema mapping field name to an expected type (or tuple
+    of types). Numbers given as strings are coerced; missing fields raise.
+    """
+    if not isinstance(data, dict):
+        raise StructuredOutputError("Expected a JSON object.")
+    for field, expected in schema.items():
+        if field not in data:
+            raise StructuredOutputError(f"Missing field '{field}' in model response.")
+        value = data[field]
+        types = expected if isinstance(expected, tuple) else (expected,)
+        if isinstance(value, types) and not (isinstance(value, bool) and bool not in types):
+            continue
+        if isinstance(value, str) and (int in types or float in types):
+            match = re.search(r"-?\d+(?:\.\d+)?", value)
+            if match:
+                number = float(match.group())
+                data[field] = int(number) if int in types and number.is_integer() else number
+                continue
+        raise StructuredOutputError(
+            f"Field '{field}' has type {type(value).__name__}, expected {'/'.join(t.__name__ for t in types)}.")
+    return data
+
+
+def parse_structured(text: str, schema: dict = None) -> dict:
+    """Extract, repair and validate a JSON object from model output."""
+    result = extract_json(text, dict)
+    if schema:
+        validate(result, schema)
+    return result
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object from a token stream and reports each field as soon as
+    it is complete. With emit_depth=1 top-level fields are reported; with
+    emit_depth=2 the members of nested objects/arrays are (e.g. each answer of
+    {"answers": {"1": "...", "2": "..."}}); path then names the top-level field
+    whose members are reported, and the others are ignored. Leading prose and
+    code fences are skipped.
+    """
+
+    def __init__(self, emit_depth: int = 1, path: str = None):
+        self.emit_depth = emit_depth
+        self.path = path
+        self._member_start = None
+        self._parent = None
+        self._text = ''
+        self._pos = 0
+        self._start = None
+        self._stack = []
+        self._segment_start = None
+        self._in_string = False
+        self._escaped = False
+        self._index = {}
+        self.done = False
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk of model output; return the (key, value) pairs completed by it."""
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        fields = []
+        text = self._text
+        while self._pos < len(text):
+            c = text[self._pos]
+            if self._start is None:
+                if c == '{':
+                    self._start = self._pos
+                    self._open('}')
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == '\\':
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in '{[':
+                self._open('}' if c == '{' else ']')
+            elif c == ',':
+                if len(self._stack) == 1:
+                    self._member_start = self._pos + 1
+                if len(self._stack) == self.emit_depth:
+                    fields.extend(self._emit(self._pos))
+                    self._segment_start = self._pos + 1
+            elif c in '}]':
+                if len(self._stack) == self.emit_depth:
+                    fields.extend(self._emit(self._pos))
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                    self._pos += 1
+                    break
+            self._pos += 1
+        return fields
+
+    def _open(self, closer: str):
+        self._stack.append(closer)
+        if len(self._stack) == 1:
+            self._member_start = self._pos + 1
+        elif len(self._stack) == 2:
+            # The top-level key this container is the value of ('"posts":' before it)
+            self._parent = self._text[self._member_start:self._pos].strip().rstrip(':').strip().strip('"\'')
+        if len(self._stack) == self.emit_depth:
+            self._segment_start = self._pos + 1
+            self._index[len(self._stack)] = 0
+
+    def _emit(self, end: int) -> list:
+        segment = self._text[self._segment_start:end].strip()
+        if not segment or (self.path is not None and len(self._stack) >= 2 and self._parent != self.path):
+            return []
+        closer = self._stack[-1]
+        wrapped = ('{' + segment + '}') if closer == '}' else ('[' + segment + ']')
+        try:
+            value = json.loads(repair_json(wrapped))
+        except json.JSONDecodeError:
+            logger.debug("Could not parse streamed field: %s", segment[:200])
+            return []
+        if closer == '}':
+            return list(value.items())
+        depth = len(self._stack)
+        index = self._index[depth]
+        self._index[depth] = index + 1
+        return [(index, item) for item in value]
+
+    def result(self, schema: dict = None) -> dict:
+        """Parse everything received so far as one object, repairing truncation."""
+        if self._start is None:
+            return parse_structured(self._text, schema)
+        try:
+            result = json.loads(repair_json(self._text[self._start:]))
+        except json.JSONDecodeError as e:
+            raise StructuredOutputError(f"Could not parse the streamed response: {str(e)}")
+        if schema:
+            validate(result, schema)
+        return result
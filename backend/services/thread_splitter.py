@@ -0,0 +1,210 @@
+import re
+import unicodedata
+
+try:
+    import regex # type: ignore
+except ImportError:  # regex is optional, graphemes are then segmented by the rules below
+    regex = None
+
+# limit: maximum post length; unit: how it is counted; url_length: what every link counts as (None: its length)
+PLATFORMS = {
+    'twitter': {'limit': 280, 'unit': 'weighted', 'url_length': 23},
+    'x': {'limit': 280, 'unit': 'weighted', 'url_length': 23},
+    'mastodon': {'limit': 500, 'unit': 'codepoints', 'url_length': 23},
+    'bluesky': {'limit': 300, 'unit': 'graphemes', 'url_length': None},
+    'threads': {'limit': 500, 'unit': 'codepoints', 'url_length': None},
+    'linkedin': {'limit': 3000, 'unit': 'codepoints', 'url_length': None}
+}
+
+# twitter-text v3: these code points count once, everything else (CJK included) twice, every emoji twice
+_LIGHT_RANGES = ((0x0000, 0x10FF), (0x2000, 0x200D), (0x2010, 0x201F), (0x2032, 0x2037))
+
+_URL_PATTERN = re.compile(r'(?:https?://|www\.)[^\s<>"]+?(?=[.,;:!?)\]\'"]*(?:\s|$))', re.IGNORECASE)
+_SENTENCE_PATTERN = re.compile(r'.*?(?:[.!?…]+["\'”’)\]]*(?=\s|$)|[。！？]+|\n|$)\s*',
+                               re.DOTALL)
+_WORD_PATTERN = re.compile(r'\s*\S+')
+_PARAGRAPH_PATTERN = re.compile(r'\n\s*\n')
+# Numbering the model added itself ("1/", "(2/5)", "3.", "Tweet 4:"); posts are renumbered after splitting
+_LEADING_NUMBER = re.compile(
+    r'^\s*(?:\(?(\d{1,3})\s*/\s*\d{0,3}\)?|(\d{1,3})[.)]|(?:tweet|post)\s*(\d{1,3})\s*[:.\-])\s+', re.IGNORECASE)
+_TRAILING_NUMBER = re.compile(r'\s+\(?(\d{1,3})\s*/\s*\d{1,3}\)?\s*$')
+
+_ZWJ = 0x200D
+# Code points that may join a grapheme cluster (a superset: whole blocks of scripts with combining marks,
+# joiners, variation selectors, CR, flags, skin tones and everything else outside the BMP)
+_CLUSTERING = re.compile('[\r\u0300-\u036F\u0483-\u0489\u0591-\u0DFF\u0E31-\u0FFF\u1000-\u11FF\u135D-\u135F'
+                         '\u1700-\u18AF\u1A00-\u1DFF\u200C\u200D\u20D0-\u20FF\u302A-\u302F\u3099\u309A'
+                         '\uA66F-\uABFF\uFB1E\uFE00-\uFE0F\uFE20-\uFE2F\U00010000-\U000E01EF]')
+_HEAVY = re.compile('[^\u0000-\u10FF\u2000-\u200D\u2010-\u201F\u2032-\u2037]')
+
+
+def _is_extender(cp: int, ch: str) -> bool:
+    """Code points that never start a grapheme cluster of their own."""
+    return (cp == _ZWJ or 0xFE00 <= cp <= 0xFE0F or 0x1F3FB <= cp <= 0x1F3FF or 0xE0020 <= cp <= 0xE007F
+            or 0xE0100 <= cp <= 0xE01EF or unicodedata.category(ch) in ('Mn', 'Me', 'Mc'))
+
+
+def _is_regional_indicator(cp: int) -> bool:
+    return 0x1F1E6 <= cp <= 0x1F1FF
+
+
+def graphemes(text: str) -> list:
+    """
+    Extended grapheme clusters of text. Uses the regex module when installed;
+    otherwise combining marks, variation selectors, skin tones, emoji tag and
+    ZWJ sequences, flag pairs, CRLF and Hangul jamo are joined in one pass.
+    """
+    if regex is not None:
+        return regex.findall(r'\X', text)
+    clusters = []
+    previous = None
+    flag_open = False
+    for ch in text:
+        cp = ord(ch)
+        if clusters and (
+                _is_extender(cp, ch)
+                or previous == _ZWJ
+                or (previous == 0x0D and cp == 0x0A)
+                or (flag_open and _is_regional_indicator(cp))
+                or (0x1160 <= cp <= 0x11FF and previous is not None
+                    and (0x1100 <= previous <= 0x11FF or 0xAC00 <= previous <= 0xD7A3))
+                or (0x1100 <= cp <= 0x115F and previous is not None and 0x1100 <= previous <= 0x115F)):
+            clusters[-1] += ch
+            flag_open = False
+        else:
+            clusters.append(ch)
+            flag_open = _is_regional_indicator(cp)
+        previous = cp
+    return clusters
+
+
+def _is_emoji(cluster: str) -> bool:
+    return any(ord(c) >= 0x1F000 or ord(c) in (0xFE0F, _ZWJ, 0x20E3) for c in cluster)
+
+
+def _code_point_weight(ch: str) -> int:
+    cp = ord(ch)
+    return 1 if any(low <= cp <= high for low, high in _LIGHT_RANGES) else 2
+
+
+def _plain_length(text: str, unit: str) -> int:
+    if not text:
+        return 0
+    if text.isascii() or unit == 'codepoints':
+        return len(text)
+    if not _CLUSTERING.search(text):
+        # Every code point is a grapheme of its own: count them in C
+        return len(text) if unit == 'graphemes' else len(text) + len(_HEAVY.findall(text))
+    if unit == 'graphemes':
+        return len(graphemes(text))
+    return sum(2 if _is_emoji(cluster) else sum(_code_point_weight(c) for c in cluster)
+               for cluster in graphemes(text))
+
+
+def post_length(text: str, platform: str = 'twitter') -> int:
+    """How long a post is by the platform's own counting rules."""
+    spec = platform_spec(platform)
+    text = unicodedata.normalize('NFC', text or '')
+    total, position = 0, 0
+    for match in _URL_PATTERN.finditer(text):
+        total += _plain_length(text[position:match.start()], spec['unit'])
+        total += spec['url_length'] or _plain_length(match.group(), spec['unit'])
+        position = match.end()
+    return total + _plain_length(text[position:], spec['unit'])
+
+
+def platform_spec(platform: str) -> dict:
+    spec = PLATFORMS.get((platform or '').lower())
+    if spec is None:
+        raise ValueError(f"Unsupported platform '{platform}'. Platforms: {', '.join(PLATFORMS)}.")
+    return spec
+
+
+def _pieces(text: str, capacity: int, platform: str):
+    """
+    (piece, length, separator after it) for a paragraph, coarsest first: whole sentences,
+    then words of sentences that do not fit, then graphemes of words that do not
+    fit. Every character is measured at most three times, so this is linear.
+    """
+    for sentence in _SENTENCE_PATTERN.findall(text):
+        stripped = sentence.strip()
+        if not stripped:
+            continue
+        separator = '\n' if sentence.endswith('\n') else (' ' if sentence != sentence.rstrip() else '')
+        length = post_length(stripped, platform)
+        if length <= capacity:
+            yield stripped, length, separator
+            continue
+        words = _WORD_PATTERN.findall(stripped)
+        for index, word in enumerate(words):
+            word = word.strip()
+            trailing = ' ' if index < len(words) - 1 else separator
+            length = post_length(word, platform)
+            if length <= capacity:
+                yield word, length, trailing
+                continue
+            clusters = graphemes(word)
+            for position, cluster in enumerate(clusters):
+                yield cluster, post_length(cluster, platform), trailing if position == len(clusters) - 1 else ''
+
+
+def _pack(paragraph: str, capacity: int, platform: str) -> list:
+    """Greedily fill posts with the paragraph's pieces, never past capacity."""
+    posts, current, used, pending = [], [], 0, ''
+    for piece, length, separator in _pieces(paragraph, capacity, platform):
+        joint = len(pending) if current else 0
+        if current and used + joint + length > capacity:
+            posts.append(''.join(current))
+            current, used, joint = [], 0, 0
+        if current:
+            current.append(pending)
+        current.append(piece)
+        used += joint + length
+        pending = separator
+    if current:
+        posts.append(''.join(current))
+    return posts
+
+
+def _strip_number(paragraph: str, pattern, position: int) -> str:
+    """Drop a post number, but only the one this paragraph would have: "24/7" in the text stays."""
+    match = pattern.search(paragraph)
+    if match and int(next(group for group in match.groups() if group)) == position:
+        return paragraph[:match.start()] + paragraph[match.end():]
+    return paragraph
+
+
+def _paragraphs(text: str, keep_paragraphs: bool) -> list:
+    paragraphs = []
+    for paragraph in _PARAGRAPH_PATTERN.split(text):
+        position = len(paragraphs) + 1
+        paragraph = _strip_number(_strip_number(paragraph.strip(), _LEADING_NUMBER, position),
+                                  _TRAILING_NUMBER, position).strip()
+        if paragraph:
+            paragraphs.append(paragraph)
+    # Without paragraph boundaries everything is packed as one run of sentences
+    return paragraphs if keep_paragraphs else [' '.join(paragraphs)] if paragraphs else []
+
+
+def split_thread(text: str, platform: str = 'twitter', numbering: bool = True, keep_paragraphs: bool = True,
+                 limit: int = None) -> list:
+    """
+    Split text into posts that each fit the platform's limit, breaking at
+    sentence boundaries where possible, then at words, and only inside a word
+    that is longer than a whole post. Each paragraph starts a new post unless
+    keep_paragraphs is False. Posts get " i/n" suffixes when there is more than one.
+    """
+    limit = limit or platform_spec(platform)['limit']
+    paragraphs = _paragraphs(unicodedata.normalize('NFC', text or ''), keep_paragraphs)
+    posts = [post for paragraph in paragraphs for post in _pack(paragraph, limit, platform)]
+    if len(posts) <= 1 or not numbering:
+        return posts
+
+    # The suffix takes room from every post; re-pack until its width covers the post count
+    digits = len(str(len(posts)))
+    while True:
+        posts = [post for paragraph in paragraphs for post in _pack(paragraph, limit - 2 - 2 * digits, platform)]
+        if len(str(len(posts))) <= digits:
+            break
+        digits = len(str(len(posts)))
+    return [f"{post} {index}/{len(posts)}" for index, post in enumerate(posts, 1)]
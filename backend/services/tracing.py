@@ -0,0 +1,233 @@
+import re
+import json
+import time
+import uuid
+import threading
+import contextvars
+from functools import wraps
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from config import Config
+
+_current_span = contextvars.ContextVar('trace_span', default=None)
+_TRACE_ID_PATTERN = re.compile(r'^[0-9a-f]{16,32}$')
+
+
+class Span:
+    """One timed stage of a trace. Attributes are small, JSON-serializable values."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'attributes', 'thread', 'start_time',
+                 'duration_ms', 'status', 'error', '_started')
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.thread = threading.current_thread().name
+        self.start_time = datetime.now(timezone.utc).isoformat(timespec='microseconds')
+        self.duration_ms = None
+        self.status = 'ok'
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error: BaseException):
+        self.status = 'error'
+        self.error = f"{type(error).__name__}: {str(error)[:300]}"
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        _exporter.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration_ms': self.duration_ms,
+            'thread': self.thread,
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+
+class _NullSpan:
+    """Stands in for a span when tracing is disabled."""
+    trace_id = None
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, error):
+        pass
+
+    def finish(self):
+        pass
+
+
+class TraceBuffer:
+    """Ring buffer of the most recent traces, each a list of finished spans."""
+
+    def __init__(self, max_traces: int = None, max_spans: int = 500):
+        self.max_traces = max_traces or Config.TRACE_BUFFER_TRACES
+        self.max_spans = max_spans
+        self._lock = threading.Lock()
+        self._traces = OrderedDict()
+
+    def add(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            if len(spans) < self.max_spans:
+                spans.append(span.to_dict())
+
+    def get(self, trace_id: str) -> list:
+        with self._lock:
+            spans = list(self._traces.get(trace_id, []))
+        return sorted(spans, key=lambda s: s['start_time'])
+
+    def summaries(self, limit: int = 50) -> list:
+        with self._lock:
+            traces = list(self._traces.items())[-limit:]
+        summaries = []
+        for trace_id, spans in reversed(traces):
+            root = next((s for s in spans if s['parent_id'] is None), spans[0])
+            summaries.append({
+                'trace_id': trace_id,
+                'root': root['name'],
+                'start_time': root['start_time'],
+                'duration_ms': root['duration_ms'],
+                'spans': len(spans),
+                'errors': sum(1 for s in spans if s['status'] == 'error')
+            })
+        return summaries
+
+
+class SpanExporter:
+    """Sends finished spans to the in-memory buffer and/or a JSONL file (TRACE_EXPORT)."""
+
+    def __init__(self):
+        self.buffer = TraceBuffer()
+        self._file_logger = None
+
+    def export(self, span: Span):
+        if Config.TRACE_EXPORT in ('memory', 'both'):
+            self.buffer.add(span)
+        if Config.TRACE_EXPORT in ('jsonl', 'both'):
+            if self._file_logger is None:
+                from services.log_pipeline import queued_file_logger
+                self._file_logger = queued_file_logger('tracing.spans', Config.TRACE_FILE)
+            self._file_logger.info(json.dumps(span.to_dict(), separators=(',', ':'), default=str))
+
+
+_exporter = SpanExporter()
+trace_buffer = _exporter.buffer
+
+
+def _new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a stage as a child of the current span (or as the root of a new trace)."""
+    if not Config.TRACING_ENABLED:
+        yield _NullSpan()
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.trace_id if parent else _new_trace_id(),
+                   parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def start_span(name: str, **attributes):
+    """
+    A child of the current span that is not made current, for work that spans
+    generator yields; the caller must call finish().
+    """
+    if not Config.TRACING_ENABLED:
+        return _NullSpan()
+    parent = _current_span.get()
+    return Span(name, parent.trace_id if parent else _new_trace_id(), parent.span_id if parent else None, attributes)
+
+
+def traced(name: str = None):
+    """Decorator form of span()."""
+    def decorator(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    return _current_span.get() or _NullSpan()
+
+
+def current_trace_id() -> str:
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+
+def init_tracing(app):
+    """
+    Open a root span per request (continuing an incoming X-Trace-Id when valid) and
+    return the trace id in the response header. Work submitted to pools through
+    contextvars.copy_context() joins the same trace.
+    """
+    from flask import request, g  # type: ignore
+
+    @app.before_request
+    def start_request_span():
+        if not Config.TRACING_ENABLED:
+            return
+        incoming = (request.headers.get(Config.TRACE_HEADER) or '').lower()
+        root = Span(request.endpoint or 'unmatched',
+                    incoming if _TRACE_ID_PATTERN.match(incoming) else _new_trace_id(),
+                    attributes={'method': request.method, 'path': request.path})
+        g.trace_span = root
+        g.trace_token = _current_span.set(root)
+
+    @app.after_request
+    def add_trace_header(response):
+        root = g.get('trace_span')
+        if root is not None:
+            root.set(status=response.status_code)
+            response.headers[Config.TRACE_HEADER] = root.trace_id
+        return response
+
+    @app.teardown_request
+    def finish_request_span(error=None):
+        root = g.pop('trace_span', None)
+        if root is None:
+            return
+        if error is not None:
+            root.fail(error)
+        try:
+            _current_span.reset(g.pop('trace_token'))
+        except ValueError:
+            _current_span.set(None)  # Torn down in a different context than it started
+        root.finish()
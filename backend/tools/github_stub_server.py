@@ -0,0 +1,223 @@
+"""
+Local stand-in for the GitHub REST API endpoints used by the portfolio features.
+
+Serves deterministic synthetic users and repositories with GitHub's pagination
+(Link headers), ETags and 304 Not Modified on If-None-Match, a rate-limit
+counter that conditional hits do not consume, and configurable latency.
+Point the backend at it with GITHUB_API_URL, e.g.:
+
+    python -m tools.github_stub_server --port 8090 --repos 250 --latency fixed:150
+    GITHUB_API_URL=http://localhost:8090 python app.py
+
+Repositories also serve /languages and /stats/participation (which answers 202
+while "computing" at --stats-pending-rate). GET /_stats returns request counts; POST /_touch/<user> changes a user's repos
+so cached responses go stale.
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tools.llm_stub_server import LatencyModel
+
+LANGUAGES = ['Python', 'TypeScript', 'JavaScript', 'Go', 'Rust', 'Java', 'C++', 'Shell', None]
+TOPICS = ['api', 'cli', 'data', 'web', 'ml', 'infra', 'tooling', 'game', 'docs']
+
+
+def synthetic_user(login: str, repos: int) -> dict:
+    rng = random.Random(login)
+    return {
+        'login': login,
+        'id': rng.randrange(1, 10 ** 8),
+        'name': login.replace('-', ' ').title(),
+        'bio': f"Builds {rng.choice(TOPICS)} tools.",
+        'location': rng.choice(['Berlin', 'Lagos', 'Toronto', 'Singapore', None]),
+        'company': rng.choice(['@acme', None]),
+        'blog': f"https://{login}.dev",
+        'email': None,
+        'hireable': rng.choice([True, None]),
+        'public_repos': repos,
+        'public_gists': rng.randrange(0, 20),
+        'followers': rng.randrange(0, 5000),
+        'following': rng.randrange(0, 300),
+        'html_url': f"https://github.com/{login}"
+    }
+
+
+def synthetic_repos(login: str, count: int, revision: int) -> list:
+    rng = random.Random(f"{login}:{revision}")
+    repos = []
+    for i in range(count):
+        name = f"{rng.choice(TOPICS)}-{i:04d}"
+        repos.append({
+            'id': rng.randrange(1, 10 ** 9),
+            'name': name,
+            'full_name': f"{login}/{name}",
+            'description': f"A {rng.choice(TOPICS)} project",
+            'language': rng.choice(LANGUAGES),
+            'fork': rng.random() < 0.2,
+            'stargazers_count': int(rng.paretovariate(1.2)) - 1,
+            'forks_count': rng.randrange(0, 30),
+            'size': rng.randrange(10, 50000),
+            'html_url': f"https://github.com/{login}/{name}",
+            'pushed_at': f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}T12:00:00Z"
+        })
+    return sorted(repos, key=lambda r: r['full_name'])
+
+
+def synthetic_languages(owner: str, repo: str) -> dict:
+    rng = random.Random(f"{owner}/{repo}:languages")
+    languages = rng.sample([lang for lang in LANGUAGES if lang], rng.randrange(1, 4))
+    return {lang: int(rng.paretovariate(1.1) * 5000) for lang in languages}
+
+
+def synthetic_participation(owner: str, repo: str) -> dict:
+    rng = random.Random(f"{owner}/{repo}:participation")
+    weekly = [rng.randrange(0, 12) if rng.random() < 0.35 else 0 for _ in range(52)]
+    return {'all': weekly, 'owner': [count - rng.randrange(0, count + 1) // 3 for count in weekly]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "GitHubStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if not self.server.options.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        parts = [p for p in parsed.path.split('/') if p]
+        if parts == ['_stats']:
+            with self.server.lock:
+                self._send_json(200, dict(self.server.stats, rate_limit_remaining=self.server.rate_remaining))
+            return
+
+        time.sleep(self.server.latency.sample())
+        if len(parts) == 2 and parts[0] == 'users':
+            self._respond(parsed, synthetic_user(parts[1], self.server.options.repos))
+        elif len(parts) == 3 and parts[0] == 'users' and parts[2] == 'repos':
+            self._respond_page(parsed, parts[1])
+        elif len(parts) == 4 and parts[0] == 'repos' and parts[3] == 'languages':
+            self._respond(parsed, synthetic_languages(parts[1], parts[2]))
+        elif len(parts) == 5 and parts[0] == 'repos' and parts[3:] == ['stats', 'participation']:
+            with self.server.lock:
+                pending = self.server.rng.random() < self.server.options.stats_pending_rate
+            if pending:
+                self._send_json(202, {})
+            else:
+                self._respond(parsed, synthetic_participation(parts[1], parts[2]))
+        else:
+            self._send_json(404, {'message': 'Not Found'})
+
+    def do_POST(self):
+        parts = [p for p in urlparse(self.path).path.split('/') if p]
+        if len(parts) == 2 and parts[0] == '_touch':
+            with self.server.lock:
+                self.server.revisions[parts[1]] = self.server.revisions.get(parts[1], 0) + 1
+            self._send_json(200, {'user': parts[1], 'revision': self.server.revisions[parts[1]]})
+        else:
+            self._send_json(404, {'message': 'Not Found'})
+
+    def _respond_page(self, parsed, login: str):
+        query = parse_qs(parsed.query)
+        per_page = min(int(query.get('per_page', ['30'])[0]), 100)
+        page = max(int(query.get('page', ['1'])[0]), 1)
+        with self.server.lock:
+            revision = self.server.revisions.get(login, 0)
+        repos = synthetic_repos(login, self.server.options.repos, revision)
+        last = max((len(repos) + per_page - 1) // per_page, 1)
+
+        base = f"http://{self.headers.get('Host')}{parsed.path}?per_page={per_page}"
+        links = []
+        if page < last:
+            links.append(f'<{base}&page={page + 1}>; rel="next"')
+            links.append(f'<{base}&page={last}>; rel="last"')
+        if page > 1:
+            links.append(f'<{base}&page=1>; rel="first"')
+            links.append(f'<{base}&page={page - 1}>; rel="prev"')
+        self._respond(parsed, repos[(page - 1) * per_page:page * per_page], {'Link': ', '.join(links)} if links else {})
+
+    def _respond(self, parsed, body, headers: dict = None):
+        data = json.dumps(body).encode('utf-8')
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        with self.server.lock:
+            self.server.stats['requests'] += 1
+            if self.headers.get('If-None-Match') == etag:
+                self.server.stats['not_modified'] += 1
+                not_modified = True
+            else:
+                self.server.stats['full'] += 1
+                self.server.rate_remaining = max(self.server.rate_remaining - 1, 0)
+                not_modified = False
+            remaining = self.server.rate_remaining
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header('ETag', etag)
+        self.send_header('X-RateLimit-Limit', str(self.server.options.rate_limit))
+        self.send_header('X-RateLimit-Remaining', str(remaining))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if not_modified:
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def create_server(options) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((options.host, options.port), StubHandler)
+    server.daemon_threads = True
+    server.options = options
+    server.rng = random.Random(options.seed)
+    server.latency = LatencyModel(options.latency, server.rng)
+    server.lock = threading.Lock()
+    server.revisions = {}
+    server.stats = {'requests': 0, 'full': 0, 'not_modified': 0}
+    server.rate_remaining = options.rate_limit
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local GitHub REST API stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--repos', type=int, default=120, help="Repositories per synthetic user")
+    parser.add_argument('--latency', default='fixed:0',
+                        help="fixed:MS | uniform:LO,HI | normal:MEAN,STD | lognormal:MU,SIGMA | exponential:MEAN")
+    parser.add_argument('--stats-pending-rate', type=float, default=0.0,
+                        help="Fraction of participation requests answered with 202 (still computing)")
+    parser.add_argument('--rate-limit', type=int, default=5000)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--quiet', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    server = create_server(options)
+    print(f"GitHub stub listening on http://{options.host}:{options.port} ({options.repos} repos per user)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
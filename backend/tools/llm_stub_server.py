@@ -0,0 +1,316 @@
+"""
+Local stand-in for chat-completions providers (OpenAI, Perplexity).
+
+Serves recorded responses, records new ones by proxying to a real provider,
+or synthesizes responses, with configurable latency, error injection and
+streaming. Point the backend at it with LLM_STUB_URL, e.g.:
+
+    python -m tools.llm_stub_server --port 8089 --latency lognormal:6.5,0.5
+    LLM_STUB_URL=http://localhost:8089/v1 python app.py
+"""
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOREM = (
+    "Strong candidates explain the context, the action they took and the measurable "
+    "result they delivered while connecting their experience to the role"
+).split()
+
+
+class LatencyModel:
+    """Samples response latency (seconds) from a named distribution given in milliseconds."""
+
+    def __init__(self, spec: str = "fixed:0", rng: random.Random = None):
+        self.rng = rng or random.Random()
+        name, _, params = spec.partition(':')
+        self.name = name
+        self.params = [float(p) for p in params.split(',') if p]
+
+    def sample(self) -> float:
+        if self.name == 'fixed':
+            ms = self.params[0] if self.params else 0
+        elif self.name == 'uniform':
+            ms = self.rng.uniform(self.params[0], self.params[1])
+        elif self.name == 'normal':
+            ms = max(self.rng.gauss(self.params[0], self.params[1]), 0)
+        elif self.name == 'lognormal':
+            # Parameters are mu and sigma of the underlying normal (log milliseconds)
+            ms = self.rng.lognormvariate(self.params[0], self.params[1])
+        elif self.name == 'exponential':
+            ms = self.rng.expovariate(1.0 / self.params[0])
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.name}")
+        return ms / 1000.0
+
+
+class RecordingStore:
+    """JSONL store of request/response pairs keyed by a hash of the request."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._responses = {}
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            self._responses[record['key']] = record['response']
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def key(payload: dict) -> str:
+        request = {'model': payload.get('model'), 'messages': payload.get('messages')}
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, payload: dict):
+        return self._responses.get(self.key(payload))
+
+    def add(self, payload: dict, response: dict):
+        key = self.key(payload)
+        with self._lock:
+            self._responses[key] = response
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'key': key, 'request': payload, 'response': response}) + '\n')
+
+    def __len__(self):
+        return len(self._responses)
+
+
+def synthetic_content(prompt: str, max_tokens: int, rng: random.Random) -> str:
+    """Build a plausible response, echoing the JSON shape the prompt asks for when there is one."""
+    marker = prompt.rfind('JSON')
+    start = prompt.find('{', marker) if marker >= 0 else -1
+    if start >= 0:
+        depth = 0
+        for end in range(start, len(prompt)):
+            depth += {'{': 1, '}': -1}.get(prompt[end], 0)
+            if depth == 0:
+                template = re.sub(r',\s*\.\.\.', '', prompt[start:end + 1])
+                try:
+                    return json.dumps(json.loads(template))
+                except json.JSONDecodeError:
+                    break
+
+    words = max(min(max_tokens or 200, 400) * 3 // 4, 1)
+    return ' '.join(rng.choice(LOREM) for _ in range(words)) + '.'
+
+
+def completion_body(payload: dict, content: str) -> dict:
+    prompt_words = sum(len(str(m.get('content', '')).split()) for m in payload.get('messages', []))
+    return {
+        'id': f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': payload.get('model', 'stub'),
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': 'stop'
+        }],
+        'usage': {
+            'prompt_tokens': prompt_words * 4 // 3,
+            'completion_tokens': len(content.split()) * 4 // 3,
+            'total_tokens': (prompt_words + len(content.split())) * 4 // 3
+        }
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "LLMStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if not self.server.options.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        if self.path.rstrip('/') in ('', '/health'):
+            self._send_json(200, {'status': 'healthy', 'recordings': len(self.server.store)})
+        elif self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'stub', 'object': 'model'}]})
+        else:
+            self._send_json(404, {'error': {'message': 'Not found'}})
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            self._send_json(400, {'error': {'message': 'Invalid JSON body'}})
+            return
+
+        options = self.server.options
+        with self.server.rng_lock:
+            roll = self.server.rng.random()
+            latency = self.server.latency.sample()
+            error_code = self.server.rng.choice(options.error_codes)
+
+        if roll < options.hang_rate:
+            time.sleep(options.hang_seconds)
+            self._send_json(504, {'error': {'message': 'Injected upstream hang'}})
+            return
+        if roll < options.hang_rate + options.error_rate:
+            time.sleep(latency)
+            self._send_json(error_code, {'error': {'message': f'Injected error {error_code}',
+                                                   'type': 'stub_injected_error'}})
+            return
+
+        body = self._resolve(payload)
+        if body is None:
+            return
+
+        if payload.get('stream'):
+            self._stream(body, latency)
+        else:
+            time.sleep(latency)
+            self._send_json(200, body)
+
+    def _resolve(self, payload: dict):
+        """Look up a recorded response, record one from upstream, or synthesize one."""
+        options, store = self.server.options, self.server.store
+        recorded = store.get(payload)
+        if recorded is not None and options.mode != 'record':
+            return recorded
+
+        if options.mode == 'record':
+            try:
+                response = self._proxy(payload)
+            except urllib.error.HTTPError as e:
+                self._send_json(e.code, {'error': {'message': f'Upstream error: {e.reason}'}})
+                return None
+            store.add(payload, response)
+            return response
+
+        if options.mode == 'replay-strict':
+            self._send_json(404, {'error': {'message': 'No recording for this request'}})
+            return None
+
+        prompt = ' '.join(str(m.get('content', '')) for m in payload.get('messages', []))
+        with self.server.rng_lock:
+            content = synthetic_content(prompt, payload.get('max_tokens'), self.server.rng)
+        return completion_body(payload, content)
+
+    def _proxy(self, payload: dict) -> dict:
+        options = self.server.options
+        upstream = dict(payload, stream=False)
+        request = urllib.request.Request(
+            options.upstream.rstrip('/') + '/chat/completions',
+            data=json.dumps(upstream).encode('utf-8'),
+            headers={
+                'Content-Type': 'application/json',
+                'Authorization': self.headers.get('Authorization', '')
+            }
+        )
+        with urllib.request.urlopen(request, timeout=options.upstream_timeout) as response:
+            return json.loads(response.read())
+
+    def _stream(self, body: dict, first_token_latency: float):
+        """Send the completion as server-sent events, one chunk per word."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        content = body['choices'][0]['message']['content']
+        pieces = re.findall(r'\S+\s*', content) or ['']
+        time.sleep(first_token_latency)
+        try:
+            for i, piece in enumerate(pieces):
+                chunk = {
+                    'id': body['id'],
+                    'object': 'chat.completion.chunk',
+                    'created': body['created'],
+                    'model': body['model'],
+                    'choices': [{
+                        'index': 0,
+                        'delta': {'role': 'assistant', 'content': piece} if i == 0 else {'content': piece},
+                        'finish_reason': None
+                    }]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                if self.server.options.token_interval:
+                    time.sleep(self.server.options.token_interval / 1000.0)
+            final = {'id': body['id'], 'object': 'chat.completion.chunk', 'created': body['created'],
+                     'model': body['model'], 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode('utf-8'))
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client cancelled the stream
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def create_server(options) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((options.host, options.port), StubHandler)
+    server.daemon_threads = True
+    server.options = options
+    server.rng = random.Random(options.seed)
+    server.rng_lock = threading.Lock()
+    server.latency = LatencyModel(options.latency, server.rng)
+    server.store = RecordingStore(options.recordings)
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local chat-completions stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--mode', choices=['replay', 'replay-strict', 'record', 'synthetic'], default='replay',
+                        help="replay falls back to synthetic responses; replay-strict returns 404 instead")
+    parser.add_argument('--recordings', help="JSONL file of recorded responses")
+    parser.add_argument('--upstream', default='https://api.openai.com/v1', help="Provider URL used in record mode")
+    parser.add_argument('--upstream-timeout', type=float, default=60.0)
+    parser.add_argument('--latency', default='fixed:0',
+                        help="fixed:MS | uniform:LO,HI | normal:MEAN,STD | lognormal:MU,SIGMA | exponential:MEAN")
+    parser.add_argument('--token-interval', type=float, default=0, help="Milliseconds between streamed chunks")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument('--error-codes', type=lambda v: [int(c) for c in v.split(',')], default=[429, 500, 503])
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument('--hang-seconds', type=float, default=120.0)
+    parser.add_argument('--seed', type=int, help="Seed for repeatable latency and error sequences")
+    parser.add_argument('--quiet', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    server = create_server(options)
+    print(f"LLM stub listening on http://{options.host}:{options.port}/v1 (mode={options.mode})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()